@@ -1,14 +1,45 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from anyio import to_thread
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+import json
 import sqlite3
 import logging
+import threading
 
-from app.models.models import WeatherData, AirPollutionData, CityStats, WeatherQueryParams
+from app.models.models import (
+    WeatherData, AirPollutionData, LatestMeasurement, CityStats, CitySeries, WeatherQueryParams,
+    CorrelationMatrix, ConditionalStats, CityAqiForecast, Alert, AlertRuleSpec, City, CityIn,
+    MeasurementColumns
+)
 from app.services.collector_service import CollectorService
-from app.database.database import get_db
-from app.core.config import ALLOWED_ORIGINS
+from app.services.collector import ingest_queue
+from app.services.series import get_series
+from app.services.measurements import MEASUREMENT_FIELDS, get_measurements
+from app.services.analytics import correlation_matrix, conditional_statistics
+from app.services.forecast import MAX_HORIZON, aqi_forecaster
+from app.services.alerts import alert_engine
+from app.services.broadcast import broadcaster
+from app.services.http_client import fetch_latency
+from app.services.exporter import EXPORT_DATASETS, EXPORT_FORMATS, iter_export
+from app.database.database import get_db, get_pool_stats, timed_query
+from app.database.rollups import hour_start
+from app.database.latest import read_latest
+from app.database.cities import load_cities, resolve_city_ids, upsert_cities
+from app.database.timestamps import to_epoch, from_epoch, to_local
+from app.api.caching import cached_response
+from app.api.instrumentation import MetricsMiddleware
+from app.api.pagination import encode_cursor, decode_cursor, parse_fields
+from app.api.serialization import dumps, encode_rows, model_projection
+from app.core.cache import response_cache
+from app.core.metrics import render_prometheus
+from app.core.config import (
+    ALLOWED_ORIGINS, API_THREADPOOL_SIZE, API_DEFAULT_PAGE_SIZE, API_MAX_PAGE_SIZE, ANALYTICS_WINDOW_DAYS, SSE_MAX_CLIENTS,
+    MEASUREMENTS_MAX_ROWS, INGEST_QUEUE_ENABLED
+)
 
 # Configure logging
 logging.basicConfig(
@@ -17,11 +48,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def warm_analytics():
+    """Load the aligned analytics history and fit the AQI models once at startup"""
+    try:
+        aqi_forecaster.update()
+    except Exception as e:
+        logger.error(f"Error loading analytics history: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Size the worker thread pool that runs blocking (sqlite3) handlers, preload analytics and run the ingest writer"""
+    # Handlers that touch the database are plain `def`, so FastAPI runs them in
+    # this pool instead of blocking the event loop
+    to_thread.current_default_thread_limiter().total_tokens = API_THREADPOOL_SIZE
+    # Load the analytics history in the background so the first request does not pay for it
+    threading.Thread(target=warm_analytics, daemon=True).start()
+    # Write readings journaled but not persisted before the last shutdown
+    if INGEST_QUEUE_ENABLED:
+        try:
+            ingest_queue.start()
+        except (OSError, sqlite3.Error) as e:
+            logger.error(f"Error starting the ingest queue: {e}")
+    yield
+    ingest_queue.stop(timeout=30)
+
 # Create FastAPI app instance
 app = FastAPI(
     title="Weather Data API",
     description="API for collecting and retrieving weather and air pollution data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -31,12 +87,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Record request latency per route for /metrics
+app.add_middleware(MetricsMiddleware)
+
 collector_service = CollectorService()
 
 @app.get("/health")
-async def health_check():
+def health_check():
     """
     Health check endpoint to verify API status and database connection
     """
@@ -62,79 +122,206 @@ async def health_check():
             detail="Database connection failed"
         )
 
-@app.get("/api/v1/weather", response_model=List[WeatherData])
-async def get_weather_data(
+@app.get("/api/v1/database/pool")
+async def get_database_pool_stats():
+    """Get connection pool checkout and wait metrics"""
+    return get_pool_stats()
+
+@app.get("/api/v1/cache")
+async def get_cache_stats():
+    """Get response cache hit/miss metrics"""
+    return response_cache.stats()
+
+# Selectable measurement fields and the columns they are read from
+WEATHER_FIELDS = {
+    "temperature": "w.temperature",
+    "feels_like": "w.feels_like",
+    "humidity": "w.humidity",
+    "pressure": "w.pressure",
+    "wind_speed": "w.wind_speed",
+    "weather_description": "wc.weather_description",
+}
+
+AIR_POLLUTION_FIELDS = {
+    "aqi": "a.aqi",
+    "co": "a.co",
+    "no2": "a.no2",
+    "o3": "a.o3",
+    "pm2_5": "a.pm2_5",
+    "pm10": "a.pm10",
+}
+
+# Output expressions of the list endpoints, checked against and typed by their response models
+WEATHER_COLUMNS = model_projection(WeatherData, {
+    "city": "c.name", "country": "c.country", "measurement_timestamp": "w.measurement_timestamp", **WEATHER_FIELDS
+})
+AIR_POLLUTION_COLUMNS = model_projection(AirPollutionData, {
+    "city": "c.name", "country": "c.country", "measurement_timestamp": "a.measurement_timestamp", **AIR_POLLUTION_FIELDS
+})
+
+@app.get("/api/v1/cities", response_model=List[City])
+def get_cities(include_inactive: bool = False):
+    """
+    Get the cities the collector tracks
+    """
+    try:
+        return [
+            City(
+                city_id=city["city_id"],
+                name=city["name"],
+                country=city["country"],
+                latitude=city["lat"],
+                longitude=city["lon"],
+                active=city["active"],
+                shard=city["shard"],
+                collection_interval=city["collection_interval"],
+                priority=city["priority"]
+            )
+            for city in load_cities(include_inactive)
+        ]
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.post("/api/v1/cities")
+def add_cities(cities: List[CityIn]):
+    """
+    Add cities to collect, or update them by name and country
+
+    Set `active` to false to stop collecting a city while keeping its history.
+    `collection_interval` and `priority` adjust the city's collection schedule.
+    """
+    try:
+        count = upsert_cities([
+            {
+                "name": city.name, "country": city.country, "lat": city.latitude, "lon": city.longitude,
+                "active": city.active, "collection_interval": city.collection_interval, "priority": city.priority
+            }
+            for city in cities
+        ])
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+    response_cache.invalidate()
+    collector_service.reload_cities()
+    return {"status": "success", "message": f"{count} cities saved"}
+
+@app.get("/api/v1/weather", response_model=List[WeatherData], response_model_exclude_unset=True)
+def get_weather_data(
+    request: Request,
     city: Optional[str] = None,
     country: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    limit: int = Query(default=API_DEFAULT_PAGE_SIZE, ge=1, le=API_MAX_PAGE_SIZE),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    fields: Optional[str] = None
 ):
     """
-    Get weather data with optional filtering
+    Get weather data with optional filtering, newest first
+
+    Results are paginated with a keyset cursor: when more rows are available
+    the X-Next-Cursor response header holds the value to pass as `cursor`.
     """
+    selected = parse_fields(fields, WEATHER_FIELDS)
+    after = decode_cursor(page_cursor)
+    return cached_response(request, query_weather_data, selected, after, city, country, start_date, end_date, limit)
+
+def query_weather_data(
+    selected: List[str],
+    after: Optional[Tuple[int, int]],
+    city: Optional[str],
+    country: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+) -> Tuple[bytes, Dict[str, str]]:
+    """Run one page of the weather query and encode it as WeatherData objects"""
     try:
-        query = """
+        names = ["city", "country", "measurement_timestamp", *selected]
+        query = f"""
             SELECT 
-                c.name, c.country, w.measurement_timestamp,
-                w.temperature, w.feels_like, w.humidity,
-                w.pressure, w.wind_speed, w.weather_description
+                {", ".join(WEATHER_COLUMNS[name] for name in names)},
+                w.measurement_timestamp, w.weather_id
             FROM weather_measurements w
             JOIN cities c ON w.city_id = c.city_id
+            LEFT JOIN weather_conditions wc ON w.weather_condition_id = wc.weather_condition_id
             WHERE 1=1
         """
         params = []
 
-        if city:
-            query += " AND c.name = ?"
-            params.append(city)
-        if country:
-            query += " AND c.country = ?"
-            params.append(country)
+        if city or country:
+            # Filter on city_id so the (city_id, measurement_timestamp) index serves the ORDER BY
+            city_ids = resolve_city_ids(city, country)
+            if not city_ids:
+                return [], {}
+            query += f" AND w.city_id IN ({', '.join('?' * len(city_ids))})"
+            params.extend(city_ids)
         if start_date:
             query += " AND w.measurement_timestamp >= ?"
-            params.append(start_date.isoformat())
+            params.append(to_epoch(start_date))
         if end_date:
             query += " AND w.measurement_timestamp <= ?"
-            params.append(end_date.isoformat())
+            params.append(to_epoch(end_date))
+        if after:
+            query += " AND (w.measurement_timestamp, w.weather_id) < (?, ?)"
+            params.extend(after)
 
-        with get_db() as conn:
+        # Fetch one extra row to know whether another page exists
+        query += " ORDER BY w.measurement_timestamp DESC, w.weather_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with get_db() as conn, timed_query("weather_page"):
             cursor = conn.cursor()
             cursor.execute(query, params)
             results = cursor.fetchall()
 
-            return [
-                WeatherData(
-                    city=row[0],
-                    country=row[1],
-                    measurement_timestamp=datetime.fromisoformat(row[2]),
-                    temperature=row[3],
-                    feels_like=row[4],
-                    humidity=row[5],
-                    pressure=row[6],
-                    wind_speed=row[7],
-                    weather_description=row[8]
-                )
-                for row in results
-            ]
+        headers = {}
+        if len(results) > limit:
+            results = results[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(results[-1][-2], results[-1][-1])
+
+        # The trailing keyset columns are not part of the encoded objects
+        return encode_rows(names, results), headers
 
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
-@app.get("/api/v1/air-pollution", response_model=List[AirPollutionData])
-async def get_air_pollution_data(
+@app.get("/api/v1/air-pollution", response_model=List[AirPollutionData], response_model_exclude_unset=True)
+def get_air_pollution_data(
+    request: Request,
     city: Optional[str] = None,
     start_date: Optional[datetime] = None,
-    end_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None,
+    limit: int = Query(default=API_DEFAULT_PAGE_SIZE, ge=1, le=API_MAX_PAGE_SIZE),
+    page_cursor: Optional[str] = Query(default=None, alias="cursor"),
+    fields: Optional[str] = None
 ):
     """
-    Get air pollution data with optional filtering
+    Get air pollution data with optional filtering, newest first
+
+    Paginated the same way as /api/v1/weather.
     """
+    selected = parse_fields(fields, AIR_POLLUTION_FIELDS)
+    after = decode_cursor(page_cursor)
+    return cached_response(request, query_air_pollution_data, selected, after, city, start_date, end_date, limit)
+
+def query_air_pollution_data(
+    selected: List[str],
+    after: Optional[Tuple[int, int]],
+    city: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+) -> Tuple[bytes, Dict[str, str]]:
+    """Run one page of the air pollution query and encode it as AirPollutionData objects"""
     try:
-        query = """
+        names = ["city", "country", "measurement_timestamp", *selected]
+        query = f"""
             SELECT 
-                c.name, c.country, a.measurement_timestamp,
-                a.aqi, a.co, a.no2, a.o3, a.pm2_5, a.pm10
+                {", ".join(AIR_POLLUTION_COLUMNS[name] for name in names)},
+                a.measurement_timestamp, a.air_pollution_id
             FROM air_pollution_measurements a
             JOIN cities c ON a.city_id = c.city_id
             WHERE 1=1
@@ -142,74 +329,422 @@ async def get_air_pollution_data(
         params = []
 
         if city:
-            query += " AND c.name = ?"
-            params.append(city)
+            city_ids = resolve_city_ids(city)
+            if not city_ids:
+                return [], {}
+            query += f" AND a.city_id IN ({', '.join('?' * len(city_ids))})"
+            params.extend(city_ids)
         if start_date:
             query += " AND a.measurement_timestamp >= ?"
-            params.append(start_date.isoformat())
+            params.append(to_epoch(start_date))
         if end_date:
             query += " AND a.measurement_timestamp <= ?"
-            params.append(end_date.isoformat())
+            params.append(to_epoch(end_date))
+        if after:
+            query += " AND (a.measurement_timestamp, a.air_pollution_id) < (?, ?)"
+            params.extend(after)
 
-        with get_db() as conn:
+        query += " ORDER BY a.measurement_timestamp DESC, a.air_pollution_id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with get_db() as conn, timed_query("air_pollution_page"):
             cursor = conn.cursor()
             cursor.execute(query, params)
             results = cursor.fetchall()
 
-            return [
-                AirPollutionData(
-                    city=row[0],
-                    country=row[1],
-                    measurement_timestamp=datetime.fromisoformat(row[2]),
-                    aqi=row[3],
-                    co=row[4],
-                    no2=row[5],
-                    o3=row[6],
-                    pm2_5=row[7],
-                    pm10=row[8]
-                )
-                for row in results
-            ]
+        headers = {}
+        if len(results) > limit:
+            results = results[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(results[-1][-2], results[-1][-1])
+
+        # The trailing keyset columns are not part of the encoded objects
+        return encode_rows(names, results), headers
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/v1/measurements", response_model=MeasurementColumns)
+def get_measurements_columns(
+    request: Request,
+    cities: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    limit: int = Query(default=MEASUREMENTS_MAX_ROWS, ge=1, le=MEASUREMENTS_MAX_ROWS)
+):
+    """
+    Get weather and air pollution readings of several cities in one response
+
+    `cities` is a comma separated list of names (all cities when omitted) and
+    the window defaults to the last 24 hours. Readings are joined per city and
+    timestamp and returned as one array per field.
+    """
+    selected = parse_fields(fields, MEASUREMENT_FIELDS)
+    city_names = [name.strip() for name in cities.split(",") if name.strip()] if cities else None
+    return cached_response(
+        request, query_measurements, selected, city_names, country, start_date, end_date, limit
+    )
+
+def query_measurements(
+    selected: List[str],
+    cities: Optional[List[str]],
+    country: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    limit: int
+) -> Tuple[bytes, Dict[str, str]]:
+    """Run the joined query and encode the column-oriented body directly"""
+    try:
+        result = get_measurements(selected, cities, country, start_date, end_date, limit)
+        return dumps(result), {}
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/v1/latest", response_model=List[LatestMeasurement])
+def get_latest_measurements(
+    request: Request,
+    city: Optional[str] = None,
+    country: Optional[str] = None
+):
+    """
+    Get the most recent weather and air pollution reading for each city
+    """
+    return cached_response(request, query_latest_measurements, city, country)
+
+def query_latest_measurements(city: Optional[str], country: Optional[str]) -> Tuple[List[LatestMeasurement], Dict[str, str]]:
+    """Read one row per city from the table maintained at ingest"""
+    try:
+        with get_db() as conn, timed_query("latest_measurements"):
+            rows = read_latest(conn.cursor(), city, country)
+
+        return [LatestMeasurement(**row) for row in rows], {}
+
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+def query_series(dataset: str, column: str, bucket: str, **filters) -> Tuple[List[CitySeries], Dict[str, str]]:
+    """Run a downsampling query and map the result onto response models"""
+    try:
+        return [CitySeries(**series) for series in get_series(dataset, column, bucket, **filters)], {}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/v1/weather/series", response_model=List[CitySeries])
+def get_weather_series(
+    request: Request,
+    column: str = "temperature",
+    bucket: str = Query(default="1h", pattern="^(5m|1h|1d)$"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """
+    Get per-city time-bucketed aggregates (min/max/avg/last) of a weather column
+
+    Without `start_date` the series covers the 30 days before `end_date` (or
+    now): 720 hourly points per city, or 30 with `bucket=1d`.
+    """
+    return cached_response(
+        request, query_series, "weather", column, bucket,
+        city=city, country=country, start_date=start_date, end_date=end_date
+    )
+
+@app.get("/api/v1/air-pollution/series", response_model=List[CitySeries])
+def get_air_pollution_series(
+    request: Request,
+    column: str = "aqi",
+    bucket: str = Query(default="1h", pattern="^(5m|1h|1d)$"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """
+    Get per-city time-bucketed aggregates (min/max/avg/last) of an air pollution column
+
+    Without `start_date` the series covers the 30 days before `end_date` (or
+    now): 720 hourly points per city, or 30 with `bucket=1d`.
+    """
+    return cached_response(
+        request, query_series, "air-pollution", column, bucket,
+        city=city, country=country, start_date=start_date, end_date=end_date
+    )
+
+def query_analytics(analysis, *args, city: Optional[str], country: Optional[str], **kwargs) -> Tuple[Dict, Dict[str, str]]:
+    """Run an analytics function for the filtered cities, mapping errors onto HTTP errors"""
+    try:
+        city_ids = resolve_city_ids(city, country) if city or country else None
+        return analysis(*args, city_ids=city_ids, **kwargs), {}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/v1/analytics/correlations", response_model=CorrelationMatrix)
+def get_correlations(
+    request: Request,
+    method: str = Query(default="pearson", pattern="^(pearson|spearman)$"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    days: int = Query(default=ANALYTICS_WINDOW_DAYS, ge=1, le=ANALYTICS_WINDOW_DAYS)
+):
+    """
+    Get the correlation of each weather factor with each pollutant
+
+    Readings are aligned per city and timestamp, and centered per city.
+    Results are cached until the next collection sweep.
+    """
+    return cached_response(
+        request, query_analytics, correlation_matrix, method,
+        city=city, country=country, days=days
+    )
+
+@app.get("/api/v1/analytics/conditional", response_model=ConditionalStats)
+def get_conditional_statistics(
+    request: Request,
+    factor: str = "humidity",
+    pollutant: str = "pm2_5",
+    bins: int = Query(default=10, ge=2, le=50),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    days: int = Query(default=ANALYTICS_WINDOW_DAYS, ge=1, le=ANALYTICS_WINDOW_DAYS)
+):
+    """
+    Get a pollutant's mean, median, p90 and share of elevated readings per quantile bin of a weather factor
+    """
+    return cached_response(
+        request, query_analytics, conditional_statistics, factor, pollutant, bins,
+        city=city, country=country, days=days
+    )
+
+@app.get("/api/v1/forecast/aqi", response_model=List[CityAqiForecast])
+def get_aqi_forecast(
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    horizon: int = Query(default=MAX_HORIZON, ge=1, le=MAX_HORIZON)
+):
+    """
+    Get each city's AQI forecast for the next `horizon` hours
+
+    Forecasts are computed when the collector finishes a sweep and served
+    from memory.
+    """
+    try:
+        if aqi_forecaster.updated_at is None:
+            aqi_forecaster.update()
+        return aqi_forecaster.forecasts(city, country, horizon)
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(status_code=500, detail="Database error")
+
+@app.get("/api/v1/alerts", response_model=List[Alert])
+def get_alerts(
+    request: Request,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    rule: Optional[str] = None,
+    severity: Optional[str] = Query(default=None, pattern="^(info|warning|critical)$"),
+    since: Optional[datetime] = None,
+    limit: int = Query(default=100, ge=1, le=API_MAX_PAGE_SIZE)
+):
+    """
+    Get alerts fired by the ingest rule engine, newest first
+    """
+    return cached_response(request, query_alerts, city, country, rule, severity, since, limit)
+
+def query_alerts(
+    city: Optional[str],
+    country: Optional[str],
+    rule: Optional[str],
+    severity: Optional[str],
+    since: Optional[datetime],
+    limit: int
+) -> Tuple[List[Alert], Dict[str, str]]:
+    """Read fired alerts, filtered by city, rule, severity and time fired"""
+    try:
+        query = """
+            SELECT
+                a.alert_id, c.name, c.country, a.rule_name, a.severity, a.message,
+                a.measurement_timestamp, a.fired_at, a.details
+            FROM alerts a
+            JOIN cities c ON a.city_id = c.city_id
+            WHERE 1=1
+        """
+        params = []
+        if city:
+            query += " AND c.name = ?"
+            params.append(city)
+        if country:
+            query += " AND c.country = ?"
+            params.append(country)
+        if rule:
+            query += " AND a.rule_name = ?"
+            params.append(rule)
+        if severity:
+            query += " AND a.severity = ?"
+            params.append(severity)
+        if since:
+            query += " AND a.fired_at >= ?"
+            params.append(to_epoch(since))
+        query += " ORDER BY a.alert_id DESC LIMIT ?"
+        params.append(limit)
+
+        with get_db() as conn, timed_query("alerts"):
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            results = cursor.fetchall()
+
+        return [
+            Alert(
+                alert_id=row[0],
+                city=row[1],
+                country=row[2],
+                rule=row[3],
+                severity=row[4],
+                message=row[5],
+                measurement_timestamp=from_epoch(row[6]),
+                fired_at=from_epoch(row[7]),
+                values=json.loads(row[8]) if row[8] else {}
+            )
+            for row in results
+        ], {}
 
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
+@app.get("/api/v1/alerts/rules", response_model=List[AlertRuleSpec])
+def get_alert_rules():
+    """
+    Get the alert rules evaluated at ingest
+    """
+    return [
+        AlertRuleSpec(name=rule.name, severity=rule.severity, message=rule.message, conditions=rule.spec["conditions"])
+        for rule in alert_engine.rules
+    ]
+
+@app.get("/api/v1/stream")
+async def stream_measurements(last_event_id: Optional[str] = Header(default=None)):
+    """
+    Server-sent events with the latest readings of each city updated by a sweep
+
+    `measurements` events carry rows shaped like /api/v1/latest, for the
+    cities that changed. A `resync` event means the client missed events and
+    should reload /api/v1/latest.
+    """
+    if len(broadcaster.subscribers) >= SSE_MAX_CLIENTS:
+        raise HTTPException(status_code=503, detail="Too many stream clients")
+
+    return StreamingResponse(
+        broadcaster.stream(int(last_event_id) if last_event_id and last_event_id.isdigit() else None),
+        media_type="text/event-stream",
+        # Keep reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/v1/export/{dataset}")
+async def export_data(
+    dataset: str,
+    export_format: str = Query(default="ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """
+    Stream the full measurement history of a dataset as NDJSON or CSV
+    """
+    if dataset not in EXPORT_DATASETS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown dataset. Available: {', '.join(EXPORT_DATASETS)}"
+        )
+
+    return StreamingResponse(
+        iter_export(
+            dataset, export_format,
+            city=city, country=country, start_date=start_date, end_date=end_date
+        ),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{export_format}"'}
+    )
+
 @app.get("/api/v1/statistics", response_model=List[CityStats])
-async def get_statistics(
+def get_statistics(
+    request: Request,
     city: Optional[str] = None,
     days: Optional[int] = Query(default=7, ge=1, le=30)
 ):
     """
     Get statistical data for cities
+
+    Weather and air pollution are aggregated separately from their rollup
+    tables and merged per city. The window has hour resolution, or day
+    resolution for the part already compacted by the retention job.
     """
+    return cached_response(request, query_statistics, city, days)
+
+def query_statistics(city: Optional[str], days: int) -> Tuple[List[CityStats], Dict[str, str]]:
+    """Aggregate per-city statistics from the rollup tables"""
     try:
-        start_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        query = """
+        # Rollup buckets are local-time ISO text
+        start = to_local(datetime.now() - timedelta(days=days))
+        start_hour = hour_start(start.isoformat())
+        start_day = start.strftime("%Y-%m-%dT00:00:00")
+        city_filter = " AND c.name = ?" if city else ""
+        params = [start_hour, start_day, city] if city else [start_hour, start_day]
+
+        # Hourly buckets compacted by the retention job live on in the daily tier;
+        # the tiers never overlap, so their rows can simply be combined
+        weather_query = f"""
             SELECT 
                 c.name,
-                AVG(w.temperature) as avg_temp,
-                MAX(w.temperature) as max_temp,
-                MIN(w.temperature) as min_temp,
-                AVG(a.aqi) as avg_aqi,
-                COUNT(w.weather_id) as measurement_count
-            FROM cities c
-            LEFT JOIN weather_measurements w ON c.city_id = w.city_id
-            LEFT JOIN air_pollution_measurements a ON c.city_id = a.city_id
-            WHERE w.measurement_timestamp >= ?
-            GROUP BY c.name
+                SUM(r.temperature_sum) / SUM(r.temperature_count) as avg_temp,
+                MAX(r.temperature_max) as max_temp,
+                MIN(r.temperature_min) as min_temp,
+                SUM(r.measurement_count) as measurement_count
+            FROM (
+                SELECT city_id, temperature_sum, temperature_count, temperature_max, temperature_min, measurement_count
+                FROM weather_hourly_rollup WHERE hour_start >= ?
+                UNION ALL
+                SELECT city_id, temperature_sum, temperature_count, temperature_max, temperature_min, measurement_count
+                FROM weather_daily_rollup WHERE day_start >= ?
+            ) r
+            JOIN cities c ON r.city_id = c.city_id
+            WHERE 1=1{city_filter}
+            GROUP BY c.city_id
+        """
+        air_query = f"""
+            SELECT 
+                c.name,
+                SUM(r.aqi_sum) / SUM(r.aqi_count) as avg_aqi
+            FROM (
+                SELECT city_id, aqi_sum, aqi_count FROM air_pollution_hourly_rollup WHERE hour_start >= ?
+                UNION ALL
+                SELECT city_id, aqi_sum, aqi_count FROM air_pollution_daily_rollup WHERE day_start >= ?
+            ) r
+            JOIN cities c ON r.city_id = c.city_id
+            WHERE 1=1{city_filter}
+            GROUP BY c.city_id
         """
-        params = [start_date]
-
-        if city:
-            query += " HAVING c.name = ?"
-            params.append(city)
 
         with get_db() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, params)
-            results = cursor.fetchall()
+            with timed_query("statistics_weather"):
+                cursor.execute(weather_query, params)
+                weather_results = cursor.fetchall()
+            with timed_query("statistics_air_pollution"):
+                cursor.execute(air_query, params)
+                avg_aqi_by_city = {row[0]: row[1] for row in cursor.fetchall()}
 
             return [
                 CityStats(
@@ -217,18 +752,18 @@ async def get_statistics(
                     avg_temperature=row[1],
                     max_temperature=row[2],
                     min_temperature=row[3],
-                    avg_aqi=row[4],
-                    measurements_count=row[5]
+                    avg_aqi=avg_aqi_by_city.get(row[0]),
+                    measurements_count=row[4]
                 )
-                for row in results
-            ]
+                for row in weather_results
+            ], {}
 
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         raise HTTPException(status_code=500, detail="Database error")
 
 @app.post("/api/v1/collector/start")
-async def start_collector():
+def start_collector():
     """Start the data collection process"""
     success, message = collector_service.start_collection()
     if success:
@@ -236,7 +771,7 @@ async def start_collector():
     raise HTTPException(status_code=400, detail=message)
 
 @app.post("/api/v1/collector/stop")
-async def stop_collector():
+def stop_collector():
     """Stop the data collection process"""
     success, message = collector_service.stop_collection()
     if success:
@@ -249,6 +784,16 @@ async def get_collector_status():
     status = collector_service.get_status()
     return status
 
+@app.get("/api/v1/collector/http-metrics")
+async def get_collector_http_metrics():
+    """Get per-endpoint OpenWeather request latency histograms"""
+    return {"request_duration_seconds": fetch_latency.snapshot()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose all metrics in the Prometheus text format"""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.put("/api/v1/collector/interval")
 async def set_collection_interval(interval: int = Query(..., gt=0)):
     """Set the collection interval in seconds"""
@@ -0,0 +1,45 @@
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.api.serialization import dumps
+from app.core.cache import response_cache
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def cached_response(request: Request, build: Callable[..., Tuple[Any, Dict[str, str]]], *args, **kwargs) -> Response:
+    """
+    Serve a JSON response from the response cache, building it on a miss
+
+    `build` returns the response content (or an already encoded JSON body)
+    and extra headers. A matching If-None-Match short-circuits to 304
+    without serializing anything.
+    """
+    key = response_cache.make_key(request.url.path, request.query_params.multi_items())
+    entry = response_cache.get(key)
+
+    if entry is None:
+        # Capture the version first so a sweep committing mid-build is not cached as current
+        version = response_cache.version
+        content, headers = build(*args, **kwargs)
+        if isinstance(content, bytes):
+            body = content
+        else:
+            body = dumps(jsonable_encoder(content, exclude_unset=True))
+        entry = response_cache.set(key, body, headers, version)
+
+    cache_headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=cache_headers)
+
+    return Response(
+        content=entry.body,
+        media_type="application/json",
+        headers={**entry.headers, **cache_headers}
+    )
@@ -0,0 +1,67 @@
+import time
+from typing import Any, Callable, Dict, Optional
+
+from app.core.metrics import Histogram
+
+request_latency = Histogram(
+    "http_request_duration_seconds",
+    "Latency of API requests",
+    ["method", "route", "status"]
+)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template
+
+    Routes are labelled by their template (/api/v1/export/{dataset}) rather
+    than the raw path so label cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._templates: Dict[Callable, str] = {}
+
+    def route_template(self, scope: Dict[str, Any]) -> str:
+        """Template of the route that handled the request"""
+        route = scope.get("route")
+        if route is not None and hasattr(route, "path"):
+            return route.path
+
+        # The router records the matched endpoint in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if endpoint not in self._templates:
+            app = scope.get("app")
+            for candidate in getattr(app, "routes", ()):
+                if getattr(candidate, "endpoint", None) is endpoint:
+                    self._templates[endpoint] = candidate.path
+                    break
+            else:
+                return "unmatched"
+        return self._templates[endpoint]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status: Optional[int] = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Streaming responses are timed until their last chunk is sent
+            request_latency.observe(
+                time.perf_counter() - started_at,
+                scope["method"],
+                self.route_template(scope),
+                str(status or 500)
+            )
@@ -0,0 +1,35 @@
+import base64
+import binascii
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+def encode_cursor(measurement_timestamp: int, row_id: int) -> str:
+    """Encode the keyset position of the last returned row as an opaque cursor"""
+    raw = f"{measurement_timestamp}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Decode a cursor produced by encode_cursor"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        measurement_timestamp, row_id = raw.rsplit("|", 1)
+        return int(measurement_timestamp), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_fields(fields: Optional[str], available: Dict[str, str]) -> List[str]:
+    """Parse a comma separated field selection, defaulting to all available fields"""
+    if not fields:
+        return list(available)
+
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in available]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(available)}"
+        )
+    return selected
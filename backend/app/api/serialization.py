@@ -0,0 +1,61 @@
+"""
+Bulk JSON encoding of query rows without per-row response models.
+
+A list page can hold thousands of rows. Building a Pydantic model per row and
+running it through jsonable_encoder costs more than the query itself, so list
+endpoints encode cursor tuples straight to JSON bytes with orjson. The
+response model is still the contract, but it is applied once per field rather
+than once per row: model_projection derives each field's SQL expression from
+the model's type (REAL/INTEGER casts, datetimes formatted by SQLite), so rows
+already hold the values the model would have serialized.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, Sequence, Type, Union, get_args, get_origin
+
+import orjson
+from pydantic import BaseModel
+
+from app.database.timestamps import local_sql
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible content (dicts, lists, str, int, float, None, datetime)"""
+    return orjson.dumps(content)
+
+def field_type(model: Type[BaseModel], field: str) -> type:
+    """Type of a model field with Optional[...] unwrapped"""
+    annotation = model.model_fields[field].annotation
+    if get_origin(annotation) is Union:
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    return annotation
+
+def cast_sql(expression: str, target: type) -> str:
+    """SQL expression producing `target`'s JSON form from a column"""
+    if target is float:
+        # NUMERIC affinity stores 20.0 as 20; the model would have sent 20.0
+        return f"CAST({expression} AS REAL)"
+    if target is int:
+        return f"CAST({expression} AS INTEGER)"
+    if target is datetime:
+        return local_sql(expression)
+    return expression
+
+def model_projection(model: Type[BaseModel], columns: Dict[str, str]) -> Dict[str, str]:
+    """
+    SQL expression per field of `columns` (field -> column) shaped by `model`
+
+    Raises ValueError at import when a column is not a field of the model,
+    so the fast path cannot drift from the documented response schema.
+    """
+    unknown = [field for field in columns if field not in model.model_fields]
+    if unknown:
+        raise ValueError(f"{model.__name__} has no fields {', '.join(unknown)}")
+    return {field: cast_sql(column, field_type(model, field)) for field, column in columns.items()}
+
+def encode_rows(names: Sequence[str], rows: Iterable[Sequence[Any]]) -> bytes:
+    """
+    Encode rows as a JSON array of objects keyed by `names`
+
+    Columns past len(names) (e.g. keyset cursor columns) are left out, since
+    zip stops at the shorter sequence.
+    """
+    return orjson.dumps([dict(zip(names, row)) for row in rows])
@@ -0,0 +1,41 @@
+# Alert rules evaluated on every reading at ingest (override with ALERT_RULES_PATH).
+# Fields are the keys of extract_current_weather() / extract_air_pollution_data();
+# see app/services/alerts.py for the condition syntax.
+DEFAULT_ALERT_RULES = [
+    {
+        "name": "pm2_5_stagnant_air",
+        "severity": "warning",
+        "message": "PM2.5 is elevated while there is almost no wind to disperse it",
+        "conditions": [["pm2_5", ">=", 25], ["wind_speed", "<", 2]],
+    },
+    {
+        "name": "pm2_5_humid_haze",
+        "severity": "warning",
+        "message": "PM2.5 is elevated in very humid air",
+        "conditions": [["pm2_5", ">=", 25], ["humidity", ">=", 85]],
+    },
+    {
+        "name": "pm2_5_rising",
+        "severity": "info",
+        "message": "PM2.5 has risen for 3 sweeps in a row",
+        "conditions": [["pm2_5", "rising", 3], ["pm2_5", ">=", 10]],
+    },
+    {
+        "name": "no2_stagnant_air",
+        "severity": "warning",
+        "message": "NO2 is elevated under low wind",
+        "conditions": [["no2", ">=", 70], ["wind_speed", "<", 3]],
+    },
+    {
+        "name": "ozone_heat",
+        "severity": "warning",
+        "message": "Ozone is elevated on a hot day",
+        "conditions": [["o3", ">=", 100], ["temp", ">=", 25]],
+    },
+    {
+        "name": "poor_aqi_sustained",
+        "severity": "critical",
+        "message": "AQI has been poor or worse for 3 sweeps",
+        "conditions": [["aqi", ">=", 4, 3]],
+    },
+]
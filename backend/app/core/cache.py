@@ -0,0 +1,80 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core.config import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+
+class CachedResponse:
+    """Serialized response body with the headers and ETag it was served with"""
+
+    def __init__(self, body: bytes, headers: Dict[str, str], version: int, expires_at: float):
+        self.body = body
+        self.headers = headers
+        self.version = version
+        self.expires_at = expires_at
+        self.etag = f'"{hashlib.blake2s(body, digest_size=16).hexdigest()}"'
+
+class ResponseCache:
+    """LRU + TTL cache of serialized API responses, versioned by collector sweeps"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path: str, params: Iterable[Tuple[str, str]]) -> str:
+        """Normalize a request into a cache key independent of parameter order"""
+        normalized = sorted((name, value) for name, value in params if value != "")
+        return path + "?" + "&".join(f"{name}={value}" for name, value in normalized)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Return a fresh cached response, or None on miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != self.version or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def set(self, key: str, body: bytes, headers: Dict[str, str], version: int) -> CachedResponse:
+        """Store a serialized response built against the given data version"""
+        entry = CachedResponse(body, headers, version, time.monotonic() + self.ttl)
+        with self._lock:
+            # Drop responses built from data that a sweep has replaced meanwhile
+            if version == self.version and self.max_entries > 0:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        """Discard all entries after new data has been committed"""
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+response_cache = ResponseCache()
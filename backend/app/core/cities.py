@@ -1,4 +1,4 @@
-# List of cities with their coordinates
+# Cities seeded into an empty database; the cities table is the list the collector walks
 CITIES = [
     {"name": "Amsterdam", "country": "Netherlands", "lat": 52.3676, "lon": 4.9041},
     {"name": "Athens", "country": "Greece", "lat": 37.9838, "lon": 23.7275},
@@ -30,15 +30,24 @@ API_KEY: Optional[str] = os.getenv("OPENWEATHER_API_KEY")
 if not API_KEY:
     raise ValueError("OPENWEATHER_API_KEY must be set in .env file")
 
-# API endpoints
-CURRENT_WEATHER_API_URL = "https://api.openweathermap.org/data/2.5/weather"
-AIR_POLLUTION_API_URL = "https://api.openweathermap.org/data/2.5/air_pollution"
+# API endpoints (override the base URL to point the collector at a local stub server)
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org/data/2.5").rstrip("/")
+CURRENT_WEATHER_API_URL = f"{OPENWEATHER_BASE_URL}/weather"
+AIR_POLLUTION_API_URL = f"{OPENWEATHER_BASE_URL}/air_pollution"
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR}/data/weather_data.db")
 
+# Connection pool settings
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # reader connections
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_BUSY_TIMEOUT = int(os.getenv("DB_BUSY_TIMEOUT", "5000"))  # milliseconds
+DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE", "-64000"))  # pages, negative values are KiB
+DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))  # bytes
+
 # Output configuration
 OUTPUT_CSV_PATH = BASE_DIR / "data" / "cities_weather_data.csv"
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "5000"))  # rows fetched per chunk when exporting
 
 # Units
 TEMP_UNIT = "Celsius"  # Use Celsius for temperature
@@ -50,6 +59,34 @@ COLLECTION_INTERVAL = int(os.getenv("COLLECTION_INTERVAL", "3600"))
 # Request settings
 REQUEST_TIMEOUT = int(os.getenv("REQUEST_TIMEOUT", "10"))  # seconds
 
+# Outbound HTTP settings
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))  # keep-alive connections per host
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))  # retries on 429/5xx and connection errors
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "0.5"))  # seconds, doubled per retry
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))  # seconds
+
+# Collection engine settings
+# "async" fetches all cities concurrently, "sync" walks the city list one by one,
+# "sharded" splits the cities across COLLECTOR_WORKERS processes running the
+# async engine (each with COLLECTION_CONCURRENCY and an equal share of the rate limit)
+COLLECTION_MODE = os.getenv("COLLECTION_MODE", "async").lower()
+COLLECTOR_WORKERS = int(os.getenv("COLLECTOR_WORKERS", str(os.cpu_count() or 1)))
+COLLECTION_CONCURRENCY = int(os.getenv("COLLECTION_CONCURRENCY", "10"))  # cities in flight
+# Token bucket limiting outbound OpenWeather requests (0 disables the limit)
+COLLECTION_RATE_LIMIT = float(os.getenv("COLLECTION_RATE_LIMIT", "10"))  # requests per second
+COLLECTION_RATE_BURST = int(os.getenv("COLLECTION_RATE_BURST", "10"))  # requests
+
+# Collection scheduling
+# "spread" gives every city its own due time, evenly spaced across its interval
+# (cities can override COLLECTION_INTERVAL and set a priority in the cities table),
+# "sweep" collects all cities at once every COLLECTION_INTERVAL
+COLLECTION_SCHEDULE = os.getenv("COLLECTION_SCHEDULE", "spread").lower()
+COLLECTION_JITTER = float(os.getenv("COLLECTION_JITTER", "0.25"))  # fraction of the spacing between cities
+COLLECTION_BATCH_WINDOW = float(os.getenv("COLLECTION_BATCH_WINDOW", "5"))  # seconds; cities due this close share a batch
+COLLECTION_RETRY_DELAY = float(os.getenv("COLLECTION_RETRY_DELAY", "30"))  # seconds before a failed batch is retried
+# OpenWeather calls allowed per sliding minute, both endpoints counted (0 disables the budget)
+OPENWEATHER_CALLS_PER_MINUTE = int(os.getenv("OPENWEATHER_CALLS_PER_MINUTE", "60"))
+
 # Additional configurations that could be useful
 DEBUG = os.getenv("DEBUG", "False").lower() == "true"
 
@@ -59,4 +96,62 @@ API_URLS = {
     "production": "http://192.168.0.104:8000/api/v1"
 }
 
-API_BASE_URL = API_URLS[ENVIRONMENT]
\ No newline at end of file
+API_BASE_URL = API_URLS[ENVIRONMENT]
+
+# Worker threads running blocking request handlers (database access)
+API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "20"))
+
+# Response cache for read endpoints, invalidated whenever a sweep is committed
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))  # entries
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))  # seconds
+
+# Pagination limits for list endpoints
+API_DEFAULT_PAGE_SIZE = int(os.getenv("API_DEFAULT_PAGE_SIZE", "1000"))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "10000"))
+# Row cap of the column-oriented /api/v1/measurements endpoint
+MEASUREMENTS_MAX_ROWS = int(os.getenv("MEASUREMENTS_MAX_ROWS", "100000"))
+# Retention: raw rows are deleted after RAW_RETENTION_DAYS (they live on in the
+# hourly rollups), hourly rollups are compacted into daily ones after
+# HOURLY_RETENTION_DAYS. 0 keeps a tier forever.
+RAW_RETENTION_DAYS = int(os.getenv("RAW_RETENTION_DAYS", "90"))
+HOURLY_RETENTION_DAYS = int(os.getenv("HOURLY_RETENTION_DAYS", "730"))
+RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", "86400"))  # seconds between retention runs
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))  # rows deleted per write transaction
+VACUUM_PAGES_PER_STEP = int(os.getenv("VACUUM_PAGES_PER_STEP", "1000"))  # free pages released per step
+
+# Parquet archive of closed months (one file per month and city), written by
+# the retention job before raw rows are deleted; needs pyarrow
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "True").lower() == "true"
+ARCHIVE_PATH = Path(os.getenv("ARCHIVE_PATH", str(BASE_DIR / "data" / "archive")))
+ARCHIVE_COMPRESSION = os.getenv("ARCHIVE_COMPRESSION", "zstd")
+
+# Durable ingest queue: fetched payloads are appended to a journal in
+# INGEST_JOURNAL_PATH and written by one writer thread in batches, so a slow or
+# locked database does not hold up fetching and failed writes are retried.
+# Records not yet in the database are replayed on start.
+INGEST_QUEUE_ENABLED = os.getenv("INGEST_QUEUE_ENABLED", "True").lower() == "true"
+INGEST_JOURNAL_PATH = Path(os.getenv("INGEST_JOURNAL_PATH", str(BASE_DIR / "data" / "ingest_journal")))
+INGEST_QUEUE_MAX_RECORDS = int(os.getenv("INGEST_QUEUE_MAX_RECORDS", "50000"))  # waiting readings before fetches block
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))  # readings per write transaction
+INGEST_SEGMENT_BYTES = int(os.getenv("INGEST_SEGMENT_BYTES", str(16 * 1024 * 1024)))  # journal file size before rotating
+INGEST_JOURNAL_FSYNC = os.getenv("INGEST_JOURNAL_FSYNC", "True").lower() == "true"  # fsync every append
+
+# Weather-pollution analytics keep this many days of aligned history in memory
+ANALYTICS_WINDOW_DAYS = int(os.getenv("ANALYTICS_WINDOW_DAYS", "365"))
+
+# AQI forecasting: ridge penalty on standardized features, half-life of the
+# weight of past hours (0 weighs all history equally) and rows needed before
+# a city's model replaces the persistence forecast
+FORECAST_RIDGE_ALPHA = float(os.getenv("FORECAST_RIDGE_ALPHA", "0.01"))
+FORECAST_HALF_LIFE_DAYS = float(os.getenv("FORECAST_HALF_LIFE_DAYS", "30"))
+FORECAST_MIN_ROWS = int(os.getenv("FORECAST_MIN_ROWS", "168"))
+
+# Alert rules evaluated at ingest: a JSON list of rules replacing the defaults
+# in app/core/alert_rules.py
+ALERT_RULES_PATH = Path(os.environ["ALERT_RULES_PATH"]) if os.getenv("ALERT_RULES_PATH") else None
+
+# Server-sent events push of new readings: events buffered per client before
+# its backlog is replaced by a resync, keepalive interval, connection cap
+SSE_CLIENT_QUEUE_SIZE = int(os.getenv("SSE_CLIENT_QUEUE_SIZE", "16"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "10000"))
@@ -0,0 +1,179 @@
+import bisect
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Every metric registers itself here so /metrics can render all of them
+REGISTRY: List["Metric"] = []
+
+def escape_label_value(value: Any) -> str:
+    """Escape backslashes, quotes and newlines in a label value"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a Prometheus label set"""
+    pairs = [f'{name}="{escape_label_value(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    """Base class for metrics split by label values"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def render(self) -> List[str]:
+        """Prometheus text exposition lines for this metric"""
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = ()):
+        super().__init__(name, description, label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+    def drain(self) -> Dict[Tuple[str, ...], float]:
+        """Counts since the last drain, resetting them (for shipping out of a worker process)"""
+        with self._lock:
+            values, self._values = self._values, {}
+            return values
+
+    def merge(self, values: Dict[Tuple[str, ...], float]) -> None:
+        """Add counts drained from another process"""
+        with self._lock:
+            for labels, amount in values.items():
+                self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self.snapshot().items():
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+class Gauge(Metric):
+    """Value that can go up and down, optionally computed at scrape time"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (), function: Optional[Callable[[], float]] = None):
+        super().__init__(name, description, label_names)
+        self.function = function
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], float]:
+        if self.function is not None:
+            return {(): self.function()}
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for labels, value in self.snapshot().items():
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {format_value(value)}")
+        return lines
+
+class Histogram(Metric):
+    """Cumulative histogram of observed values, optionally split by label values"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record one observation for the given label values"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [per-bucket counts (+Inf last), sum, count]
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def drain(self) -> Dict[Tuple[str, ...], List]:
+        """Observations since the last drain, resetting them (for shipping out of a worker process)"""
+        with self._lock:
+            series, self._series = self._series, {}
+            return series
+
+    def merge(self, drained: Dict[Tuple[str, ...], List]) -> None:
+        """Add observations drained from another process with the same buckets"""
+        with self._lock:
+            for labels, (counts, total, count) in drained.items():
+                series = self._series.get(labels)
+                if series is None:
+                    series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                series[0] = [mine + theirs for mine, theirs in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Cumulative bucket counts, sum and count per label set"""
+        with self._lock:
+            items = [(labels, list(series[0]), series[1], series[2]) for labels, series in self._series.items()]
+
+        snapshot = []
+        for labels, counts, total, count in items:
+            cumulative = 0
+            buckets = {}
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            snapshot.append({
+                "labels": dict(zip(self.label_names, labels)),
+                "buckets": buckets,
+                "sum": round(total, 6),
+                "count": count,
+            })
+        return snapshot
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for series in self.snapshot():
+            values = list(series["labels"].values())
+            for bound, count in series["buckets"].items():
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{format_labels(self.label_names, values, le)} {count}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, values)} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, values)} {series['count']}")
+        return lines
+
+def render_prometheus() -> str:
+    """Render every registered metric in the Prometheus text exposition format"""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
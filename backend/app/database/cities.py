@@ -0,0 +1,137 @@
+"""
+Tracked locations and their collector shards.
+
+The cities table is the list the collector walks; app/core/cities.py only
+seeds an empty database. Every active city is pinned to a shard in the
+`shard` column, so assignments survive restarts and only move when cities
+are added or the number of shards changes. `collection_interval` (NULL for
+COLLECTION_INTERVAL) and `priority` shape the city's collection schedule.
+"""
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from app.database.database import get_db, get_write_db, timed_query
+
+# Columns added to cities databases created before they existed
+CITY_COLUMNS = {
+    "active": "INTEGER NOT NULL DEFAULT 1",
+    "shard": "INTEGER",
+    "collection_interval": "INTEGER",
+    "priority": "INTEGER NOT NULL DEFAULT 0",
+}
+
+UPSERT_CITY_SQL = '''
+    INSERT INTO cities (name, country, latitude, longitude, active, collection_interval, priority)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(name, country) DO UPDATE SET
+        latitude = excluded.latitude,
+        longitude = excluded.longitude,
+        active = excluded.active,
+        collection_interval = excluded.collection_interval,
+        priority = excluded.priority
+'''
+
+def city_filter_sql(
+    city: Union[None, str, Sequence[str]],
+    country: Optional[str],
+    params: list,
+    columns: str = "city_id"
+) -> str:
+    """SELECT of the cities matching a name (or any of several) and/or country, appending its parameters"""
+    names = [city] if isinstance(city, str) else list(city or [])
+    query = f"SELECT {columns} FROM cities WHERE 1=1"
+    if names:
+        query += f" AND name IN ({', '.join('?' * len(names))})"
+        params.extend(names)
+    if country:
+        query += " AND country = ?"
+        params.append(country)
+    return query
+
+def resolve_city_ids(city: Optional[str] = None, country: Optional[str] = None) -> List[int]:
+    """Look up the ids of cities matching a name and/or country filter"""
+    params: list = []
+    query = city_filter_sql(city, country, params)
+    with get_db() as conn, timed_query("resolve_city_ids"):
+        return [row[0] for row in conn.execute(query, params)]
+
+def add_city_columns(cursor: sqlite3.Cursor) -> None:
+    """Add the collector columns to an existing cities table"""
+    existing = {row[1] for row in cursor.execute("PRAGMA table_info(cities)")}
+    for column, definition in CITY_COLUMNS.items():
+        if column not in existing:
+            cursor.execute(f"ALTER TABLE cities ADD COLUMN {column} {definition}")
+
+def city_info(row: Sequence[Any]) -> Dict[str, Any]:
+    """(city_id, name, country, latitude, longitude, ...) in the collector's city format"""
+    return {"city_id": row[0], "name": row[1], "country": row[2], "lat": float(row[3]), "lon": float(row[4])}
+
+def load_cities(include_inactive: bool = False) -> List[Dict[str, Any]]:
+    """Cities to collect, in id order"""
+    query = "SELECT city_id, name, country, latitude, longitude, active, shard, collection_interval, priority FROM cities"
+    if not include_inactive:
+        query += " WHERE active = 1"
+    query += " ORDER BY city_id"
+    with get_db() as conn:
+        return [
+            {
+                **city_info(row), "active": bool(row[5]), "shard": row[6],
+                "collection_interval": row[7], "priority": row[8]
+            }
+            for row in conn.execute(query)
+        ]
+
+def upsert_cities(cities: Sequence[Dict[str, Any]]) -> int:
+    """Add cities or update their coordinates, active flag and schedule, keyed by (name, country)"""
+    with get_write_db() as conn:
+        try:
+            conn.executemany(UPSERT_CITY_SQL, [
+                (
+                    city["name"], city["country"], city["lat"], city["lon"], int(city.get("active", True)),
+                    city.get("collection_interval"), city.get("priority", 0)
+                )
+                for city in cities
+            ])
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return len(cities)
+
+def assign_shards(shards: int) -> List[List[Dict[str, Any]]]:
+    """
+    Pin every active city to one of `shards` shards and return each shard's cities
+
+    Cities keep their stored shard while it holds no more than its fair share
+    (ceil(cities / shards)). New cities, cities of shards that no longer
+    exist and the newest cities of overfull shards go to the least loaded
+    shards, so a resize moves as few cities as it can.
+    """
+    shards = max(shards, 1)
+    with get_write_db() as conn:
+        try:
+            rows = conn.execute(
+                "SELECT city_id, name, country, latitude, longitude, shard FROM cities WHERE active = 1 ORDER BY city_id"
+            ).fetchall()
+            capacity = -(-len(rows) // shards)
+            assigned: List[List[Dict[str, Any]]] = [[] for _ in range(shards)]
+            pending = []
+            for row in rows:
+                shard = row[5]
+                if shard is not None and 0 <= shard < shards and len(assigned[shard]) < capacity:
+                    assigned[shard].append(city_info(row))
+                else:
+                    pending.append(row)
+
+            moves = []
+            for row in pending:
+                shard = min(range(shards), key=lambda index: len(assigned[index]))
+                assigned[shard].append(city_info(row))
+                moves.append((shard, row[0]))
+            if moves:
+                conn.executemany("UPDATE cities SET shard = ? WHERE city_id = ?", moves)
+                conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+    return assigned
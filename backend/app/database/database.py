@@ -1,8 +1,21 @@
 import sqlite3
+import queue
+import threading
+import time
 from contextlib import contextmanager
 import logging
 from pathlib import Path
-from app.core.config import BASE_DIR, DATABASE_URL
+from typing import Any, Dict
+from app.core.metrics import Gauge, Histogram
+from app.core.config import (
+    BASE_DIR,
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_BUSY_TIMEOUT,
+    DB_CACHE_SIZE,
+    DB_MMAP_SIZE
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,17 +24,178 @@ DB_PATH = Path(DATABASE_URL.replace("sqlite:///", ""))
 if not DB_PATH.is_absolute():
     DB_PATH = BASE_DIR / DB_PATH.relative_to(".")
 
+# Time spent executing and fetching named queries
+query_duration = Histogram(
+    "sqlite_query_duration_seconds",
+    "Time spent executing and fetching SQLite queries",
+    ["query"]
+)
+
+def database_size() -> float:
+    """Size of the database file plus its write-ahead log, in bytes"""
+    size = 0
+    for path in (DB_PATH, DB_PATH.with_name(DB_PATH.name + "-wal")):
+        try:
+            size += path.stat().st_size
+        except OSError:
+            pass
+    return size
+
+Gauge("sqlite_database_size_bytes", "Size of the SQLite database file and WAL", function=database_size)
+
 @contextmanager
-def get_db():
-    """Context manager for database connections"""
-    conn = None
+def timed_query(name: str):
+    """Record the duration of the enclosed query under the given name"""
+    started_at = time.perf_counter()
     try:
-        conn = sqlite3.connect(str(DB_PATH))
+        yield
+    finally:
+        query_duration.observe(time.perf_counter() - started_at, name)
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections initialized with tuned pragmas"""
+
+    def __init__(self, name: str, size: int, read_only: bool = False, timeout: float = DB_POOL_TIMEOUT):
+        self.name = name
+        self.size = max(size, 1)
+        self.read_only = read_only
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply per-connection pragmas"""
+        conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
         conn.row_factory = sqlite3.Row
-        yield conn
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if self.read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _checkout(self) -> sqlite3.Connection:
+        """Take an idle connection, open a new one, or wait for one to be returned"""
+        started_at = time.perf_counter()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.size
+                if can_create:
+                    self._created += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self.timeouts += 1
+                    raise sqlite3.OperationalError(
+                        f"Timed out waiting for a connection from the {self.name} pool"
+                    )
+
+        waited = time.perf_counter() - started_at
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return conn
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, discarding it if it cannot be reset"""
+        with self._lock:
+            self.in_use -= 1
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding broken connection from the {self.name} pool: {e}")
+            conn.close()
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out of the pool"""
+        conn = self._checkout()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def stats(self) -> Dict[str, Any]:
+        """Checkout and wait metrics for this pool"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "open_connections": self._created,
+                "in_use": self.in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "total_wait_seconds": round(self.total_wait, 6),
+                "avg_wait_seconds": round(self.total_wait / self.checkouts, 6) if self.checkouts else 0.0,
+                "max_wait_seconds": round(self.max_wait, 6),
+            }
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+# Readers never write, so they can run alongside the single writer under WAL
+reader_pool = ConnectionPool("reader", DB_POOL_SIZE, read_only=True)
+writer_pool = ConnectionPool("writer", 1)
+
+@contextmanager
+def get_db():
+    """Context manager for read-only database connections"""
+    try:
+        with reader_pool.connection() as conn:
+            yield conn
     except sqlite3.Error as e:
         logger.error(f"Database error: {e}")
         raise
-    finally:
-        if conn:
-            conn.close()
\ No newline at end of file
+
+@contextmanager
+def get_write_db():
+    """Context manager for the single writer connection"""
+    try:
+        with writer_pool.connection() as conn:
+            yield conn
+    except sqlite3.Error as e:
+        logger.error(f"Database error: {e}")
+        raise
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Checkout and wait metrics for all connection pools"""
+    return {
+        "reader": reader_pool.stats(),
+        "writer": writer_pool.stats(),
+    }
@@ -3,6 +3,10 @@ import logging
 from pathlib import Path
 from app.core.config import BASE_DIR, DATABASE_URL
 from app.core.cities import CITIES
+from app.database.rollups import create_rollup_tables
+from app.database.latest import create_latest_table
+from app.database.cities import add_city_columns
+from app.database.migrate import SCHEMA_VERSION, migrate_schema
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +30,12 @@ def init_database():
         conn = sqlite3.connect(str(DB_PATH))
         cursor = conn.cursor()
 
+        # Let the retention job hand freed pages back to the filesystem (effective on a new database)
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+
+        # WAL lets API readers run while the collector writes
+        cursor.execute("PRAGMA journal_mode = WAL")
+
         # Create cities table
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS cities (
@@ -34,17 +44,35 @@ def init_database():
             country VARCHAR(100) NOT NULL,
             latitude DECIMAL(10,6) NOT NULL,
             longitude DECIMAL(10,6) NOT NULL,
+            active INTEGER NOT NULL DEFAULT 1,
+            shard INTEGER,
+            collection_interval INTEGER,
+            priority INTEGER NOT NULL DEFAULT 0,
             UNIQUE(name, country)
         )
         ''')
+        add_city_columns(cursor)
+
+        # Convert databases created with ISO text timestamps before touching the schema
+        migrated = migrate_schema(conn)
+
+        # Weather condition texts, stored once per OpenWeather condition id
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS weather_conditions (
+            weather_condition_id INTEGER PRIMARY KEY,
+            weather_main VARCHAR(50),
+            weather_description VARCHAR(100)
+        )
+        ''')
 
         # Create weather measurements table
+        # (timestamps are UTC epoch seconds, sunrise/sunset included)
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS weather_measurements (
             weather_id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_id INTEGER NOT NULL,
-            measurement_timestamp DATETIME NOT NULL,
-            collection_timestamp DATETIME NOT NULL,
+            measurement_timestamp INTEGER NOT NULL,
+            collection_timestamp INTEGER NOT NULL,
             temperature DECIMAL(5,2),
             feels_like DECIMAL(5,2),
             temp_min DECIMAL(5,2),
@@ -63,12 +91,11 @@ def init_database():
             snow_1h DECIMAL(5,2),
             snow_3h DECIMAL(5,2),
             weather_condition_id INTEGER,
-            weather_main VARCHAR(50),
-            weather_description VARCHAR(100),
             weather_icon VARCHAR(10),
-            sunrise TIME,
-            sunset TIME,
-            FOREIGN KEY (city_id) REFERENCES cities(city_id)
+            sunrise INTEGER,
+            sunset INTEGER,
+            FOREIGN KEY (city_id) REFERENCES cities(city_id),
+            FOREIGN KEY (weather_condition_id) REFERENCES weather_conditions(weather_condition_id)
         )
         ''')
 
@@ -77,8 +104,8 @@ def init_database():
         CREATE TABLE IF NOT EXISTS air_pollution_measurements (
             air_pollution_id INTEGER PRIMARY KEY AUTOINCREMENT,
             city_id INTEGER NOT NULL,
-            measurement_timestamp DATETIME NOT NULL,
-            collection_timestamp DATETIME NOT NULL,
+            measurement_timestamp INTEGER NOT NULL,
+            collection_timestamp INTEGER NOT NULL,
             aqi INTEGER,
             co DECIMAL(10,2),
             no DECIMAL(10,2),
@@ -103,15 +130,70 @@ def init_database():
         ON air_pollution_measurements(city_id, measurement_timestamp)
         ''')
 
-        # Insert initial cities data
-        for city in CITIES:
-            cursor.execute('''
-            INSERT OR IGNORE INTO cities (name, country, latitude, longitude)
+        # Serve unfiltered newest-first pagination without a sort
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_weather_date 
+        ON weather_measurements(measurement_timestamp)
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_pollution_date 
+        ON air_pollution_measurements(measurement_timestamp)
+        ''')
+
+        # Create alerts table, filled by the rule engine at ingest
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS alerts (
+            alert_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            city_id INTEGER NOT NULL,
+            rule_name TEXT NOT NULL,
+            severity TEXT NOT NULL,
+            message TEXT NOT NULL,
+            measurement_timestamp INTEGER,
+            fired_at INTEGER NOT NULL,
+            details TEXT,
+            FOREIGN KEY (city_id) REFERENCES cities(city_id)
+        )
+        ''')
+
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_alerts_city
+        ON alerts(city_id, alert_id)
+        ''')
+
+        # Last ingest journal record written, committed with its rows
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ingest_checkpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            persisted_seq INTEGER NOT NULL
+        )
+        ''')
+
+        # Create hourly rollup tables used by the statistics endpoint
+        create_rollup_tables(cursor)
+
+        # Create the per-city latest readings table used by /api/v1/latest
+        create_latest_table(cursor)
+
+        # Seed an empty cities table; afterwards the table is the list the collector walks
+        cursor.execute("SELECT 1 FROM cities LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.executemany('''
+            INSERT INTO cities (name, country, latitude, longitude)
             VALUES (?, ?, ?, ?)
-            ''', (city['name'], city['country'], city['lat'], city['lon']))
+            ''', [(city['name'], city['country'], city['lat'], city['lon']) for city in CITIES])
+
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
         # Commit the changes
         conn.commit()
+
+        # Existing databases only switch auto_vacuum mode after a full VACUUM,
+        # which also returns the space freed by a migration
+        cursor.execute("PRAGMA auto_vacuum")
+        if migrated or cursor.fetchone()[0] != 2:
+            logger.info("Compacting database file (VACUUM), this may take a while...")
+            cursor.execute("VACUUM")
         logger.info(f"Database initialized successfully at {DB_PATH}!")
         
         # Log the number of cities inserted
@@ -0,0 +1,158 @@
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.database.timestamps import from_epoch
+
+# Latest-reading columns fed by each source table, mapped to their source column.
+# Both datasets share one row per city, so their (epoch) timestamps are prefixed.
+LATEST_WEATHER_COLUMNS: Dict[str, str] = {
+    "weather_measurement_timestamp": "measurement_timestamp",
+    "temperature": "temperature",
+    "feels_like": "feels_like",
+    "humidity": "humidity",
+    "pressure": "pressure",
+    "wind_speed": "wind_speed",
+    "weather_condition_id": "weather_condition_id",
+    "weather_icon": "weather_icon",
+}
+
+LATEST_AIR_POLLUTION_COLUMNS: Dict[str, str] = {
+    "air_measurement_timestamp": "measurement_timestamp",
+    "aqi": "aqi",
+    "co": "co",
+    "no2": "no2",
+    "o3": "o3",
+    "pm2_5": "pm2_5",
+    "pm10": "pm10",
+}
+
+# Source table, its primary key and latest-reading columns for each dataset
+LATEST_SOURCES = {
+    "weather_measurements": ("weather_id", LATEST_WEATHER_COLUMNS),
+    "air_pollution_measurements": ("air_pollution_id", LATEST_AIR_POLLUTION_COLUMNS),
+}
+
+LATEST_COLUMNS = tuple(LATEST_WEATHER_COLUMNS) + tuple(LATEST_AIR_POLLUTION_COLUMNS)
+
+CREATE_LATEST_SQL = f"""
+    CREATE TABLE IF NOT EXISTS latest_measurements (
+        city_id INTEGER PRIMARY KEY,
+        {", ".join(LATEST_COLUMNS)},
+        FOREIGN KEY (city_id) REFERENCES cities(city_id)
+    )
+"""
+
+def upsert_latest_sql(columns: Dict[str, str]) -> str:
+    """
+    UPSERT one dataset's columns into a city's row
+
+    Rows only replace the stored reading when they are at least as new, so
+    batches with several (or out-of-order) readings per city converge on the newest.
+    """
+    timestamp_column = next(iter(columns))
+    names = ["city_id", *columns]
+    assignments = ", ".join(f"{column} = excluded.{column}" for column in columns)
+    return f"""
+        INSERT INTO latest_measurements ({", ".join(names)})
+        VALUES ({", ".join("?" * len(names))})
+        ON CONFLICT(city_id) DO UPDATE SET {assignments}
+        WHERE latest_measurements.{timestamp_column} IS NULL
+            OR excluded.{timestamp_column} >= latest_measurements.{timestamp_column}
+    """
+
+def rebuild_latest_sql(source_table: str) -> str:
+    """Fill one dataset's columns from the newest source row per city"""
+    primary_key, columns = LATEST_SOURCES[source_table]
+    names = ["city_id", *columns]
+    assignments = ", ".join(f"{column} = excluded.{column}" for column in columns)
+    # One indexed (city_id, measurement_timestamp) lookup per city instead of a full scan;
+    # `WHERE true` keeps SQLite from parsing ON CONFLICT as a join constraint
+    return f"""
+        INSERT INTO latest_measurements ({", ".join(names)})
+        SELECT m.city_id, {", ".join(f"m.{source}" for source in columns.values())}
+        FROM cities c
+        JOIN {source_table} m ON m.{primary_key} = (
+            SELECT {primary_key} FROM {source_table}
+            WHERE city_id = c.city_id
+            ORDER BY measurement_timestamp DESC, {primary_key} DESC
+            LIMIT 1
+        )
+        WHERE true
+        ON CONFLICT(city_id) DO UPDATE SET {assignments}
+    """
+
+def update_latest(
+    cursor: sqlite3.Cursor,
+    columns: Dict[str, str],
+    source_columns: Sequence[str],
+    rows: Sequence[tuple]
+) -> None:
+    """Apply a batch of freshly inserted source rows to the latest readings"""
+    if not rows:
+        return
+
+    indexes = [source_columns.index(source) for source in ("city_id", *columns.values())]
+    cursor.executemany(
+        upsert_latest_sql(columns),
+        [tuple(row[index] for index in indexes) for row in rows]
+    )
+
+def rebuild_latest(cursor: sqlite3.Cursor) -> None:
+    """Recompute every city's latest readings from the measurement tables"""
+    cursor.execute("DELETE FROM latest_measurements")
+    for source_table in LATEST_SOURCES:
+        cursor.execute(rebuild_latest_sql(source_table))
+
+# Fields of a latest reading as served by /api/v1/latest, in SELECT_LATEST_SQL order
+LATEST_FIELDS = (
+    "city", "country",
+    "weather_measurement_timestamp", "temperature", "feels_like", "humidity",
+    "pressure", "wind_speed", "weather_description", "weather_icon",
+    "air_measurement_timestamp", "aqi", "co", "no2", "o3", "pm2_5", "pm10"
+)
+
+SELECT_LATEST_SQL = """
+    SELECT
+        c.name, c.country,
+        l.weather_measurement_timestamp, l.temperature, l.feels_like, l.humidity,
+        l.pressure, l.wind_speed, wc.weather_description, l.weather_icon,
+        l.air_measurement_timestamp, l.aqi, l.co, l.no2, l.o3, l.pm2_5, l.pm10
+    FROM latest_measurements l
+    JOIN cities c ON l.city_id = c.city_id
+    LEFT JOIN weather_conditions wc ON l.weather_condition_id = wc.weather_condition_id
+    WHERE 1=1
+"""
+
+def read_latest(
+    cursor: sqlite3.Cursor,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    city_ids: Optional[Sequence[int]] = None
+) -> List[Dict[str, Any]]:
+    """Latest readings of the matching cities by name, with timestamps as datetimes"""
+    query = SELECT_LATEST_SQL
+    params: List[Any] = []
+    if city:
+        query += " AND c.name = ?"
+        params.append(city)
+    if country:
+        query += " AND c.country = ?"
+        params.append(country)
+    if city_ids is not None:
+        query += f" AND l.city_id IN ({', '.join('?' * len(city_ids))})"
+        params.extend(city_ids)
+    query += " ORDER BY c.name"
+
+    cursor.execute(query, params)
+    rows = [dict(zip(LATEST_FIELDS, row)) for row in cursor.fetchall()]
+    for row in rows:
+        row["weather_measurement_timestamp"] = from_epoch(row["weather_measurement_timestamp"])
+        row["air_measurement_timestamp"] = from_epoch(row["air_measurement_timestamp"])
+    return rows
+
+def create_latest_table(cursor: sqlite3.Cursor) -> None:
+    """Create the latest readings table, backfilling it from existing history"""
+    cursor.execute(CREATE_LATEST_SQL)
+    cursor.execute("SELECT 1 FROM latest_measurements LIMIT 1")
+    if cursor.fetchone() is None:
+        rebuild_latest(cursor)
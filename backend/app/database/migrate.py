@@ -0,0 +1,160 @@
+"""
+Convert a database created with ISO text timestamps to the compact schema.
+
+    python -m app.database.migrate
+
+Timestamps become UTC epoch seconds (the ISO text was naive local time),
+sunrise/sunset become epoch seconds on the measurement's date, and weather
+condition texts move into the weather_conditions lookup table. Row ids are
+kept, so rollups stay valid; latest_measurements is rebuilt by init_db.
+"""
+import sqlite3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Stored in PRAGMA user_version once the database uses the current schema
+SCHEMA_VERSION = 1
+
+def local_text_to_epoch_sql(expression: str) -> str:
+    """SQL converting naive local ISO text to epoch seconds"""
+    return f"CAST(strftime('%s', {expression}, 'utc') AS INTEGER)"
+
+def needs_migration(conn: sqlite3.Connection) -> bool:
+    """True for databases whose weather table still stores condition texts inline"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(weather_measurements)")}
+    return "weather_main" in columns
+
+def migrate_weather(cursor: sqlite3.Cursor) -> None:
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS weather_conditions (
+        weather_condition_id INTEGER PRIMARY KEY,
+        weather_main VARCHAR(50),
+        weather_description VARCHAR(100)
+    )
+    ''')
+    # Texts are a function of the condition id, so any row per id will do
+    cursor.execute('''
+    INSERT OR IGNORE INTO weather_conditions (weather_condition_id, weather_main, weather_description)
+    SELECT weather_condition_id, weather_main, weather_description
+    FROM weather_measurements
+    WHERE weather_condition_id IS NOT NULL
+    GROUP BY weather_condition_id
+    ''')
+
+    cursor.execute("ALTER TABLE weather_measurements RENAME TO weather_measurements_text")
+    cursor.execute('''
+    CREATE TABLE weather_measurements (
+        weather_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER NOT NULL,
+        measurement_timestamp INTEGER NOT NULL,
+        collection_timestamp INTEGER NOT NULL,
+        temperature DECIMAL(5,2),
+        feels_like DECIMAL(5,2),
+        temp_min DECIMAL(5,2),
+        temp_max DECIMAL(5,2),
+        pressure INTEGER,
+        humidity INTEGER,
+        sea_level INTEGER,
+        ground_level INTEGER,
+        visibility INTEGER,
+        wind_speed DECIMAL(5,2),
+        wind_degree INTEGER,
+        wind_gust DECIMAL(5,2),
+        clouds_all INTEGER,
+        rain_1h DECIMAL(5,2),
+        rain_3h DECIMAL(5,2),
+        snow_1h DECIMAL(5,2),
+        snow_3h DECIMAL(5,2),
+        weather_condition_id INTEGER,
+        weather_icon VARCHAR(10),
+        sunrise INTEGER,
+        sunset INTEGER,
+        FOREIGN KEY (city_id) REFERENCES cities(city_id),
+        FOREIGN KEY (weather_condition_id) REFERENCES weather_conditions(weather_condition_id)
+    )
+    ''')
+    cursor.execute(f'''
+    INSERT INTO weather_measurements
+    SELECT
+        weather_id, city_id,
+        {local_text_to_epoch_sql("measurement_timestamp")},
+        {local_text_to_epoch_sql("collection_timestamp")},
+        temperature, feels_like, temp_min, temp_max, pressure, humidity,
+        sea_level, ground_level, visibility, wind_speed, wind_degree, wind_gust,
+        clouds_all, rain_1h, rain_3h, snow_1h, snow_3h,
+        weather_condition_id, weather_icon,
+        {local_text_to_epoch_sql("date(measurement_timestamp) || ' ' || sunrise")},
+        {local_text_to_epoch_sql("date(measurement_timestamp) || ' ' || sunset")}
+    FROM weather_measurements_text
+    ORDER BY weather_id
+    ''')
+    cursor.execute("DROP TABLE weather_measurements_text")
+
+def migrate_air_pollution(cursor: sqlite3.Cursor) -> None:
+    cursor.execute("ALTER TABLE air_pollution_measurements RENAME TO air_pollution_measurements_text")
+    cursor.execute('''
+    CREATE TABLE air_pollution_measurements (
+        air_pollution_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER NOT NULL,
+        measurement_timestamp INTEGER NOT NULL,
+        collection_timestamp INTEGER NOT NULL,
+        aqi INTEGER,
+        co DECIMAL(10,2),
+        no DECIMAL(10,2),
+        no2 DECIMAL(10,2),
+        o3 DECIMAL(10,2),
+        so2 DECIMAL(10,2),
+        pm2_5 DECIMAL(10,2),
+        pm10 DECIMAL(10,2),
+        nh3 DECIMAL(10,2),
+        FOREIGN KEY (city_id) REFERENCES cities(city_id)
+    )
+    ''')
+    cursor.execute(f'''
+    INSERT INTO air_pollution_measurements
+    SELECT
+        air_pollution_id, city_id,
+        {local_text_to_epoch_sql("measurement_timestamp")},
+        {local_text_to_epoch_sql("collection_timestamp")},
+        aqi, co, no, no2, o3, so2, pm2_5, pm10, nh3
+    FROM air_pollution_measurements_text
+    ORDER BY air_pollution_id
+    ''')
+    cursor.execute("DROP TABLE air_pollution_measurements_text")
+
+def migrate_schema(conn: sqlite3.Connection) -> bool:
+    """
+    Rewrite the measurement tables in the current schema; returns False if there was nothing to do
+
+    Runs in one transaction. Indexes are dropped with the old tables and
+    recreated by init_db, which should be run right after (it calls this itself).
+    """
+    if not needs_migration(conn):
+        return False
+
+    logger.info("Migrating measurement tables to epoch timestamps, this may take a while...")
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        migrate_weather(cursor)
+        migrate_air_pollution(cursor)
+        # Rebuilt from the converted rows with epoch timestamps
+        cursor.execute("DROP TABLE IF EXISTS latest_measurements")
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    logger.info("Measurement tables migrated")
+    return True
+
+if __name__ == "__main__":
+    from app.database.init_db import DB_PATH, init_database
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    size_before = DB_PATH.stat().st_size if DB_PATH.exists() else 0
+    init_database()
+    logger.info(f"Database size: {size_before} -> {DB_PATH.stat().st_size} bytes")
@@ -0,0 +1,203 @@
+import sqlite3
+from datetime import datetime
+from typing import List, Sequence
+
+from app.database.timestamps import local_sql
+
+class RollupSpec:
+    """
+    Describes a rollup table of per-city time buckets over a measurement table
+
+    Bucket starts and last_measurement_timestamp are local ISO text, the
+    format the API returns; the source tables store epoch seconds.
+    """
+
+    def __init__(
+        self,
+        source_table: str,
+        rollup_table: str,
+        columns: List[str],
+        bucket_column: str = "hour_start",
+        bucket_format: str = "%Y-%m-%dT%H:00:00"
+    ):
+        self.source_table = source_table
+        self.rollup_table = rollup_table
+        self.columns = columns
+        # Bucket start column and the strftime format that truncates a timestamp to it
+        self.bucket_column = bucket_column
+        self.bucket_format = bucket_format
+
+    def column_definitions(self) -> List[str]:
+        """Column definitions of the rollup table, in insert order"""
+        definitions = ["city_id INTEGER NOT NULL", f"{self.bucket_column} DATETIME NOT NULL",
+                       "measurement_count INTEGER NOT NULL", "last_measurement_timestamp DATETIME"]
+        for column in self.columns:
+            definitions += [f"{column}_sum REAL", f"{column}_count INTEGER",
+                            f"{column}_min REAL", f"{column}_max REAL", f"{column}_last REAL"]
+        return definitions
+
+    def create_sql(self) -> str:
+        """CREATE TABLE statement for the rollup table"""
+        definitions = self.column_definitions() + [
+            f"PRIMARY KEY (city_id, {self.bucket_column})",
+            "FOREIGN KEY (city_id) REFERENCES cities(city_id)"
+        ]
+        return f"CREATE TABLE IF NOT EXISTS {self.rollup_table} (\n    " + ",\n    ".join(definitions) + "\n)"
+
+    def rollup_columns(self) -> List[str]:
+        """Rollup table columns in insert order"""
+        return [definition.split()[0] for definition in self.column_definitions()]
+
+    def merge_assignments(self) -> List[str]:
+        """ON CONFLICT assignments merging an incoming bucket into the stored one"""
+        assignments = [
+            "measurement_count = measurement_count + excluded.measurement_count",
+            "last_measurement_timestamp = MAX(last_measurement_timestamp, excluded.last_measurement_timestamp)",
+        ]
+        for column in self.columns:
+            assignments += [
+                f"{column}_sum = COALESCE({column}_sum, 0) + COALESCE(excluded.{column}_sum, 0)",
+                f"{column}_count = {column}_count + excluded.{column}_count",
+                # Scalar MIN/MAX return NULL if either side is NULL, so fall back to whichever is set
+                f"{column}_min = COALESCE(MIN({column}_min, excluded.{column}_min), {column}_min, excluded.{column}_min)",
+                f"{column}_max = COALESCE(MAX({column}_max, excluded.{column}_max), {column}_max, excluded.{column}_max)",
+            ]
+        # Values of the most recent measurement win; the right-hand sides see the old row
+        newer = "excluded.last_measurement_timestamp >= last_measurement_timestamp"
+        for column in self.last_columns():
+            assignments.append(f"{column} = CASE WHEN {newer} THEN excluded.{column} ELSE {column} END")
+        return assignments
+
+    def last_columns(self) -> List[str]:
+        """Columns holding the value of the most recent measurement in a bucket"""
+        return [f"{column}_last" for column in self.columns]
+
+    def upsert_sql(self) -> str:
+        """Upsert that merges a delta bucket into the existing rollup row"""
+        columns = self.rollup_columns()
+        return (
+            f"INSERT INTO {self.rollup_table} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT(city_id, {self.bucket_column}) DO UPDATE SET {', '.join(self.merge_assignments())}"
+        )
+
+    def rebuild_sql(self) -> str:
+        """Recompute every rollup bucket from the raw measurement table"""
+        bucket = local_sql("measurement_timestamp", self.bucket_format)
+        # Last values come from a window, since bare columns are ambiguous with several MIN/MAX aggregates
+        last_values = ", ".join(
+            f"FIRST_VALUE({column}) OVER recent AS {column}_last" for column in self.columns
+        )
+        selects = ["city_id", "bucket", "COUNT(*)", local_sql("MAX(measurement_timestamp)")]
+        for column in self.columns:
+            selects += [f"SUM({column})", f"COUNT({column})", f"MIN({column})", f"MAX({column})", f"MAX({column}_last)"]
+        return (
+            f"INSERT OR REPLACE INTO {self.rollup_table} ({', '.join(self.rollup_columns())}) "
+            f"SELECT {', '.join(selects)} FROM ("
+            f"SELECT *, {bucket} AS bucket, {last_values} FROM {self.source_table} "
+            f"WINDOW recent AS (PARTITION BY city_id, {bucket} ORDER BY measurement_timestamp DESC)"
+            f") GROUP BY city_id, bucket"
+        )
+
+    def compact_sql(self, target: "RollupSpec") -> str:
+        """Merge this table's buckets older than a cutoff into the coarser buckets of `target`"""
+        bucket = f"strftime('{target.bucket_format}', {self.bucket_column})"
+        last_values = ", ".join(f"FIRST_VALUE({column}) OVER recent AS recent_{column}" for column in self.last_columns())
+        selects = ["city_id", "bucket", "SUM(measurement_count)", "MAX(last_measurement_timestamp)"]
+        for column in self.columns:
+            selects += [f"SUM({column}_sum)", f"SUM({column}_count)", f"MIN({column}_min)",
+                        f"MAX({column}_max)", f"MAX(recent_{column}_last)"]
+        return (
+            f"INSERT INTO {target.rollup_table} ({', '.join(target.rollup_columns())}) "
+            f"SELECT {', '.join(selects)} FROM ("
+            f"SELECT *, {bucket} AS bucket, {last_values} FROM {self.rollup_table} "
+            f"WHERE {self.bucket_column} >= ? AND {self.bucket_column} < ? "
+            f"WINDOW recent AS (PARTITION BY city_id, {bucket} ORDER BY last_measurement_timestamp DESC)"
+            f") WHERE true GROUP BY city_id, bucket "
+            f"ON CONFLICT(city_id, {target.bucket_column}) DO UPDATE SET {', '.join(target.merge_assignments())}"
+        )
+
+WEATHER_ROLLUP = RollupSpec(
+    "weather_measurements",
+    "weather_hourly_rollup",
+    ["temperature", "feels_like", "humidity", "pressure", "wind_speed"]
+)
+
+AIR_POLLUTION_ROLLUP = RollupSpec(
+    "air_pollution_measurements",
+    "air_pollution_hourly_rollup",
+    ["aqi", "co", "no2", "o3", "pm2_5", "pm10"]
+)
+
+ROLLUPS = [WEATHER_ROLLUP, AIR_POLLUTION_ROLLUP]
+
+# Coarser tier that hourly buckets are compacted into once they age out
+WEATHER_DAILY_ROLLUP = RollupSpec(
+    "weather_measurements",
+    "weather_daily_rollup",
+    WEATHER_ROLLUP.columns,
+    bucket_column="day_start",
+    bucket_format="%Y-%m-%dT00:00:00"
+)
+
+AIR_POLLUTION_DAILY_ROLLUP = RollupSpec(
+    "air_pollution_measurements",
+    "air_pollution_daily_rollup",
+    AIR_POLLUTION_ROLLUP.columns,
+    bucket_column="day_start",
+    bucket_format="%Y-%m-%dT00:00:00"
+)
+
+# (hourly, daily) tiers per dataset
+ROLLUP_TIERS = [
+    (WEATHER_ROLLUP, WEATHER_DAILY_ROLLUP),
+    (AIR_POLLUTION_ROLLUP, AIR_POLLUTION_DAILY_ROLLUP),
+]
+
+def hour_start(measurement_timestamp: str) -> str:
+    """Truncate an ISO timestamp to the start of its hour"""
+    return measurement_timestamp[:13] + ":00:00"
+
+def build_deltas(spec: RollupSpec, source_columns: Sequence[str], rows: Sequence[tuple]) -> List[tuple]:
+    """Turn raw insert rows into single-measurement rollup deltas"""
+    timestamp_index = source_columns.index("measurement_timestamp")
+    value_indexes = [source_columns.index(column) for column in spec.columns]
+
+    deltas = []
+    for row in rows:
+        timestamp = datetime.fromtimestamp(row[timestamp_index]).isoformat()
+        delta = [row[0], hour_start(timestamp), 1, timestamp]
+        for index in value_indexes:
+            value = row[index]
+            delta += [value, 0 if value is None else 1, value, value, value]
+        deltas.append(tuple(delta))
+    return deltas
+
+def update_rollups(cursor: sqlite3.Cursor, spec: RollupSpec, source_columns: Sequence[str], rows: Sequence[tuple]) -> None:
+    """Fold newly inserted raw rows into the hourly rollup table"""
+    if rows:
+        cursor.executemany(spec.upsert_sql(), build_deltas(spec, source_columns, rows))
+
+def add_missing_columns(cursor: sqlite3.Cursor, spec: RollupSpec) -> bool:
+    """Add columns introduced after the rollup table was created; True if any were added"""
+    cursor.execute(f"PRAGMA table_info({spec.rollup_table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    missing = [definition for definition in spec.column_definitions() if definition.split()[0] not in existing]
+    for definition in missing:
+        cursor.execute(f"ALTER TABLE {spec.rollup_table} ADD COLUMN {definition}")
+    return bool(missing)
+
+def create_rollup_tables(cursor: sqlite3.Cursor) -> None:
+    """Create rollup tables and backfill hourly ones from existing raw data when empty"""
+    for spec in ROLLUPS:
+        cursor.execute(spec.create_sql())
+        # Rebuild when new columns could not be filled incrementally
+        if add_missing_columns(cursor, spec):
+            cursor.execute(f"DELETE FROM {spec.rollup_table}")
+        cursor.execute(f"SELECT 1 FROM {spec.rollup_table} LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute(spec.rebuild_sql())
+
+    # Daily tiers only ever receive compacted hourly buckets
+    for _, daily in ROLLUP_TIERS:
+        cursor.execute(daily.create_sql())
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Optional
+
+# Measurement tables store UTC epoch seconds. The API and exports render them
+# as naive local time, which is how the ISO text columns were written before.
+
+def to_epoch(value: datetime) -> int:
+    """Epoch seconds of a datetime; naive values are taken as local time"""
+    return int(value.timestamp())
+
+def to_local(value: datetime) -> datetime:
+    """Naive local time of a datetime, the form of the rollups' ISO bucket columns; naive values are kept"""
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def from_epoch(value: Optional[int]) -> Optional[datetime]:
+    """Naive local datetime of an epoch timestamp"""
+    return datetime.fromtimestamp(value) if value is not None else None
+
+def local_sql(column: str, fmt: str = "%Y-%m-%dT%H:%M:%S") -> str:
+    """SQL expression formatting an epoch column as local time"""
+    return f"strftime('{fmt}', {column}, 'unixepoch', 'localtime')"
+
+def local_epoch_sql(column: str) -> str:
+    """SQL expression shifting an epoch column to local wall-clock seconds, for bucketing"""
+    return f"CAST(strftime('%s', {column}, 'unixepoch', 'localtime') AS INTEGER)"
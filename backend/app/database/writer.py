@@ -0,0 +1,153 @@
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.core.cache import response_cache
+from app.core.metrics import Counter, Gauge
+from app.database.database import get_db, get_write_db
+from app.database.rollups import WEATHER_ROLLUP, AIR_POLLUTION_ROLLUP, update_rollups
+from app.database.latest import LATEST_WEATHER_COLUMNS, LATEST_AIR_POLLUTION_COLUMNS, update_latest
+
+logger = logging.getLogger(__name__)
+
+# Timestamps (including sunrise/sunset) are UTC epoch seconds
+WEATHER_COLUMNS = (
+    "city_id", "measurement_timestamp", "collection_timestamp",
+    "temperature", "feels_like", "temp_min", "temp_max", "pressure",
+    "humidity", "sea_level", "ground_level", "visibility", "wind_speed",
+    "wind_degree", "wind_gust", "clouds_all", "rain_1h", "rain_3h",
+    "snow_1h", "snow_3h", "weather_condition_id", "weather_icon",
+    "sunrise", "sunset"
+)
+
+AIR_POLLUTION_COLUMNS = (
+    "city_id", "measurement_timestamp", "collection_timestamp",
+    "aqi", "co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3"
+)
+
+WEATHER_INSERT_SQL = (
+    f"INSERT INTO weather_measurements ({', '.join(WEATHER_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(WEATHER_COLUMNS))})"
+)
+
+AIR_POLLUTION_INSERT_SQL = (
+    f"INSERT INTO air_pollution_measurements ({', '.join(AIR_POLLUTION_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(AIR_POLLUTION_COLUMNS))})"
+)
+
+ALERT_COLUMNS = (
+    "city_id", "rule_name", "severity", "message",
+    "measurement_timestamp", "fired_at", "details"
+)
+
+ALERT_INSERT_SQL = (
+    f"INSERT INTO alerts ({', '.join(ALERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(ALERT_COLUMNS))})"
+)
+
+# Keep the texts of a condition id current without rewriting unchanged rows
+WEATHER_CONDITION_UPSERT_SQL = '''
+    INSERT INTO weather_conditions (weather_condition_id, weather_main, weather_description)
+    VALUES (?, ?, ?)
+    ON CONFLICT(weather_condition_id) DO UPDATE SET
+        weather_main = excluded.weather_main,
+        weather_description = excluded.weather_description
+    WHERE weather_main IS NOT excluded.weather_main
+        OR weather_description IS NOT excluded.weather_description
+'''
+
+# Last ingest journal record written, committed in the same transaction as its rows
+INGEST_CHECKPOINT_SQL = '''
+    INSERT INTO ingest_checkpoint (id, persisted_seq) VALUES (1, ?)
+    ON CONFLICT(id) DO UPDATE SET persisted_seq = excluded.persisted_seq
+'''
+
+class CityIdCache:
+    """In-memory (name, country) -> city_id map, loaded from the cities table once"""
+
+    def __init__(self):
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, country: str) -> Optional[int]:
+        """Return the city_id, reloading the table only when a city is unknown"""
+        with self._lock:
+            city_id = self._ids.get((name, country))
+            if city_id is None:
+                with get_db() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT city_id, name, country FROM cities")
+                    self._ids = {(row[1], row[2]): row[0] for row in cursor.fetchall()}
+                city_id = self._ids.get((name, country))
+            return city_id
+
+    def clear(self) -> None:
+        """Forget all cached ids"""
+        with self._lock:
+            self._ids = {}
+
+city_id_cache = CityIdCache()
+
+rows_inserted = Counter(
+    "measurement_rows_inserted_total",
+    "Measurement rows written to the database",
+    ["table"]
+)
+last_sweep_rows = Gauge(
+    "measurement_rows_last_write",
+    "Measurement rows written by the most recent sweep",
+    ["table"]
+)
+
+def read_ingest_checkpoint() -> int:
+    """Sequence number of the last ingest journal record written to the database"""
+    with get_db() as conn:
+        row = conn.execute("SELECT persisted_seq FROM ingest_checkpoint WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+def write_measurements(
+    weather_rows: Sequence[tuple],
+    air_rows: Sequence[tuple],
+    conditions: Sequence[tuple] = (),
+    alerts: Sequence[tuple] = (),
+    journal_seq: Optional[int] = None
+) -> None:
+    """
+    Write all rows of a sweep, their hourly rollups and latest readings in a single transaction
+
+    `conditions` are (weather_condition_id, weather_main, weather_description)
+    rows for the condition ids referenced by `weather_rows`; `alerts` are
+    ALERT_COLUMNS rows fired by these readings. `journal_seq` is committed
+    as the ingest checkpoint along with the rows.
+    """
+    if not weather_rows and not air_rows and journal_seq is None:
+        return
+
+    with get_write_db() as conn:
+        try:
+            cursor = conn.cursor()
+            cursor.executemany(WEATHER_CONDITION_UPSERT_SQL, conditions)
+            cursor.executemany(WEATHER_INSERT_SQL, weather_rows)
+            cursor.executemany(AIR_POLLUTION_INSERT_SQL, air_rows)
+            cursor.executemany(ALERT_INSERT_SQL, alerts)
+            update_rollups(cursor, WEATHER_ROLLUP, WEATHER_COLUMNS, weather_rows)
+            update_rollups(cursor, AIR_POLLUTION_ROLLUP, AIR_POLLUTION_COLUMNS, air_rows)
+            update_latest(cursor, LATEST_WEATHER_COLUMNS, WEATHER_COLUMNS, weather_rows)
+            update_latest(cursor, LATEST_AIR_POLLUTION_COLUMNS, AIR_POLLUTION_COLUMNS, air_rows)
+            if journal_seq is not None:
+                cursor.execute(INGEST_CHECKPOINT_SQL, (journal_seq,))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    # Cached API responses were built from the previous data
+    response_cache.invalidate()
+
+    rows_inserted.inc("weather_measurements", amount=len(weather_rows))
+    rows_inserted.inc("air_pollution_measurements", amount=len(air_rows))
+    last_sweep_rows.set(len(weather_rows), "weather_measurements")
+    last_sweep_rows.set(len(air_rows), "air_pollution_measurements")
+
+    logger.info(f"Saved {len(weather_rows)} weather and {len(air_rows)} air pollution rows")
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
 
 # Request Models
@@ -12,33 +12,151 @@ class WeatherQueryParams(DateRangeParams):
     country: Optional[str] = None
     measurement_type: Optional[List[str]] = None
 
+class CityIn(BaseModel):
+    name: str = Field(min_length=1, max_length=100)
+    country: str = Field(min_length=1, max_length=100)
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+    active: bool = True
+    collection_interval: Optional[int] = Field(default=None, ge=60)  # seconds, None for the global interval
+    priority: int = 0  # collected first when the call budget cannot cover every due city
+
 # Response Models
+# Measurement fields are optional so list endpoints can return a field selection
 class WeatherData(BaseModel):
     city: str
     country: str
     measurement_timestamp: datetime
-    temperature: float
-    feels_like: float
-    humidity: int
-    pressure: int
-    wind_speed: float
-    weather_description: str
+    temperature: Optional[float] = None
+    feels_like: Optional[float] = None
+    humidity: Optional[int] = None
+    pressure: Optional[int] = None
+    wind_speed: Optional[float] = None
+    weather_description: Optional[str] = None
 
 class AirPollutionData(BaseModel):
     city: str
     country: str
     measurement_timestamp: datetime
-    aqi: int
-    co: float
-    no2: float
-    o3: float
-    pm2_5: float
-    pm10: float
+    aqi: Optional[int] = None
+    co: Optional[float] = None
+    no2: Optional[float] = None
+    o3: Optional[float] = None
+    pm2_5: Optional[float] = None
+    pm10: Optional[float] = None
+
+class LatestMeasurement(BaseModel):
+    city: str
+    country: str
+    weather_measurement_timestamp: Optional[datetime] = None
+    temperature: Optional[float] = None
+    feels_like: Optional[float] = None
+    humidity: Optional[int] = None
+    pressure: Optional[int] = None
+    wind_speed: Optional[float] = None
+    weather_description: Optional[str] = None
+    weather_icon: Optional[str] = None
+    air_measurement_timestamp: Optional[datetime] = None
+    aqi: Optional[int] = None
+    co: Optional[float] = None
+    no2: Optional[float] = None
+    o3: Optional[float] = None
+    pm2_5: Optional[float] = None
+    pm10: Optional[float] = None
 
 class CityStats(BaseModel):
     city: str
     avg_temperature: float
     max_temperature: float
     min_temperature: float
-    avg_aqi: float
-    measurements_count: int
\ No newline at end of file
+    avg_aqi: Optional[float] = None
+    measurements_count: int
+
+class SeriesPoint(BaseModel):
+    bucket_start: datetime
+    min: Optional[float] = None
+    max: Optional[float] = None
+    avg: Optional[float] = None
+    last: Optional[float] = None
+    count: int
+
+class CitySeries(BaseModel):
+    city: str
+    country: str
+    points: List[SeriesPoint]
+
+class CorrelationMatrix(BaseModel):
+    method: str
+    factors: List[str]
+    pollutants: List[str]
+    matrix: List[List[Optional[float]]]  # rows follow factors, columns follow pollutants
+    rows: int
+    cities: int
+
+class ConditionalBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+    mean: Optional[float] = None
+    median: Optional[float] = None
+    p90: Optional[float] = None
+    share_elevated: Optional[float] = None
+
+class ConditionalStats(BaseModel):
+    factor: str
+    pollutant: str
+    elevated_threshold: float
+    rows: int
+    bins: List[ConditionalBin]
+
+class AqiForecastPoint(BaseModel):
+    hours_ahead: int
+    timestamp: datetime
+    aqi: float
+
+class CityAqiForecast(BaseModel):
+    city: str
+    country: str
+    issued_for: datetime  # hour of the newest reading the forecast starts from
+    model: str  # "ridge", or "persistence" until a city has enough history
+    training_rows: int
+    points: List[AqiForecastPoint]
+
+class Alert(BaseModel):
+    alert_id: int
+    city: str
+    country: str
+    rule: str
+    severity: str
+    message: str
+    measurement_timestamp: Optional[datetime] = None
+    fired_at: datetime
+    values: Dict[str, Any]  # readings of the fields the rule tests
+
+class AlertRuleSpec(BaseModel):
+    name: str
+    severity: str
+    message: str
+    conditions: List[List[Any]]
+
+class City(BaseModel):
+    city_id: int
+    name: str
+    country: str
+    latitude: float
+    longitude: float
+    active: bool
+    shard: Optional[int] = None  # collector shard, assigned on the next sharded sweep
+    collection_interval: Optional[int] = None
+    priority: int = 0
+
+class CityMeasurementColumns(BaseModel):
+    city: str
+    country: str
+    timestamp: List[int]  # UTC epoch seconds
+    columns: Dict[str, List[Any]]  # one array per field, aligned with `timestamp`
+
+class MeasurementColumns(BaseModel):
+    fields: List[str]
+    truncated: bool  # more rows matched than `limit`
+    cities: List[CityMeasurementColumns]
\ No newline at end of file
@@ -0,0 +1,161 @@
+"""
+Pollution alert rules evaluated on every extracted reading at ingest.
+
+A rule fires when all of its conditions hold for a city:
+
+    ["pm2_5", ">=", 25]        the latest reading compared with a value
+    ["aqi", ">=", 4, 3]        ... and in each of the last 3 sweeps
+    ["pm2_5", "rising", 3]     increased in each of the last 3 sweeps
+    ["wind_speed", "falling", 2]
+
+Fields are the keys of extract_current_weather() and
+extract_air_pollution_data(). Rules are compiled once into closures.
+Evaluating a reading is one pass over the rules; windowed conditions read
+per-city deques sized for the longest window. An alert fires when a rule
+starts to hold for a city, not again on every sweep while it keeps holding.
+Windows live in memory and refill after a restart.
+"""
+import json
+import operator
+import threading
+import logging
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.core.alert_rules import DEFAULT_ALERT_RULES
+from app.core.config import ALERT_RULES_PATH
+from app.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+alerts_fired = Counter("alerts_fired_total", "Alerts fired at ingest", ["rule", "severity"])
+
+COMPARISONS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+TRENDS = {"rising": operator.gt, "falling": operator.lt}
+
+SEVERITIES = ("info", "warning", "critical")
+
+History = Dict[str, Deque[Any]]
+Check = Callable[[Dict[str, Any], History], bool]
+
+def recent(history: History, field: str, count: int) -> List[Any]:
+    """The last `count` values of a field, oldest first, or fewer if the window is not full yet"""
+    return list(islice(reversed(history[field]), count))[::-1]
+
+def compile_condition(condition: Sequence[Any]) -> Tuple[Check, str, int]:
+    """Compile one condition into (check, field, readings of history it needs)"""
+    field, op, *arguments = condition
+    if op in TRENDS:
+        if len(arguments) != 1 or int(arguments[0]) < 1:
+            raise ValueError(f"'{op}' takes a number of sweeps: {condition}")
+        steps = int(arguments[0])
+        compare = TRENDS[op]
+
+        def check_trend(record: Dict[str, Any], history: History) -> bool:
+            values = recent(history, field, steps + 1)
+            return len(values) == steps + 1 and None not in values and all(
+                compare(newer, older) for older, newer in zip(values, values[1:])
+            )
+        return check_trend, field, steps + 1
+
+    if op not in COMPARISONS or len(arguments) not in (1, 2):
+        raise ValueError(f"Unknown condition {condition}")
+    compare = COMPARISONS[op]
+    threshold = arguments[0]
+    if len(arguments) == 1:
+        def check_latest(record: Dict[str, Any], history: History) -> bool:
+            value = record.get(field)
+            return value is not None and compare(value, threshold)
+        return check_latest, field, 0
+
+    sweeps = int(arguments[1])
+
+    def check_sustained(record: Dict[str, Any], history: History) -> bool:
+        values = recent(history, field, sweeps)
+        return len(values) == sweeps and all(value is not None and compare(value, threshold) for value in values)
+    return check_sustained, field, sweeps
+
+class AlertRule:
+    """A named conjunction of compiled conditions"""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        self.name = spec["name"]
+        self.severity = spec.get("severity", "warning")
+        self.message = spec.get("message", self.name)
+        if self.severity not in SEVERITIES:
+            raise ValueError(f"Rule {self.name}: severity must be one of {', '.join(SEVERITIES)}")
+        compiled = [compile_condition(condition) for condition in spec["conditions"]]
+        if not compiled:
+            raise ValueError(f"Rule {self.name} has no conditions")
+        self.checks = [check for check, _, _ in compiled]
+        self.fields = list(dict.fromkeys(field for _, field, _ in compiled))
+        self.windows = {field: window for _, field, window in compiled if window}
+
+    def matches(self, record: Dict[str, Any], history: History) -> bool:
+        return all(check(record, history) for check in self.checks)
+
+class AlertEngine:
+    """Evaluates rules per reading, keeping per-city windows and which rules currently hold"""
+
+    def __init__(self, specs: Sequence[Dict[str, Any]]):
+        self.rules = [AlertRule(spec) for spec in specs]
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError("Alert rule names must be unique")
+        # Longest window per field over all rules; only these fields are tracked
+        self.windows: Dict[str, int] = {}
+        for rule in self.rules:
+            for field, window in rule.windows.items():
+                self.windows[field] = max(self.windows.get(field, 0), window)
+        self.history: Dict[int, History] = {}
+        self.last_timestamp: Dict[int, Any] = {}
+        self.active: Set[Tuple[int, str]] = set()
+        self._lock = threading.Lock()
+
+    def evaluate(self, city_id: int, record: Dict[str, Any], fired_at: int) -> List[tuple]:
+        """Alert rows (see ALERT_COLUMNS in app.database.writer) for rules that start to hold"""
+        with self._lock:
+            history = self.history.get(city_id)
+            if history is None:
+                history = self.history[city_id] = {
+                    field: deque(maxlen=window) for field, window in self.windows.items()
+                }
+            # OpenWeather repeats a reading until it has a new one; count each reading once
+            timestamp = record.get("measurement_timestamp")
+            if timestamp is None or timestamp != self.last_timestamp.get(city_id):
+                self.last_timestamp[city_id] = timestamp
+                for field, values in history.items():
+                    values.append(record.get(field))
+
+            alerts = []
+            for rule in self.rules:
+                key = (city_id, rule.name)
+                if not rule.matches(record, history):
+                    self.active.discard(key)
+                elif key not in self.active:
+                    self.active.add(key)
+                    alerts.append((
+                        city_id, rule.name, rule.severity, rule.message, timestamp, fired_at,
+                        json.dumps({field: record.get(field) for field in rule.fields})
+                    ))
+                    alerts_fired.inc(rule.name, rule.severity)
+            return alerts
+
+def load_rules(path: Optional[Path] = ALERT_RULES_PATH) -> List[Dict[str, Any]]:
+    """Rule specs from the JSON file at ALERT_RULES_PATH, or the defaults"""
+    if path is None:
+        return DEFAULT_ALERT_RULES
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+alert_engine = AlertEngine(load_rules())
@@ -0,0 +1,223 @@
+"""
+Weather-pollution analytics over an in-memory history aligned per city.
+
+Weather and air pollution readings of a sweep share their measurement
+timestamp, so both tables are joined on (city_id, measurement_timestamp)
+into one frame of weather factors and pollutants. The frame covers the last
+ANALYTICS_WINDOW_DAYS. It is loaded once, from the Parquet archive for
+months SQLite no longer holds, and then only extended with rows newer than
+the last weather_id it has seen. All statistics are vectorized
+pandas/NumPy operations over that frame.
+"""
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import ANALYTICS_WINDOW_DAYS, ARCHIVE_ENABLED
+from app.database.database import get_db, timed_query
+from app.database.timestamps import from_epoch, to_epoch
+
+logger = logging.getLogger(__name__)
+
+# Weather conditions tested against each pollutant
+WEATHER_FACTORS = ["temperature", "humidity", "wind_speed", "pressure", "clouds_all"]
+POLLUTANTS = ["aqi", "pm2_5", "pm10", "no2", "o3", "so2", "co"]
+
+# Lower bounds of OpenWeather's "Moderate" band (μg/m³; AQI index 3), used as "elevated"
+ELEVATED_THRESHOLDS = {
+    "aqi": 3,
+    "pm2_5": 25,
+    "pm10": 50,
+    "no2": 70,
+    "o3": 100,
+    "so2": 80,
+    "co": 9400,
+}
+
+KEY_COLUMNS = ["weather_id", "city_id", "measurement_timestamp"]
+FRAME_COLUMNS = KEY_COLUMNS + WEATHER_FACTORS + POLLUTANTS
+
+ALIGNED_SQL = f"""
+    SELECT
+        {", ".join(f"w.{column}" for column in KEY_COLUMNS + WEATHER_FACTORS)},
+        {", ".join(f"a.{column}" for column in POLLUTANTS)}
+    FROM weather_measurements w
+    JOIN air_pollution_measurements a
+        ON a.city_id = w.city_id AND a.measurement_timestamp = w.measurement_timestamp
+    WHERE w.weather_id > ? AND w.measurement_timestamp >= ?
+"""
+
+def to_frame(values: np.ndarray) -> pd.DataFrame:
+    """Aligned frame from a float matrix in FRAME_COLUMNS order"""
+    frame = pd.DataFrame(values, columns=FRAME_COLUMNS)
+    return frame.astype({column: "int64" for column in KEY_COLUMNS})
+
+def fetch_aligned(after_weather_id: int, start: int) -> pd.DataFrame:
+    """Join weather and air pollution rows still in SQLite, newer than a weather_id"""
+    with get_db() as conn, timed_query("analytics_aligned"):
+        rows = conn.execute(ALIGNED_SQL, (after_weather_id, start)).fetchall()
+    # One float conversion for the whole result; NULL readings become NaN
+    return to_frame(np.array(rows, dtype=np.float64).reshape(len(rows), len(FRAME_COLUMNS)))
+
+def fetch_archived(start: int, end: int) -> pd.DataFrame:
+    """Aligned rows of [start, end] from the Parquet archive"""
+    from app.services.archive import read_history
+
+    filters = {"start_date": from_epoch(start), "end_date": from_epoch(end)}
+    weather = read_history("weather", ["weather_id", *WEATHER_FACTORS], **filters).to_pandas()
+    air = read_history("air-pollution", POLLUTANTS, **filters).to_pandas()
+    frame = weather.merge(air, on=["city_id", "measurement_timestamp"])
+    frame["measurement_timestamp"] = frame["measurement_timestamp"].values.astype("datetime64[s]").astype("int64")
+    return to_frame(frame[FRAME_COLUMNS].to_numpy(dtype=np.float64))
+
+class AlignedHistory:
+    """Per-city aligned weather/pollution frame, refreshed incrementally"""
+
+    def __init__(self, window_days: int = ANALYTICS_WINDOW_DAYS):
+        self.window_days = window_days
+        self.frame: Optional[pd.DataFrame] = None
+        self.last_weather_id = 0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> pd.DataFrame:
+        """
+        Return the frame, first appending rows committed since the last call
+
+        Frames are replaced rather than modified, so callers can keep using
+        the returned frame while another thread refreshes.
+        """
+        with self._lock:
+            start = to_epoch(datetime.now() - timedelta(days=self.window_days))
+            if self.frame is None:
+                self.frame = self._load(start)
+            else:
+                new_rows = fetch_aligned(self.last_weather_id, start)
+                if len(new_rows):
+                    self.frame = pd.concat([self.frame, new_rows], ignore_index=True)
+
+            timestamps = self.frame["measurement_timestamp"]
+            if len(timestamps) and timestamps.min() < start:
+                self.frame = self.frame[timestamps >= start].reset_index(drop=True)
+            if len(self.frame):
+                self.last_weather_id = max(self.last_weather_id, int(self.frame["weather_id"].max()))
+            return self.frame
+
+    def _load(self, start: int) -> pd.DataFrame:
+        frame = fetch_aligned(0, start)
+        with get_db() as conn:
+            oldest = conn.execute("SELECT MIN(measurement_timestamp) FROM weather_measurements").fetchone()[0]
+        # Months already deleted from SQLite by the retention job
+        if ARCHIVE_ENABLED and (oldest is None or oldest > start):
+            archived = fetch_archived(start, (oldest or to_epoch(datetime.now())) - 1)
+            frame = pd.concat([archived, frame], ignore_index=True)
+        logger.info(f"Loaded {len(frame)} aligned weather/pollution rows for analytics")
+        return frame
+
+aligned_history = AlignedHistory()
+
+def select_rows(frame: pd.DataFrame, city_ids: Optional[Sequence[int]], days: int) -> pd.DataFrame:
+    """Rows of the selected cities within the last `days`"""
+    mask = frame["measurement_timestamp"].to_numpy() >= to_epoch(datetime.now() - timedelta(days=days))
+    if city_ids is not None:
+        mask &= np.isin(frame["city_id"].to_numpy(), list(city_ids))
+    return frame[mask]
+
+def finite_or_none(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
+
+def correlation_matrix(
+    method: str = "pearson",
+    city_ids: Optional[Sequence[int]] = None,
+    days: int = ANALYTICS_WINDOW_DAYS
+) -> Dict[str, Any]:
+    """
+    Correlation of each weather factor with each pollutant
+
+    Values are centered per city first, so the matrix reflects how readings
+    move together within a city rather than differences between climates.
+    Spearman correlates per-city ranks.
+    """
+    if method not in ("pearson", "spearman"):
+        raise ValueError("Unknown method. Available: pearson, spearman")
+    rows = select_rows(aligned_history.refresh(), city_ids, days)
+    values = rows[WEATHER_FACTORS + POLLUTANTS]
+    groups = values.groupby(rows["city_id"])
+    if method == "spearman":
+        values = groups.rank()
+        groups = values.groupby(rows["city_id"])
+    centered = values - groups.transform("mean")
+
+    matrix = centered.corr().loc[WEATHER_FACTORS, POLLUTANTS].to_numpy()
+    return {
+        "method": method,
+        "factors": WEATHER_FACTORS,
+        "pollutants": POLLUTANTS,
+        "matrix": [[finite_or_none(value) for value in row] for row in matrix],
+        "rows": len(rows),
+        "cities": int(rows["city_id"].nunique()),
+    }
+
+def conditional_statistics(
+    factor: str,
+    pollutant: str,
+    bins: int = 10,
+    city_ids: Optional[Sequence[int]] = None,
+    days: int = ANALYTICS_WINDOW_DAYS
+) -> Dict[str, Any]:
+    """
+    Distribution of a pollutant within quantile bins of a weather factor
+
+    Quantile edges give every bin a similar number of readings, even for
+    skewed factors like wind speed; duplicate edges are merged.
+    """
+    if factor not in WEATHER_FACTORS:
+        raise ValueError(f"Unknown factor '{factor}'. Available: {', '.join(WEATHER_FACTORS)}")
+    if pollutant not in POLLUTANTS:
+        raise ValueError(f"Unknown pollutant '{pollutant}'. Available: {', '.join(POLLUTANTS)}")
+
+    rows = select_rows(aligned_history.refresh(), city_ids, days)
+    x = rows[factor].to_numpy()
+    y = rows[pollutant].to_numpy()
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    threshold = ELEVATED_THRESHOLDS[pollutant]
+    result: Dict[str, Any] = {
+        "factor": factor,
+        "pollutant": pollutant,
+        "elevated_threshold": threshold,
+        "rows": int(len(x)),
+        "bins": [],
+    }
+    if not len(x):
+        return result
+
+    edges = np.unique(np.quantile(x, np.linspace(0, 1, bins + 1)))
+    # Bin i holds edges[i] <= x < edges[i + 1]; the maximum joins the last bin
+    index = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, max(len(edges) - 2, 0))
+    grouped = pd.Series(y).groupby(index)
+    stats = pd.DataFrame({
+        "count": grouped.size(),
+        "mean": grouped.mean(),
+        "median": grouped.median(),
+        "p90": grouped.quantile(0.9),
+        "share_elevated": pd.Series(y >= threshold).groupby(index).mean(),
+    })
+
+    upper_edges = edges[1:] if len(edges) > 1 else edges
+    result["bins"] = [
+        {
+            "lower": float(edges[bin_index]),
+            "upper": float(upper_edges[bin_index]),
+            "count": int(row["count"]),
+            "mean": finite_or_none(row["mean"]),
+            "median": finite_or_none(row["median"]),
+            "p90": finite_or_none(row["p90"]),
+            "share_elevated": finite_or_none(row["share_elevated"]),
+        }
+        for bin_index, row in stats.iterrows()
+    ]
+    return result
@@ -0,0 +1,405 @@
+"""
+Columnar Parquet archive of the measurement tables, for full-history analytics.
+
+Closed months are written as Hive-style partitions, one file per city:
+
+    data/archive/weather/month=2025-01/city_id=3/part-0.parquet
+
+Readers go through pyarrow.dataset, so only the requested columns are
+decoded, partitions outside the month/city filters are never opened and
+row groups are skipped using their min/max statistics. The retention job
+archives every closed month before deleting raw rows, so the archive keeps
+the raw history the database drops. Rows that reach a month after it was
+archived (journal replays, an ingest backlog crossing a month boundary) are
+added as further part files on the next run; retention deletes only rows up
+to the primary key the last export covered.
+
+    python -m app.services.archive export
+    python -m app.services.archive query air-pollution --columns measurement_timestamp pm2_5 --city Warsaw
+"""
+import shutil
+import logging
+import argparse
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from app.core.config import ARCHIVE_PATH, ARCHIVE_COMPRESSION, EXPORT_CHUNK_SIZE
+from app.database.cities import resolve_city_ids
+from app.database.database import get_db, timed_query
+from app.database.timestamps import to_epoch
+
+logger = logging.getLogger(__name__)
+
+# Archived tables and their primary key, per dataset
+ARCHIVE_DATASETS = {
+    "weather": ("weather_measurements", "weather_id"),
+    "air-pollution": ("air_pollution_measurements", "air_pollution_id"),
+}
+
+# Epoch columns stored as timestamps, so pandas gets datetime64 columns
+TIMESTAMP_COLUMNS = ("measurement_timestamp", "collection_timestamp", "sunrise", "sunset")
+TIMESTAMP_TYPE = pa.timestamp("s", tz="UTC")
+
+# Hive partition keys; city_id lives in the path, not in the files
+PARTITIONING = ds.partitioning(pa.schema([("month", pa.string()), ("city_id", pa.int64())]), flavor="hive")
+
+def column_type(name: str, declared_type: str) -> pa.DataType:
+    """Arrow type of a measurement column, from its SQLite declaration"""
+    declared_type = declared_type.upper()
+    if name in TIMESTAMP_COLUMNS:
+        return TIMESTAMP_TYPE
+    if declared_type.startswith("INT"):
+        return pa.int64()
+    if declared_type.startswith(("DECIMAL", "REAL", "FLOAT", "DOUBLE")):
+        return pa.float64()
+    return pa.string()
+
+def table_schema(conn: sqlite3.Connection, table: str) -> pa.Schema:
+    """Arrow schema of the archived columns of a measurement table"""
+    return pa.schema([
+        (row[1], column_type(row[1], row[2]))
+        for row in conn.execute(f"PRAGMA table_info({table})")
+        if row[1] != "city_id"
+    ])
+
+def rows_to_batch(rows: Sequence[tuple], schema: pa.Schema) -> pa.RecordBatch:
+    """Build an Arrow record batch from SQLite rows in schema column order"""
+    arrays = []
+    for index, field in enumerate(schema):
+        values = [row[index] for row in rows]
+        if field.type == TIMESTAMP_TYPE:
+            arrays.append(pa.array(values, type=pa.int64()).cast(TIMESTAMP_TYPE))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def month_start(value: datetime) -> datetime:
+    """First instant (UTC) of the month containing an aware datetime"""
+    return value.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+def next_month(value: datetime) -> datetime:
+    return value.replace(year=value.year + 1, month=1) if value.month == 12 else value.replace(month=value.month + 1)
+
+def dataset_path(dataset: str) -> Path:
+    return Path(ARCHIVE_PATH) / dataset
+
+def archived_months(dataset: str) -> List[str]:
+    """Months (YYYY-MM, UTC) with a complete partition, oldest first"""
+    path = dataset_path(dataset)
+    if not path.exists():
+        return []
+    return sorted(
+        entry.name[len("month="):] for entry in path.iterdir()
+        if entry.is_dir() and entry.name.startswith("month=") and not entry.name.endswith(".tmp")
+    )
+
+def archived_until(dataset: str) -> Optional[datetime]:
+    """End (UTC) of the newest archived month, or None when nothing is archived"""
+    months = archived_months(dataset)
+    if not months:
+        return None
+    return next_month(datetime.strptime(months[-1], "%Y-%m").replace(tzinfo=timezone.utc))
+
+def exported_through(dataset: str) -> int:
+    """Highest primary key whose row was archived if its month was closed (0 before the first export)"""
+    path = dataset_path(dataset) / "_exported_through"
+    return int(path.read_text()) if path.exists() else 0
+
+def month_rows(conn: sqlite3.Connection, dataset: str, columns: str, city_id: int, month: datetime, after: int, through: int) -> List[tuple]:
+    """A city's rows of one month with a primary key in (after, through]"""
+    table, primary_key = ARCHIVE_DATASETS[dataset]
+    # One (city_id, measurement_timestamp) index range per file
+    with timed_query(f"archive_{table}"):
+        return conn.execute(
+            f"""
+            SELECT {columns} FROM {table}
+            WHERE city_id = ? AND measurement_timestamp >= ? AND measurement_timestamp < ?
+                AND {primary_key} > ? AND {primary_key} <= ?
+            ORDER BY measurement_timestamp, {primary_key}
+            """,
+            (city_id, to_epoch(month), to_epoch(next_month(month)), after, through)
+        ).fetchall()
+
+def write_part(rows: Sequence[tuple], schema: pa.Schema, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(
+        pa.Table.from_batches([rows_to_batch(rows, schema)]),
+        path,
+        compression=ARCHIVE_COMPRESSION,
+        row_group_size=EXPORT_CHUNK_SIZE
+    )
+
+def write_month(dataset: str, month: datetime, schema: pa.Schema, through: int) -> int:
+    """
+    Write one month of a dataset as per-city Parquet files; returns the rows written
+
+    Files are written to a temporary directory that is renamed into place, so
+    readers never see a partially written month.
+    """
+    month_dir = dataset_path(dataset) / f"month={month:%Y-%m}"
+    staging_dir = month_dir.with_name(month_dir.name + ".tmp")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+    columns = ", ".join(schema.names)
+    written = 0
+    with get_db() as conn:
+        city_ids = [row[0] for row in conn.execute("SELECT city_id FROM cities ORDER BY city_id")]
+        for city_id in city_ids:
+            rows = month_rows(conn, dataset, columns, city_id, month, 0, through)
+            if not rows:
+                continue
+            write_part(rows, schema, staging_dir / f"city_id={city_id}" / "part-0.parquet")
+            written += len(rows)
+
+    if written:
+        staging_dir.rename(month_dir)
+    else:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+    return written
+
+def city_archived_through(city_dir: Path, primary_key: str) -> int:
+    """Highest primary key in a city's files of one archived month (0 when it has none)"""
+    files = [str(path) for path in sorted(city_dir.glob("*.parquet"))]
+    if not files:
+        return 0
+    keys = ds.dataset(files, format="parquet").to_table(columns=[primary_key]).column(primary_key)
+    return pc.max(keys).as_py() or 0
+
+def append_late_rows(dataset: str, month: datetime, schema: pa.Schema, city_ids: Sequence[int], through: int) -> int:
+    """
+    Add the rows written to an archived month since it was archived; returns the rows added
+
+    Primary keys are AUTOINCREMENT, so a city's missing rows are exactly those
+    above the highest key it has in the month. Each city gets one more file,
+    named after that key and renamed into place, so a run interrupted by a
+    crash is redone without duplicating rows.
+    """
+    _, primary_key = ARCHIVE_DATASETS[dataset]
+    month_dir = dataset_path(dataset) / f"month={month:%Y-%m}"
+    columns = ", ".join(schema.names)
+    written = 0
+    with get_db() as conn:
+        for city_id in city_ids:
+            city_dir = month_dir / f"city_id={city_id}"
+            after = city_archived_through(city_dir, primary_key)
+            rows = month_rows(conn, dataset, columns, city_id, month, after, through)
+            if not rows:
+                continue
+            part = city_dir / f"part-{after}.parquet"
+            staged = part.with_name(part.name + ".tmp")
+            write_part(rows, schema, staged)
+            staged.replace(part)
+            written += len(rows)
+    return written
+
+def export_archive(dataset: str, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Archive every closed month of a dataset, and rows added to archived ones since; returns rows per month"""
+    table, primary_key = ARCHIVE_DATASETS[dataset]
+    after = exported_through(dataset)
+    archived_end = archived_until(dataset)
+    with get_db() as conn:
+        schema = table_schema(conn, table)
+        oldest, through = conn.execute(f"SELECT MIN(measurement_timestamp), MAX({primary_key}) FROM {table}").fetchone()
+        late = []
+        if archived_end is not None:
+            # Rows inserted since the last export that belong to already archived months
+            with timed_query(f"archive_{table}"):
+                late = conn.execute(
+                    f"""
+                    SELECT DISTINCT strftime('%Y-%m', measurement_timestamp, 'unixepoch'), city_id FROM {table}
+                    WHERE {primary_key} > ? AND {primary_key} <= ? AND measurement_timestamp < ?
+                    """,
+                    (after, through or 0, to_epoch(archived_end))
+                ).fetchall()
+    if oldest is None:
+        return {}
+
+    current_month = month_start((now or datetime.now()).astimezone())
+    done = set(archived_months(dataset))
+    late_cities: Dict[str, List[int]] = {}
+    for key, city_id in late:
+        late_cities.setdefault(key, []).append(city_id)
+
+    month = month_start(datetime.fromtimestamp(oldest, timezone.utc))
+    exported = {}
+    while month < current_month:
+        key = f"{month:%Y-%m}"
+        if key not in done:
+            exported[key] = write_month(dataset, month, schema, through)
+            logger.info(f"Archived {exported[key]} {dataset} rows for {key}")
+        elif key in late_cities:
+            added = append_late_rows(dataset, month, schema, late_cities[key], through)
+            if added:
+                exported[key] = added
+                logger.info(f"Archived {added} late {dataset} rows for {key}")
+        month = next_month(month)
+
+    # Written last: retention never deletes rows past it
+    path = dataset_path(dataset) / "_exported_through"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staged = path.with_name(path.name + ".tmp")
+    staged.write_text(str(through))
+    staged.replace(path)
+    return exported
+
+def archive_filter(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    city_ids: Optional[Sequence[int]]
+) -> Optional[ds.Expression]:
+    """Dataset filter; month bounds prune partitions, timestamp bounds prune row groups"""
+    conditions = []
+    if start_date:
+        start = start_date.astimezone(timezone.utc)
+        conditions.append(ds.field("month") >= f"{start:%Y-%m}")
+        conditions.append(ds.field("measurement_timestamp") >= pa.scalar(start, type=TIMESTAMP_TYPE))
+    if end_date:
+        end = end_date.astimezone(timezone.utc)
+        conditions.append(ds.field("month") <= f"{end:%Y-%m}")
+        conditions.append(ds.field("measurement_timestamp") <= pa.scalar(end, type=TIMESTAMP_TYPE))
+    if city_ids is not None:
+        conditions.append(ds.field("city_id").isin(list(city_ids)))
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+def open_archive(dataset: str) -> Optional[ds.Dataset]:
+    """The archived months of a dataset as one Arrow dataset, or None if nothing is archived"""
+    months = archived_months(dataset)
+    if not months:
+        return None
+    table, _ = ARCHIVE_DATASETS[dataset]
+    with get_db() as conn:
+        schema = table_schema(conn, table)
+    base = dataset_path(dataset)
+    files = [str(path) for month in months for path in sorted((base / f"month={month}").glob("city_id=*/*.parquet"))]
+    # The current table schema casts Parquet's millisecond timestamps back to seconds
+    # and reads columns added after a month was archived as nulls
+    return ds.dataset(
+        files,
+        schema=pa.unify_schemas([schema, PARTITIONING.schema]),
+        format="parquet",
+        partitioning=PARTITIONING,
+        partition_base_dir=str(base)
+    )
+
+def history_schema(dataset: str, columns: Optional[Sequence[str]]) -> pa.Schema:
+    """Schema of history batches: city_id, measurement_timestamp, then the requested columns"""
+    table, _ = ARCHIVE_DATASETS[dataset]
+    with get_db() as conn:
+        schema = table_schema(conn, table)
+    requested = list(columns or schema.names)
+    unknown = [column for column in requested if column not in schema.names and column != "city_id"]
+    if unknown:
+        raise ValueError(f"Unknown column(s) {', '.join(unknown)}. Available: {', '.join(schema.names)}")
+    return pa.schema([
+        ("city_id", pa.int64()),
+        schema.field("measurement_timestamp"),
+        *[schema.field(column) for column in requested if column not in ("city_id", "measurement_timestamp")],
+    ])
+
+def iter_history_batches(
+    dataset: str,
+    columns: Optional[Sequence[str]] = None,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    batch_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Stream a dataset's full history as Arrow record batches
+
+    Archived months are scanned from Parquet with projection and predicate
+    pushdown; later rows come from the measurement table, in batches of the
+    same schema (see history_schema).
+    """
+    table, primary_key = ARCHIVE_DATASETS[dataset]
+    schema = history_schema(dataset, columns)
+    city_ids = resolve_city_ids(city, country) if city or country else None
+
+    # Rows before the end of the newest archived month come from Parquet
+    boundary = archived_until(dataset)
+    archive = open_archive(dataset)
+    if archive is not None and (start_date is None or start_date.astimezone(timezone.utc) < boundary):
+        expression = ds.field("measurement_timestamp") < pa.scalar(boundary, type=TIMESTAMP_TYPE)
+        filters = archive_filter(start_date, end_date, city_ids)
+        if filters is not None:
+            expression = expression & filters
+        for batch in archive.to_batches(columns=schema.names, filter=expression, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch
+
+    query = f"SELECT {', '.join(schema.names)} FROM {table} WHERE 1=1"
+    params: List[Any] = []
+    lower_bounds = [to_epoch(value) for value in (start_date, boundary) if value is not None]
+    if lower_bounds:
+        query += " AND measurement_timestamp >= ?"
+        params.append(max(lower_bounds))
+    if end_date:
+        query += " AND measurement_timestamp <= ?"
+        params.append(to_epoch(end_date))
+    if city_ids is not None:
+        query += f" AND city_id IN ({', '.join('?' * len(city_ids))})"
+        params.extend(city_ids)
+    query += f" ORDER BY city_id, measurement_timestamp, {primary_key}"
+
+    with get_db() as conn:
+        cursor = conn.cursor()
+        with timed_query(f"history_{table}"):
+            cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows_to_batch(rows, schema)
+
+def read_history(dataset: str, columns: Optional[Sequence[str]] = None, **filters) -> pa.Table:
+    """Full history of the requested columns as one Arrow table (call .to_pandas() for a DataFrame)"""
+    return pa.Table.from_batches(
+        list(iter_history_batches(dataset, columns, **filters)),
+        schema=history_schema(dataset, columns)
+    )
+
+def query_archive(args: argparse.Namespace) -> None:
+    """Print a summary of a history query, for checking the archive from the shell"""
+    result = read_history(
+        args.dataset, args.columns, city=args.city, country=args.country,
+        start_date=args.start_date, end_date=args.end_date
+    )
+    print(result.slice(0, args.head).to_pandas().to_string() if args.head else "")
+    print(f"{result.num_rows} rows, {result.nbytes} bytes in memory")
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Archive closed months to Parquet and query the full history")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export", help="archive every closed month that is not archived yet")
+    query = commands.add_parser("query", help="read history with column projection and filters")
+    query.add_argument("dataset", choices=list(ARCHIVE_DATASETS))
+    query.add_argument("--columns", nargs="+")
+    query.add_argument("--city")
+    query.add_argument("--country")
+    query.add_argument("--start-date", type=datetime.fromisoformat)
+    query.add_argument("--end-date", type=datetime.fromisoformat)
+    query.add_argument("--head", type=int, default=10, help="rows to print")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        for dataset in ARCHIVE_DATASETS:
+            export_archive(dataset)
+    else:
+        query_archive(args)
@@ -0,0 +1,163 @@
+import asyncio
+import time
+import logging
+from datetime import datetime
+from typing import Dict, Optional, Any, List, Tuple
+
+import httpx
+
+from app.core.config import (
+    API_KEY,
+    CURRENT_WEATHER_API_URL,
+    AIR_POLLUTION_API_URL,
+    REQUEST_TIMEOUT,
+    COLLECTION_CONCURRENCY,
+    COLLECTION_RATE_LIMIT,
+    COLLECTION_RATE_BURST,
+    HTTP_MAX_RETRIES
+)
+from app.database.cities import load_cities
+from app.services.collector import save_batch
+from app.services.http_client import RETRY_STATUSES, backoff_delay, parse_retry_after, fetch_latency, record_city_fetch
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token bucket rate limiter shared by all requests of a sweep"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        if self.rate <= 0:
+            return
+
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+async def fetch_json(
+    client: httpx.AsyncClient,
+    bucket: TokenBucket,
+    endpoint: str,
+    url: str,
+    params: Dict[str, Any],
+    max_retries: int = HTTP_MAX_RETRIES
+) -> Optional[Dict[str, Any]]:
+    """Fetch a JSON document, respecting the shared rate limit and retrying transient failures"""
+    started_at = time.perf_counter()
+    try:
+        for attempt in range(max_retries + 1):
+            await bucket.acquire()
+            retry_after = None
+            try:
+                response = await client.get(url, params=params)
+                if response.status_code not in RETRY_STATUSES or attempt == max_retries:
+                    response.raise_for_status()
+                    return response.json()
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                reason = f"HTTP {response.status_code}"
+            except httpx.TransportError as e:
+                if attempt == max_retries:
+                    raise
+                reason = str(e) or type(e).__name__
+
+            delay = retry_after if retry_after is not None else backoff_delay(attempt)
+            logger.warning(
+                f"Retrying {endpoint} for coordinates ({params['lat']}, {params['lon']}) "
+                f"in {delay:.2f}s after {reason} (attempt {attempt + 1}/{max_retries})"
+            )
+            await asyncio.sleep(delay)
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error(f"Error fetching {endpoint} for coordinates ({params['lat']}, {params['lon']}): {e}")
+        return None
+    finally:
+        fetch_latency.observe(time.perf_counter() - started_at, endpoint)
+
+async def fetch_city_data(
+    client: httpx.AsyncClient,
+    bucket: TokenBucket,
+    semaphore: asyncio.Semaphore,
+    city_info: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Fetch weather and air pollution data for a single city concurrently"""
+    lat, lon = city_info['lat'], city_info['lon']
+
+    async with semaphore:
+        logger.info(f"Collecting data for {city_info['name']}, {city_info['country']}...")
+        started_at = time.perf_counter()
+        current_weather, air_data = await asyncio.gather(
+            fetch_json(client, bucket, "weather", CURRENT_WEATHER_API_URL, {
+                'lat': lat,
+                'lon': lon,
+                'appid': API_KEY,
+                'units': 'metric',  # Always use metric units
+            }),
+            fetch_json(client, bucket, "air_pollution", AIR_POLLUTION_API_URL, {
+                'lat': lat,
+                'lon': lon,
+                'appid': API_KEY,
+            })
+        )
+        record_city_fetch(city_info['name'], time.perf_counter() - started_at, current_weather, air_data)
+
+    return city_info, current_weather, air_data
+
+async def fetch_all_cities(
+    cities: List[Dict[str, Any]],
+    concurrency: int = COLLECTION_CONCURRENCY,
+    rate_limit: float = COLLECTION_RATE_LIMIT,
+    rate_burst: int = COLLECTION_RATE_BURST
+) -> List[Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Fetch data for every city with bounded concurrency over one pooled client"""
+    concurrency = max(concurrency, 1)
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate_limit, rate_burst)
+    limits = httpx.Limits(
+        max_connections=concurrency * 2,
+        max_keepalive_connections=concurrency * 2
+    )
+
+    async with httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT) as client:
+        return await asyncio.gather(*(
+            fetch_city_data(client, bucket, semaphore, city_info)
+            for city_info in cities
+        ))
+
+def collect_data_for_all_cities_async(cities: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Collect data for all cities (defaults to the active cities in the database) using the concurrent asyncio engine"""
+    if not API_KEY:
+        logger.error("OpenWeather API key is not set")
+        return
+
+    started_at = time.monotonic()
+    logger.info(f"Starting concurrent data collection at {datetime.now().isoformat()}")
+
+    results = asyncio.run(fetch_all_cities(cities or load_cities()))
+
+    fetched = []
+    for city_info, current_weather, air_data in results:
+        if current_weather:
+            fetched.append((city_info, current_weather, air_data))
+        else:
+            logger.error(f"Failed to collect weather data for {city_info['name']}")
+
+    save_batch(fetched)
+
+    logger.info(
+        f"Concurrent data collection completed at {datetime.now().isoformat()} "
+        f"({len(results)} cities in {time.monotonic() - started_at:.2f}s)"
+    )
@@ -0,0 +1,143 @@
+"""
+Push of new readings to dashboards over server-sent events.
+
+After each committed sweep the collector calls publish_new_measurements().
+It reads the latest readings of the cities the sweep touched with one query
+and encodes them once as an SSE `measurements` event, and every client
+receives the same bytes. A client is a coroutine waiting on a bounded
+asyncio queue, so an idle connection costs a queue and a suspended
+generator rather than a thread or a database poll. If a client falls
+SSE_CLIENT_QUEUE_SIZE events behind, its backlog is replaced by one `resync`
+event and it reloads /api/v1/latest; a reconnect that missed events is
+treated the same way.
+"""
+import asyncio
+import json
+import threading
+import logging
+from typing import AsyncIterator, List, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import SSE_CLIENT_QUEUE_SIZE, SSE_HEARTBEAT_SECONDS
+from app.core.metrics import Counter, Gauge
+from app.database.database import get_db, timed_query
+from app.database.latest import read_latest
+
+logger = logging.getLogger(__name__)
+
+events_published = Counter("sse_events_published_total", "Server-sent events published", ["event"])
+client_resyncs = Counter("sse_client_resyncs_total", "Clients told to reload because they fell behind or reconnected late")
+
+KEEPALIVE = b": keepalive\n\n"
+
+def encode_event(event_id: int, event: str, data: str) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n".encode()
+
+class MeasurementBroadcaster:
+    """Fans events out from the collector thread to SSE clients on the event loop"""
+
+    def __init__(self, queue_size: int = SSE_CLIENT_QUEUE_SIZE, heartbeat: float = SSE_HEARTBEAT_SECONDS):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.event_id = 0
+        # Newest (weather_id, air_pollution_id) already published
+        self.published_ids: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> asyncio.Queue:
+        """Register a client; must be called on the event loop"""
+        self.loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        if last_event_id is not None and last_event_id < self.event_id:
+            queue.put_nowait(encode_event(self.event_id, "resync", "{}"))
+            client_resyncs.inc()
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    async def stream(self, last_event_id: Optional[int] = None) -> AsyncIterator[bytes]:
+        """SSE body of one client, with keepalive comments while nothing is published"""
+        # Subscribed only once the body is sent, so an aborted request leaves nothing behind
+        queue = self.subscribe(last_event_id)
+        try:
+            yield b"retry: 5000\n\n"
+            while True:
+                try:
+                    yield await asyncio.wait_for(queue.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    yield KEEPALIVE
+        finally:
+            self.unsubscribe(queue)
+
+    def publish(self, event: str, data: str) -> None:
+        """Queue an event for every client; safe to call from any thread"""
+        loop = self.loop
+        if loop is None or not self.subscribers:
+            return
+        with self._lock:
+            self.event_id += 1
+            event_id = self.event_id
+        loop.call_soon_threadsafe(self._deliver, event_id, encode_event(event_id, event, data))
+        events_published.inc(event)
+
+    def _deliver(self, event_id: int, message: bytes) -> None:
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A slow client gets one resync instead of an unbounded backlog
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(encode_event(event_id, "resync", "{}"))
+                client_resyncs.inc()
+
+    def publish_new_measurements(self) -> int:
+        """Publish the latest readings of cities with rows committed since the last call"""
+        with self._lock, get_db() as conn, timed_query("broadcast_new_measurements"):
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT
+                    (SELECT COALESCE(MAX(weather_id), 0) FROM weather_measurements),
+                    (SELECT COALESCE(MAX(air_pollution_id), 0) FROM air_pollution_measurements)
+            """)
+            newest = cursor.fetchone()
+            previous, self.published_ids = self.published_ids, newest
+            if not self.subscribers or newest == previous:
+                return 0
+            if previous is None:
+                # Nothing to diff against yet: send every city
+                rows = read_latest(cursor)
+            else:
+                cursor.execute("""
+                    SELECT city_id FROM weather_measurements WHERE weather_id > ?
+                    UNION
+                    SELECT city_id FROM air_pollution_measurements WHERE air_pollution_id > ?
+                """, previous)
+                city_ids: List[int] = [row[0] for row in cursor.fetchall()]
+                rows = read_latest(cursor, city_ids=city_ids)
+
+        if rows:
+            self.publish("measurements", json.dumps(jsonable_encoder(rows)))
+        return len(rows)
+
+broadcaster = MeasurementBroadcaster()
+
+connected_clients = Gauge(
+    "sse_connected_clients",
+    "Clients subscribed to the measurement stream",
+    function=lambda: len(broadcaster.subscribers)
+)
+
+def publish_new_measurements() -> None:
+    """Push a sweep's new readings to subscribers; errors are logged, never raised into the collector"""
+    try:
+        cities = broadcaster.publish_new_measurements()
+        if cities:
+            logger.info(f"Pushed new readings of {cities} cities to {len(broadcaster.subscribers)} clients")
+    except Exception as e:
+        logger.error(f"Error publishing new measurements: {e}")
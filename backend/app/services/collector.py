@@ -2,18 +2,28 @@ import time
 import requests
 import logging
 from datetime import datetime
-import sqlite3
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, List, Tuple
 
 from app.core.config import (
     API_KEY,
     CURRENT_WEATHER_API_URL,
     AIR_POLLUTION_API_URL,
     REQUEST_TIMEOUT,
-    COLLECTION_INTERVAL
+    COLLECTION_INTERVAL,
+    INGEST_QUEUE_ENABLED,
+    INGEST_JOURNAL_PATH,
+    INGEST_QUEUE_MAX_RECORDS,
+    INGEST_BATCH_SIZE,
+    INGEST_SEGMENT_BYTES,
+    INGEST_JOURNAL_FSYNC
 )
-from app.core.cities import CITIES
-from app.database.database import get_db
+from app.core.metrics import Gauge
+from app.database.cities import load_cities
+from app.services.http_client import timed_get, record_city_fetch
+from app.services.alerts import alert_engine
+from app.services.broadcast import publish_new_measurements
+from app.services.ingest import IngestQueue
+from app.database.writer import city_id_cache, read_ingest_checkpoint, write_measurements
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -32,7 +42,8 @@ def get_current_weather(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     }
     
     try:
-        response = requests.get(
+        response = timed_get(
+            "weather",
             CURRENT_WEATHER_API_URL,
             params=params,
             timeout=REQUEST_TIMEOUT
@@ -56,7 +67,8 @@ def get_air_pollution_data(lat: float, lon: float) -> Optional[Dict[str, Any]]:
     }
     
     try:
-        response = requests.get(
+        response = timed_get(
+            "air_pollution",
             AIR_POLLUTION_API_URL,
             params=params,
             timeout=REQUEST_TIMEOUT
@@ -81,7 +93,7 @@ def extract_current_weather(weather_data: Dict[str, Any], city_info: Dict[str, A
             'country': city_info['country'],
             'latitude': city_info['lat'],
             'longitude': city_info['lon'],
-            'measurement_timestamp': datetime.fromtimestamp(weather_data.get('dt', 0)).isoformat(),
+            'measurement_timestamp': weather_data.get('dt', 0),
             'temp': weather_data.get('main', {}).get('temp'),
             'feels_like': weather_data.get('main', {}).get('feels_like'),
             'temp_min': weather_data.get('main', {}).get('temp_min'),
@@ -103,8 +115,8 @@ def extract_current_weather(weather_data: Dict[str, Any], city_info: Dict[str, A
             'weather_main': weather.get('main'),
             'weather_description': weather.get('description'),
             'weather_icon': weather.get('icon'),
-            'sunrise': datetime.fromtimestamp(weather_data.get('sys', {}).get('sunrise', 0)).strftime('%H:%M:%S') if weather_data.get('sys', {}).get('sunrise') else None,
-            'sunset': datetime.fromtimestamp(weather_data.get('sys', {}).get('sunset', 0)).strftime('%H:%M:%S') if weather_data.get('sys', {}).get('sunset') else None,
+            'sunrise': weather_data.get('sys', {}).get('sunrise') or None,
+            'sunset': weather_data.get('sys', {}).get('sunset') or None,
         }
     except Exception as e:
         logger.error(f"Error extracting weather data: {e}")
@@ -132,100 +144,132 @@ def extract_air_pollution_data(air_data: Dict[str, Any]) -> Dict[str, Any]:
         logger.error(f"Error extracting air pollution data: {e}")
         return {}
 
-def save_data(city_info: Dict[str, Any], current_weather: Dict[str, Any], air_data: Dict[str, Any]) -> None:
-    """Save weather and air pollution data to database"""
-    collection_timestamp = datetime.now().isoformat()
-    
+def build_weather_row(city_id: int, weather_dict: Dict[str, Any], collection_timestamp: int) -> tuple:
+    """Build the weather_measurements insert row from an extracted weather dict"""
+    return (
+        city_id, weather_dict['measurement_timestamp'], collection_timestamp,
+        weather_dict['temp'], weather_dict['feels_like'], weather_dict['temp_min'],
+        weather_dict['temp_max'], weather_dict['pressure'], weather_dict['humidity'],
+        weather_dict['sea_level'], weather_dict['grnd_level'], weather_dict['visibility'],
+        weather_dict['wind_speed'], weather_dict['wind_deg'], weather_dict['wind_gust'],
+        weather_dict['clouds_all'], weather_dict['rain_1h'], weather_dict['rain_3h'],
+        weather_dict['snow_1h'], weather_dict['snow_3h'], weather_dict['weather_id'],
+        weather_dict['weather_icon'], weather_dict['sunrise'], weather_dict['sunset']
+    )
+
+def build_air_row(city_id: int, measurement_timestamp: int, air_dict: Dict[str, Any], collection_timestamp: int) -> tuple:
+    """Build the air_pollution_measurements insert row from an extracted air pollution dict"""
+    return (
+        city_id, measurement_timestamp, collection_timestamp,
+        air_dict['aqi'], air_dict['co'], air_dict['no'], air_dict['no2'],
+        air_dict['o3'], air_dict['so2'], air_dict['pm2_5'], air_dict['pm10'],
+        air_dict['nh3']
+    )
+
+def build_batch(payloads: List[Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]], int]]) -> Tuple[list, list, list, list]:
+    """
+    Rows, weather conditions and fired alerts of fetched readings
+
+    `payloads` are (city_info, current_weather, air_data, collection_timestamp)
+    tuples, the result is write_measurements' positional arguments. City ids
+    are all looked up before any alert rule is evaluated, so a database error
+    leaves the (stateful) alert engine untouched and the call can be retried.
+    """
+    weather_rows = []
+    air_rows = []
+    conditions = {}
+    alerts = []
+
+    city_ids = [city_id_cache.get(city_info['name'], city_info['country']) for city_info, *_ in payloads]
+    for city_id, (city_info, current_weather, air_data, collection_timestamp) in zip(city_ids, payloads):
+        if city_id is None:
+            logger.error(f"City not found in database: {city_info['name']}, {city_info['country']}")
+            continue
+
+        weather_dict = extract_current_weather(current_weather, city_info)
+        if not weather_dict:
+            continue
+        weather_rows.append(build_weather_row(city_id, weather_dict, collection_timestamp))
+        if weather_dict['weather_id'] is not None:
+            conditions[weather_dict['weather_id']] = (weather_dict['weather_main'], weather_dict['weather_description'])
+
+        air_dict = extract_air_pollution_data(air_data)
+        if air_dict:
+            air_rows.append(build_air_row(city_id, weather_dict['measurement_timestamp'], air_dict, collection_timestamp))
+        alerts.extend(alert_engine.evaluate(city_id, {**weather_dict, **(air_dict or {})}, collection_timestamp))
+
+    return weather_rows, air_rows, [(condition_id, *texts) for condition_id, texts in conditions.items()], alerts
+
+def write_batch(batch: Tuple[list, list, list, list], journal_seq: Optional[int] = None) -> None:
+    """Write a built batch in one transaction and push the new readings to stream subscribers"""
+    write_measurements(*batch, journal_seq=journal_seq)
+    publish_new_measurements()
+
+ingest_queue = IngestQueue(
+    INGEST_JOURNAL_PATH, build_batch, write_batch, read_ingest_checkpoint,
+    INGEST_QUEUE_MAX_RECORDS, INGEST_BATCH_SIZE, INGEST_SEGMENT_BYTES, INGEST_JOURNAL_FSYNC
+)
+
+ingest_queue_depth = Gauge(
+    "ingest_queue_depth",
+    "Journaled readings waiting for the database writer",
+    function=ingest_queue.depth
+)
+
+def save_batch(results: List[Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]]) -> None:
+    """Hand the fetched data of a sweep to the ingest queue, or write it in one transaction when the queue is off"""
+    if INGEST_QUEUE_ENABLED:
+        ingest_queue.submit(results)
+        return
+
+    collection_timestamp = int(time.time())
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            
-            # Get city_id
-            cursor.execute(
-                "SELECT city_id FROM cities WHERE name = ? AND country = ?",
-                (city_info['name'], city_info['country'])
-            )
-            result = cursor.fetchone()
-            
-            if not result:
-                logger.error(f"City not found in database: {city_info['name']}, {city_info['country']}")
-                return
-                
-            city_id = result[0]
-            
-            # Extract and save weather data
-            weather_dict = extract_current_weather(current_weather, city_info)
-            if weather_dict:
-                try:
-                    cursor.execute("""
-                        INSERT INTO weather_measurements (
-                            city_id, measurement_timestamp, collection_timestamp,
-                            temperature, feels_like, temp_min, temp_max, pressure,
-                            humidity, sea_level, ground_level, visibility, wind_speed,
-                            wind_degree, wind_gust, clouds_all, rain_1h, rain_3h,
-                            snow_1h, snow_3h, weather_condition_id, weather_main,
-                            weather_description, weather_icon, sunrise, sunset
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        city_id, weather_dict['measurement_timestamp'], collection_timestamp,
-                        weather_dict['temp'], weather_dict['feels_like'], weather_dict['temp_min'],
-                        weather_dict['temp_max'], weather_dict['pressure'], weather_dict['humidity'],
-                        weather_dict['sea_level'], weather_dict['grnd_level'], weather_dict['visibility'],
-                        weather_dict['wind_speed'], weather_dict['wind_deg'], weather_dict['wind_gust'],
-                        weather_dict['clouds_all'], weather_dict['rain_1h'], weather_dict['rain_3h'],
-                        weather_dict['snow_1h'], weather_dict['snow_3h'], weather_dict['weather_id'],
-                        weather_dict['weather_main'], weather_dict['weather_description'],
-                        weather_dict['weather_icon'], weather_dict['sunrise'], weather_dict['sunset']
-                    ))
-                except sqlite3.Error as e:
-                    logger.error(f"Error saving weather data: {e}")
-            
-            # Extract and save air pollution data
-            air_dict = extract_air_pollution_data(air_data)
-            if air_dict:
-                try:
-                    cursor.execute("""
-                        INSERT INTO air_pollution_measurements (
-                            city_id, measurement_timestamp, collection_timestamp,
-                            aqi, co, no, no2, o3, so2, pm2_5, pm10, nh3
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        city_id, weather_dict['measurement_timestamp'], collection_timestamp,
-                        air_dict['aqi'], air_dict['co'], air_dict['no'], air_dict['no2'],
-                        air_dict['o3'], air_dict['so2'], air_dict['pm2_5'], air_dict['pm10'],
-                        air_dict['nh3']
-                    ))
-                except sqlite3.Error as e:
-                    logger.error(f"Error saving air pollution data: {e}")
-            
-            conn.commit()
-            logger.info(f"Data for {city_info['name']} saved to database")
-            
+        write_batch(build_batch([(*result, collection_timestamp) for result in results]))
     except Exception as e:
-        logger.error(f"Error in save_data for {city_info['name']}: {e}")
+        logger.error(f"Error saving batch of {len(results)} cities: {e}")
 
-def collect_data_for_city(city_info: Dict[str, Any]) -> None:
-    """Collect weather and air pollution data for a single city"""
+def save_data(city_info: Dict[str, Any], current_weather: Dict[str, Any], air_data: Dict[str, Any]) -> None:
+    """Save weather and air pollution data for a single city to database"""
+    save_batch([(city_info, current_weather, air_data)])
+
+def fetch_city_data(city_info: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]]:
+    """Fetch weather and air pollution data for a single city without saving it"""
     lat, lon = city_info['lat'], city_info['lon']
     
     logger.info(f"Collecting data for {city_info['name']}, {city_info['country']}...")
     
+    started_at = time.perf_counter()
     current_weather = get_current_weather(lat, lon)
     if current_weather:
         air_data = get_air_pollution_data(lat, lon)
-        save_data(city_info, current_weather, air_data)
-    else:
-        logger.error(f"Failed to collect weather data for {city_info['name']}")
+        record_city_fetch(city_info['name'], time.perf_counter() - started_at, current_weather, air_data)
+        return city_info, current_weather, air_data
+
+    # Air pollution is not requested without weather, so only weather counts as failed
+    record_city_fetch(city_info['name'], time.perf_counter() - started_at, None, {})
+    logger.error(f"Failed to collect weather data for {city_info['name']}")
+    return None
+
+def collect_data_for_city(city_info: Dict[str, Any]) -> None:
+    """Collect weather and air pollution data for a single city"""
+    result = fetch_city_data(city_info)
+    if result:
+        save_data(*result)
 
-def collect_data_for_all_cities() -> None:
-    """Collect data for all cities"""
+def collect_data_for_all_cities(cities: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Collect data for all cities (defaults to the active cities in the database)"""
     logger.info(f"Starting data collection at {datetime.now().isoformat()}")
+    results = []
     
-    for city_info in CITIES:
+    for city_info in cities or load_cities():
         try:
-            collect_data_for_city(city_info)
+            result = fetch_city_data(city_info)
+            if result:
+                results.append(result)
             time.sleep(1)  # Rate limiting
         except Exception as e:
             logger.error(f"Error collecting data for {city_info['name']}: {e}")
+
+    save_batch(results)
     
     logger.info(f"Data collection completed at {datetime.now().isoformat()}")
\ No newline at end of file
@@ -2,17 +2,73 @@ import threading
 import time
 import logging
 from datetime import datetime 
-from app.core.config import COLLECTION_INTERVAL
-from app.services.collector import collect_data_for_all_cities
+from app.core.config import (
+    COLLECTION_INTERVAL,
+    COLLECTION_MODE,
+    COLLECTION_SCHEDULE,
+    COLLECTION_JITTER,
+    COLLECTION_BATCH_WINDOW,
+    COLLECTION_RETRY_DELAY,
+    OPENWEATHER_CALLS_PER_MINUTE,
+    RETENTION_INTERVAL
+)
+from app.core.metrics import Counter, Histogram
+from app.database.cities import load_cities
+from app.services.collector import collect_data_for_all_cities, ingest_queue
+from app.services.async_collector import collect_data_for_all_cities_async
+from app.services.sharded_collector import collect_data_for_all_cities_sharded, sharded_collector
+from app.services.retention import run_retention
+from app.services.forecast import update_forecasts
+from app.services.scheduler import CollectionSchedule
 
 logger = logging.getLogger(__name__)
 
+sweep_duration = Histogram(
+    "collector_sweep_duration_seconds",
+    "Duration of a full collection sweep",
+    ["mode"],
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200)
+)
+sweep_failures = Counter(
+    "collector_sweep_failures_total",
+    "Collection sweeps that raised an error",
+    ["mode"]
+)
+batch_duration = Histogram(
+    "collector_batch_duration_seconds",
+    "Duration of a scheduled batch of cities",
+    ["mode"],
+    buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+batch_lag = Histogram(
+    "collector_schedule_lag_seconds",
+    "How late scheduled batches start after their cities were due",
+    buckets=(0.1, 1, 5, 10, 30, 60, 300, 900)
+)
+batch_cities = Counter(
+    "collector_scheduled_cities_total",
+    "Cities collected by the per-city schedule",
+    ["mode"]
+)
+
 class CollectorService:
     def __init__(self):
         self.running = False
         self.thread = None
         self.last_collection_time = None
         self.collection_interval = COLLECTION_INTERVAL
+        self.collection_mode = COLLECTION_MODE
+        self.collection_schedule = COLLECTION_SCHEDULE
+        self.last_retention_time = None
+        self.last_forecast_time = None
+        self.last_city_sync = None
+        self.cities_changed = False
+        self.schedule = CollectionSchedule(
+            COLLECTION_INTERVAL, COLLECTION_JITTER, COLLECTION_BATCH_WINDOW, OPENWEATHER_CALLS_PER_MINUTE
+        )
+        self.schedule_lock = threading.Lock()
+        # Set to cut a wait short: stop, interval changes and city changes
+        self.wakeup = threading.Event()
 
     def start_collection(self):
         """Start the data collection process"""
@@ -20,7 +76,9 @@ class CollectorService:
             return False, "Collector is already running"
         
         self.running = True
-        self.thread = threading.Thread(target=self._collection_loop)
+        self.wakeup.clear()
+        loop = self._scheduled_loop if self.collection_schedule == "spread" else self._collection_loop
+        self.thread = threading.Thread(target=loop)
         self.thread.daemon = True
         self.thread.start()
         logger.info("Data collection service started")
@@ -32,21 +90,122 @@ class CollectorService:
             return False, "Collector is not running"
         
         self.running = False
+        self.wakeup.set()
         if self.thread:
             self.thread.join(timeout=10)
             logger.info("Data collection service stopped")
+        sharded_collector.shutdown()
         return True, "Collector stopped successfully"
 
+    def _collect(self, cities=None):
+        """Fetch and save `cities` (all active cities when None) with the configured engine"""
+        if self.collection_mode == "async":
+            collect_data_for_all_cities_async(cities)
+        elif self.collection_mode == "sharded":
+            collect_data_for_all_cities_sharded(cities)
+        else:
+            collect_data_for_all_cities(cities)
+
+    def _wait(self, seconds):
+        """Sleep up to `seconds` (forever when None), waking early on stop or reconfiguration"""
+        self.wakeup.wait(seconds)
+        self.wakeup.clear()
+
     def _collection_loop(self):
-        """Main collection loop that runs in a separate thread"""
+        """Sweep loop: collect every city at once, then wait out the interval"""
         while self.running:
+            started_at = time.time()
             try:
-                collect_data_for_all_cities()
+                self._collect()
+                # Let the sweep reach the database before the forecasts fold it in
+                ingest_queue.flush(self.collection_interval)
+                sweep_duration.observe(time.time() - started_at, self.collection_mode)
                 self.last_collection_time = time.time()
-                time.sleep(self.collection_interval)
+                update_forecasts()
+                self._run_retention_if_due()
+                # Re-checked after every wakeup so interval changes apply to the current wait
+                while self.running and time.time() < started_at + self.collection_interval:
+                    self._wait(started_at + self.collection_interval - time.time())
             except Exception as e:
+                sweep_failures.inc(self.collection_mode)
                 logger.error(f"Error in collection loop: {e}")
-                time.sleep(10)  # Wait before retrying
+                self._wait(COLLECTION_RETRY_DELAY)
+
+    def _scheduled_loop(self):
+        """Per-city loop: collect each batch of cities as it falls due (see app.services.scheduler)"""
+        while self.running:
+            now = time.time()
+            try:
+                if self.cities_changed or self.last_city_sync is None or now - self.last_city_sync >= self.collection_interval:
+                    self._sync_cities(now)
+            except Exception as e:
+                logger.error(f"Error loading cities to schedule: {e}")
+                self._wait(COLLECTION_RETRY_DELAY)
+                continue
+
+            with self.schedule_lock:
+                wait = self.schedule.wait_time(now)
+                cities, lag = self.schedule.take_due(now) if wait == 0 else ([], 0.0)
+            if not cities:
+                # Also wake for the periodic city refresh
+                refresh_in = self.last_city_sync + self.collection_interval - now
+                self._wait(refresh_in if wait is None else min(wait, refresh_in))
+                continue
+
+            batch_lag.observe(lag)
+            self._collect_batch(cities)
+
+    def _sync_cities(self, now):
+        """Bring the schedule in line with the active cities in the database"""
+        self.cities_changed = False
+        cities = load_cities()
+        with self.schedule_lock:
+            self.schedule.sync(cities, now)
+        self.last_city_sync = now
+
+    def _collect_batch(self, cities):
+        """Collect one batch, then schedule its next run (or a retry if it failed)"""
+        started_at = time.time()
+        try:
+            self._collect(cities)
+        except Exception as e:
+            sweep_failures.inc(self.collection_mode)
+            logger.error(f"Error collecting {len(cities)} scheduled cities: {e}")
+            with self.schedule_lock:
+                self.schedule.retry(cities, time.time(), COLLECTION_RETRY_DELAY)
+            return
+
+        batch_duration.observe(time.time() - started_at, self.collection_mode)
+        batch_cities.inc(self.collection_mode, amount=len(cities))
+        with self.schedule_lock:
+            self.schedule.complete(cities, time.time())
+        self.last_collection_time = time.time()
+        self._run_forecasts_if_due()
+        self._run_retention_if_due()
+
+    def _run_forecasts_if_due(self):
+        """Fold new readings into the AQI models once per collection interval, as a sweep would"""
+        if self.last_forecast_time and time.time() - self.last_forecast_time < self.collection_interval:
+            return
+        # Batches are written by the ingest writer; fold in what has been fetched so far
+        ingest_queue.flush(self.collection_interval)
+        update_forecasts()
+        self.last_forecast_time = time.time()
+
+    def reload_cities(self):
+        """Pick up added, removed or rescheduled cities before the next batch"""
+        self.cities_changed = True
+        self.wakeup.set()
+
+    def _run_retention_if_due(self):
+        """Apply the retention policy between sweeps, so it never competes with one for the writer"""
+        if self.last_retention_time and time.time() - self.last_retention_time < RETENTION_INTERVAL:
+            return
+        try:
+            run_retention()
+        except Exception as e:
+            logger.error(f"Error applying retention policy: {e}")
+        self.last_retention_time = time.time()
 
     def get_status(self):
         """Get the current status of the collector service"""
@@ -54,13 +213,31 @@ class CollectorService:
             "running": self.running,
             "last_collection": self.last_collection_time,
             "collection_interval": self.collection_interval,
+            "collection_mode": self.collection_mode,
+            "collection_schedule": self.collection_schedule,
+            **self._schedule_status(),
+            "last_retention": self.last_retention_time,
             "last_collection_formatted": datetime.fromtimestamp(self.last_collection_time).isoformat() if self.last_collection_time else None
         }
 
+    def _schedule_status(self):
+        """Cities on the per-city schedule and when the next one is due"""
+        if self.collection_schedule != "spread":
+            return {}
+        with self.schedule_lock:
+            next_due = self.schedule.next_due()
+            return {
+                "scheduled_cities": len(self.schedule),
+                "next_due": datetime.fromtimestamp(next_due).isoformat() if next_due else None
+            }
+
     def set_interval(self, interval: int):
         """Set the collection interval in seconds"""
         if interval < 60:  # Minimum 1 minute
             return False, "Interval must be at least 60 seconds"
         self.collection_interval = interval
+        with self.schedule_lock:
+            self.schedule.set_interval(interval, time.time())
+        self.wakeup.set()
         logger.info(f"Collection interval updated to {interval} seconds")
         return True, f"Collection interval set to {interval} seconds"
\ No newline at end of file
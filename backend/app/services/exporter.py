@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from app.core.config import EXPORT_CHUNK_SIZE, OUTPUT_CSV_PATH
+from app.database.cities import city_filter_sql
+from app.database.database import get_db, timed_query
+from app.database.timestamps import local_sql, to_epoch
+from app.database.writer import WEATHER_COLUMNS, AIR_POLLUTION_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+def measurement_expressions(columns: Sequence[str]) -> Dict[str, str]:
+    """Export column -> SQL expression, rendering epoch timestamps as local ISO text"""
+    return {
+        column: local_sql(f"m.{column}") if column.endswith("_timestamp") else f"m.{column}"
+        for column in columns
+    }
+
+# Exports keep the text layout of the original tables
+WEATHER_EXPORT_COLUMNS = {
+    **measurement_expressions(WEATHER_COLUMNS[1:WEATHER_COLUMNS.index("weather_icon")]),
+    "weather_main": "wc.weather_main",
+    "weather_description": "wc.weather_description",
+    "weather_icon": "m.weather_icon",
+    "sunrise": local_sql("m.sunrise", "%H:%M:%S"),
+    "sunset": local_sql("m.sunset", "%H:%M:%S"),
+}
+
+# Exportable tables: (table, primary key, export column expressions, extra joins)
+EXPORT_DATASETS = {
+    "weather": (
+        "weather_measurements", "weather_id", WEATHER_EXPORT_COLUMNS,
+        "LEFT JOIN weather_conditions wc ON m.weather_condition_id = wc.weather_condition_id"
+    ),
+    "air-pollution": (
+        "air_pollution_measurements", "air_pollution_id", measurement_expressions(AIR_POLLUTION_COLUMNS[1:]), ""
+    ),
+}
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def export_columns(dataset: str) -> List[str]:
+    """Column names of an exported dataset"""
+    return ["city", "country", *EXPORT_DATASETS[dataset][2]]
+
+def iter_export_rows(
+    dataset: str,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[List[tuple]]:
+    """
+    Yield chunks of export rows, ordered per city by measurement time
+
+    Each chunk is its own keyset query, so the pooled connection goes back
+    to the pool between chunks instead of being held while the client reads.
+    """
+    table, primary_key, columns, joins = EXPORT_DATASETS[dataset]
+
+    # Ordering by the (city_id, measurement_timestamp) index keeps SQLite from sorting;
+    # the trailing key columns position the next chunk and are not exported
+    query = f"""
+        SELECT c.name, c.country, {", ".join(columns.values())},
+            m.city_id, m.measurement_timestamp, m.{primary_key}
+        FROM {table} m
+        JOIN cities c ON m.city_id = c.city_id
+        {joins}
+        WHERE 1=1
+    """
+    params = []
+
+    if city or country:
+        query += f" AND m.city_id IN ({city_filter_sql(city, country, params)})"
+    if start_date:
+        query += " AND m.measurement_timestamp >= ?"
+        params.append(to_epoch(start_date))
+    if end_date:
+        query += " AND m.measurement_timestamp <= ?"
+        params.append(to_epoch(end_date))
+
+    order = f" ORDER BY m.city_id, m.measurement_timestamp, m.{primary_key} LIMIT ?"
+    after_query = query + f" AND (m.city_id, m.measurement_timestamp, m.{primary_key}) > (?, ?, ?)" + order
+    query += order
+
+    after = None
+    while True:
+        with get_db() as conn, timed_query(f"export_{table}"):
+            if after is None:
+                rows = conn.execute(query, [*params, chunk_size]).fetchall()
+            else:
+                rows = conn.execute(after_query, [*params, *after, chunk_size]).fetchall()
+        if not rows:
+            break
+        yield [tuple(row[:-3]) for row in rows]
+        if len(rows) < chunk_size:
+            break
+        after = rows[-1][-3:]
+
+def format_ndjson(columns: Sequence[str], rows: List[tuple]) -> str:
+    """Render a chunk of rows as newline-delimited JSON"""
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
+
+def format_csv(rows: List[tuple]) -> str:
+    """Render a chunk of rows as CSV lines"""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+def iter_export(dataset: str, export_format: str, **filters) -> Iterator[str]:
+    """Yield the export as text chunks, keeping at most one chunk of rows in memory"""
+    columns = export_columns(dataset)
+
+    if export_format == "csv":
+        yield format_csv([columns])
+        for rows in iter_export_rows(dataset, **filters):
+            yield format_csv(rows)
+    else:
+        for rows in iter_export_rows(dataset, **filters):
+            yield format_ndjson(columns, rows)
+
+def export_to_file(dataset: str, path: Path = OUTPUT_CSV_PATH, export_format: str = "csv", **filters) -> Path:
+    """Write a full export of a dataset to a file"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        for chunk in iter_export(dataset, export_format, **filters):
+            file.write(chunk)
+    logger.info(f"Exported {dataset} data to {path}")
+    return path
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    parser = argparse.ArgumentParser(description="Export measurement history to a file")
+    parser.add_argument("dataset", choices=list(EXPORT_DATASETS), nargs="?", default="weather")
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--output", type=Path, default=OUTPUT_CSV_PATH)
+    parser.add_argument("--city")
+    parser.add_argument("--country")
+    args = parser.parse_args()
+
+    export_to_file(args.dataset, args.output, args.format, city=args.city, country=args.country)
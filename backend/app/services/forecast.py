@@ -0,0 +1,227 @@
+"""
+Per-city AQI forecasts 1-24 hours ahead from lagged weather and pollution readings.
+
+Each city has one ridge regression per horizon. All horizons share the same
+lagged feature rows, so the model only stores the weighted sufficient
+statistics X'X and X'Y. A sweep adds the rows it completes, after decaying
+the old statistics so recent weeks count most, and re-solving is a single
+small linear solve; nothing is refitted from scratch. Forecasts for the
+newest hour are computed at update time and served from memory.
+"""
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import FORECAST_HALF_LIFE_DAYS, FORECAST_MIN_ROWS, FORECAST_RIDGE_ALPHA
+from app.database.database import get_db
+from app.services.analytics import aligned_history
+
+logger = logging.getLogger(__name__)
+
+MAX_HORIZON = 24  # hours
+HORIZONS = np.arange(1, MAX_HORIZON + 1)
+
+# Hourly readings kept per city; features index into these columns
+SERIES_COLUMNS = ["aqi", "pm2_5", "pm10", "no2", "o3", "wind_speed", "humidity", "temperature", "pressure"]
+AQI = SERIES_COLUMNS.index("aqi")
+
+# (column, hours back) of each lagged feature
+LAGGED_FEATURES = [
+    *[("aqi", lag) for lag in (0, 1, 2, 3, 6, 12, 24)],
+    *[(column, 0) for column in ("pm2_5", "pm10", "no2", "o3", "wind_speed", "humidity", "temperature", "pressure")],
+]
+MAX_LAG = max(lag for _, lag in LAGGED_FEATURES)
+FEATURE_INDEXES = [(SERIES_COLUMNS.index(column), lag) for column, lag in LAGGED_FEATURES]
+
+# Intercept, lagged features, then hour-of-day as sin/cos
+FEATURE_COUNT = 1 + len(LAGGED_FEATURES) + 2
+
+# Hours of history kept after an update: enough to build features for the
+# oldest hour whose targets are still incomplete
+BUFFER_HOURS = MAX_LAG + MAX_HORIZON + 1
+
+def feature_matrix(grid: np.ndarray, start: int, feature_hours: np.ndarray) -> np.ndarray:
+    """Feature rows for the given hours, read from a grid beginning at hour `start`"""
+    offsets = feature_hours - start
+    hour_of_day = 2 * np.pi * (feature_hours % 24) / 24
+    columns = [np.ones(len(feature_hours))]
+    for column, lag in FEATURE_INDEXES:
+        index = offsets - lag
+        valid = index >= 0
+        columns.append(np.where(valid, grid[np.where(valid, index, 0), column], np.nan))
+    columns.extend([np.sin(hour_of_day), np.cos(hour_of_day)])
+    return np.column_stack(columns)
+
+def target_matrix(grid: np.ndarray, start: int, feature_hours: np.ndarray) -> np.ndarray:
+    """AQI 1..MAX_HORIZON hours after each feature hour"""
+    index = (feature_hours - start)[:, None] + HORIZONS[None, :]
+    valid = index < len(grid)
+    return np.where(valid, grid[np.where(valid, index, 0), AQI], np.nan)
+
+def forward_filled(grid: np.ndarray) -> np.ndarray:
+    """Grid with gaps filled by the last reading of each column"""
+    return pd.DataFrame(grid).ffill().to_numpy()
+
+class CityModel:
+    """Decayed ridge sufficient statistics, recent readings and current forecast of one city"""
+
+    def __init__(self):
+        self.xtx = np.zeros((FEATURE_COUNT, FEATURE_COUNT))
+        self.xty = np.zeros((FEATURE_COUNT, MAX_HORIZON))
+        self.rows = 0
+        self.start: Optional[int] = None  # hour of buffer[0]
+        self.buffer = np.empty((0, len(SERIES_COLUMNS)))
+        self.fitted_until: Optional[int] = None  # newest feature hour added to the statistics
+        self.weights: Optional[np.ndarray] = None
+        self.issued_for: Optional[int] = None
+        self.forecast: Optional[np.ndarray] = None
+
+    def update(self, hours: np.ndarray, values: np.ndarray, decay: float, alpha: float, min_rows: int) -> None:
+        """Add new hourly readings, fold completed rows into the statistics and refresh the forecast"""
+        start = int(hours.min()) if self.start is None else min(self.start, int(hours.min()))
+        end = int(hours.max()) if self.start is None else max(self.start + len(self.buffer) - 1, int(hours.max()))
+        # Dense hourly grid, NaN where an hour has no reading
+        grid = np.full((end - start + 1, len(SERIES_COLUMNS)), np.nan)
+        if self.start is not None:
+            grid[self.start - start:self.start - start + len(self.buffer)] = self.buffer
+        # Rows arrive in insertion order, so a later reading of the same hour wins
+        grid[hours - start] = values
+
+        # Feature hours whose every target has now been observed
+        first = start + MAX_LAG if self.fitted_until is None else self.fitted_until + 1
+        last = end - MAX_HORIZON
+        if last >= first:
+            feature_hours = np.arange(first, last + 1)
+            x = feature_matrix(grid, start, feature_hours)
+            y = target_matrix(grid, start, feature_hours)
+            complete = ~(np.isnan(x).any(axis=1) | np.isnan(y).any(axis=1))
+            # Older statistics and rows fade with their age in hours
+            if self.fitted_until is not None:
+                self.xtx *= decay ** (last - self.fitted_until)
+                self.xty *= decay ** (last - self.fitted_until)
+            weights = decay ** (last - feature_hours[complete])
+            x, y = x[complete], y[complete]
+            self.xtx += x.T @ (x * weights[:, None])
+            self.xty += x.T @ (y * weights[:, None])
+            self.rows += int(complete.sum())
+            self.fitted_until = last
+            if self.rows >= min_rows:
+                self.weights = self.solve(alpha)
+
+        self.start = max(start, end - BUFFER_HOURS + 1)
+        self.buffer = grid[self.start - start:]
+        self.predict(end)
+
+    def solve(self, alpha: float) -> np.ndarray:
+        """Ridge coefficients on standardized features, mapped back to raw units"""
+        total = self.xtx[0, 0]
+        means = self.xtx[0, 1:] / total
+        covariance = self.xtx[1:, 1:] / total - np.outer(means, means)
+        scale = np.sqrt(np.clip(np.diag(covariance), 0, None))
+        scale[scale == 0] = 1.0
+        target_means = self.xty[0] / total
+        cross = self.xty[1:] / total - np.outer(means, target_means)
+
+        standardized = covariance / np.outer(scale, scale) + alpha * np.eye(len(scale))
+        coefficients = np.linalg.solve(standardized, cross / scale[:, None]) / scale[:, None]
+        intercept = target_means - means @ coefficients
+        return np.vstack([intercept, coefficients])
+
+    def predict(self, end: int) -> None:
+        """Forecast AQI after the newest hour, falling back to persistence without a model"""
+        filled = forward_filled(self.buffer)
+        x = feature_matrix(filled, self.start, np.array([end]))[0]
+        latest_aqi = filled[-1, AQI]
+        if np.isnan(latest_aqi):
+            self.forecast = None
+        elif self.weights is None or np.isnan(x).any():
+            self.forecast = np.full(MAX_HORIZON, latest_aqi)
+        else:
+            # OpenWeather's AQI is an index from 1 (good) to 5 (very poor)
+            self.forecast = np.clip(x @ self.weights, 1, 5)
+        self.issued_for = end
+
+class AqiForecaster:
+    """Per-city AQI models, updated from the aligned analytics history after each sweep"""
+
+    def __init__(
+        self,
+        half_life_days: float = FORECAST_HALF_LIFE_DAYS,
+        alpha: float = FORECAST_RIDGE_ALPHA,
+        min_rows: int = FORECAST_MIN_ROWS
+    ):
+        self.decay = 0.5 ** (1 / (half_life_days * 24)) if half_life_days > 0 else 1.0
+        self.alpha = alpha
+        self.min_rows = min_rows
+        self.models: Dict[int, CityModel] = {}
+        self.cities: Dict[int, tuple] = {}
+        self.last_weather_id = 0
+        self.updated_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def update(self) -> int:
+        """Feed readings committed since the last update to the city models; returns the rows used"""
+        with self._lock:
+            frame = aligned_history.refresh()
+            new_rows = frame[frame["weather_id"].to_numpy() > self.last_weather_id]
+            if len(new_rows):
+                hours = new_rows["measurement_timestamp"].to_numpy() // 3600
+                values = new_rows[SERIES_COLUMNS].to_numpy(dtype=np.float64)
+                city_ids = new_rows["city_id"].to_numpy()
+                for city_id, positions in pd.Series(np.arange(len(new_rows))).groupby(city_ids).groups.items():
+                    model = self.models.setdefault(int(city_id), CityModel())
+                    model.update(hours[positions], values[positions], self.decay, self.alpha, self.min_rows)
+                self.last_weather_id = int(new_rows["weather_id"].max())
+                with get_db() as conn:
+                    self.cities = {row[0]: (row[1], row[2]) for row in conn.execute("SELECT city_id, name, country FROM cities")}
+            self.updated_at = datetime.now()
+            return len(new_rows)
+
+    def forecasts(
+        self,
+        city: Optional[str] = None,
+        country: Optional[str] = None,
+        horizon: int = MAX_HORIZON
+    ) -> List[Dict[str, Any]]:
+        """Current forecasts of the matching cities, read from memory"""
+        # Copied under the lock so an update running in the collector is never seen half-applied
+        with self._lock:
+            current = [
+                (*self.cities.get(city_id, (None, None)), model.issued_for, model.weights is not None, model.rows, model.forecast)
+                for city_id, model in self.models.items()
+            ]
+
+        results = []
+        for name, city_country, issued_for, fitted, rows, forecast in current:
+            if (city and name != city) or (country and city_country != country) or forecast is None:
+                continue
+            results.append({
+                "city": name,
+                "country": city_country,
+                "issued_for": datetime.fromtimestamp(issued_for * 3600),
+                "model": "ridge" if fitted else "persistence",
+                "training_rows": rows,
+                "points": [
+                    {
+                        "hours_ahead": int(hours_ahead),
+                        "timestamp": datetime.fromtimestamp((issued_for + hours_ahead) * 3600),
+                        "aqi": round(float(value), 2),
+                    }
+                    for hours_ahead, value in zip(HORIZONS[:horizon], forecast[:horizon])
+                ],
+            })
+        return results
+
+aqi_forecaster = AqiForecaster()
+
+def update_forecasts() -> None:
+    """Update the AQI models after a sweep; errors are logged, never raised into the collector"""
+    try:
+        rows = aqi_forecaster.update()
+        logger.info(f"AQI forecasts updated with {rows} new readings")
+    except Exception as e:
+        logger.error(f"Error updating AQI forecasts: {e}")
@@ -0,0 +1,110 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.core.config import (
+    HTTP_POOL_SIZE,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_FACTOR,
+    HTTP_BACKOFF_MAX
+)
+from app.core.metrics import Counter, Histogram
+
+# Transient statuses worth retrying
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Per-endpoint OpenWeather request latency, including retries
+fetch_latency = Histogram(
+    "openweather_request_duration_seconds",
+    "Latency of OpenWeather API requests",
+    ["endpoint"]
+)
+
+# Per-city view of a collection sweep, across both endpoints
+city_fetch_latency = Histogram(
+    "openweather_city_fetch_duration_seconds",
+    "Time to fetch all data for one city",
+    ["city"]
+)
+city_fetch_errors = Counter(
+    "openweather_city_fetch_errors_total",
+    "Failed OpenWeather requests per city and endpoint",
+    ["city", "endpoint"]
+)
+
+def record_city_fetch(city_name: str, elapsed: float, current_weather: Optional[dict], air_data: Optional[dict]) -> None:
+    """Record fetch latency and missing responses for one city"""
+    city_fetch_latency.observe(elapsed, city_name)
+    if current_weather is None:
+        city_fetch_errors.inc(city_name, "weather")
+    if air_data is None:
+        city_fetch_errors.inc(city_name, "air_pollution")
+
+def backoff_delay(attempt: int, factor: float = HTTP_BACKOFF_FACTOR, maximum: float = HTTP_BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(maximum, factor * (2 ** attempt)))
+
+def parse_retry_after(value: Optional[str], maximum: float = HTTP_BACKOFF_MAX) -> Optional[float]:
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date
+
+    Capped at `maximum`, so a server asking for an hour does not stall a sweep.
+    """
+    if not value:
+        return None
+    try:
+        return min(max(0.0, float(value)), maximum)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return min(max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds()), maximum)
+
+class JitteredRetry(Retry):
+    """urllib3 Retry that spreads backoff sleeps with full jitter and caps Retry-After at HTTP_BACKOFF_MAX"""
+
+    def get_backoff_time(self) -> float:
+        base = super().get_backoff_time()
+        return random.uniform(0, base) if base > 0 else 0
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, HTTP_BACKOFF_MAX)
+
+def create_session() -> requests.Session:
+    """Create a pooled keep-alive session that retries transient failures"""
+    retry = JitteredRetry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_max=HTTP_BACKOFF_MAX,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+http_session = create_session()
+
+def timed_get(endpoint: str, url: str, **kwargs) -> requests.Response:
+    """GET through the shared session, recording latency under the endpoint label"""
+    started_at = time.perf_counter()
+    try:
+        return http_session.get(url, **kwargs)
+    finally:
+        fetch_latency.observe(time.perf_counter() - started_at, endpoint)
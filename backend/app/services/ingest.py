@@ -0,0 +1,314 @@
+"""
+Durable ingest queue between fetching and writing measurements.
+
+Collectors hand fetched payloads to IngestQueue.submit(), which appends one
+JSON line per city to an append-only journal and returns once the lines are
+on disk. A single writer thread drains the journal in batches of up to
+INGEST_BATCH_SIZE cities, each written in one transaction. A slow or locked
+database therefore delays persistence, not the next fetch. Database errors,
+while looking up cities or writing, are retried with backoff; only readings
+that fail for another reason (a malformed payload) are dropped.
+
+The sequence number of the last persisted record is committed in the same
+transaction as its rows (the ingest_checkpoint table). So when the journal is
+replayed at start-up, every record not yet in the database is written exactly
+once. Journal segments rotate at INGEST_SEGMENT_BYTES and are deleted once
+all their records are persisted. The queue is bounded: submit() blocks while
+INGEST_QUEUE_MAX_RECORDS records are waiting.
+"""
+import os
+import time
+import logging
+import sqlite3
+import threading
+from collections import deque
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+import orjson
+
+from app.core.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Backoff between attempts to write a batch the database refused
+RETRY_DELAY_INITIAL = 0.5  # seconds
+RETRY_DELAY_MAX = 30.0  # seconds
+
+journal_append_latency = Histogram(
+    "ingest_journal_append_seconds",
+    "Time to append fetched readings to the ingest journal, fsync included",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+)
+records_written = Counter(
+    "ingest_records_written_total",
+    "Journaled readings written to the database"
+)
+records_dropped = Counter(
+    "ingest_records_dropped_total",
+    "Journaled readings that could not be turned into rows or written and were skipped"
+)
+write_retries = Counter(
+    "ingest_write_retries_total",
+    "Batch writes retried after a database error"
+)
+
+class IngestQueue:
+    """Journal of fetched readings drained into the database by one writer thread"""
+
+    def __init__(
+        self,
+        path: Path,
+        prepare: Callable[[List[tuple]], Any],
+        write: Callable[[Any, int], None],
+        read_checkpoint: Callable[[], int],
+        max_records: int = 50000,
+        batch_size: int = 500,
+        segment_bytes: int = 16 * 1024 * 1024,
+        fsync: bool = True
+    ):
+        """
+        `prepare` turns (city_info, current_weather, air_data, collection_timestamp)
+        payloads into a batch once, `write(batch, journal_seq)` persists it together
+        with the checkpoint (and may be retried), `read_checkpoint` returns the last
+        persisted sequence number.
+        """
+        self.path = path
+        self.prepare = prepare
+        self.write = write
+        self.read_checkpoint = read_checkpoint
+        self.max_records = max(max_records, 1)
+        self.batch_size = max(batch_size, 1)
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+
+        self.condition = threading.Condition()
+        self.pending: Deque[Dict[str, Any]] = deque()
+        self.segments: List[Tuple[Path, int]] = []  # closed segments and their last sequence number
+        self.journal = None
+        self.journal_path: Optional[Path] = None
+        self.journal_bytes = 0
+        self.journal_last_seq = 0
+        self.next_seq = 1
+        self.persisted_seq = 0
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Replay records the database has not seen yet and start the writer (again, if it died)"""
+        with self.condition:
+            if self.thread and self.thread.is_alive():
+                # Still draining after a stop() that timed out: carry on with the same state
+                self.running = True
+                return
+            if self.running:
+                logger.error("Ingest writer thread died, restarting it from the journal")
+                self.running = False
+                if self.journal:
+                    self.journal.close()
+                    self.journal = None
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.persisted_seq = self.read_checkpoint()
+            self._replay()
+            self._open_segment()
+            self.running = True
+            self.thread = threading.Thread(target=self._writer_loop, name="ingest-writer", daemon=True)
+            self.thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> bool:
+        """Drain and stop the writer; returns False if records were left for the next start"""
+        with self.condition:
+            if not self.running:
+                return True
+            self.running = False
+            self.condition.notify_all()
+        if self.thread:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                # Still inside a write; it keeps draining and owns `pending` until it returns
+                logger.warning("Ingest writer still busy at shutdown; unwritten readings stay in the journal")
+                return False
+        with self.condition:
+            if self.journal:
+                self.journal.close()
+                self.journal = None
+            if self.pending:
+                logger.warning(f"{len(self.pending)} journaled readings will be written on the next start")
+                self.pending.clear()
+                return False
+        return True
+
+    def _replay(self) -> None:
+        """Load journaled records past the checkpoint, deleting fully persisted segments"""
+        last_seq = self.persisted_seq
+        self.pending.clear()
+        self.segments = []
+        for segment in sorted(self.path.glob("journal-*.jsonl")):
+            segment_last = 0
+            with open(segment, "rb") as journal:
+                for line in journal:
+                    try:
+                        record = orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        # Torn tail of an append interrupted by a crash; submit() never returned for it
+                        logger.warning(f"Skipping an incomplete record at the end of {segment.name}")
+                        continue
+                    segment_last = record["seq"]
+                    if record["seq"] > self.persisted_seq:
+                        self.pending.append(record)
+            if segment_last <= self.persisted_seq:
+                segment.unlink()
+                continue
+            self.segments.append((segment, segment_last))
+            last_seq = max(last_seq, segment_last)
+        self.next_seq = last_seq + 1
+        if self.pending:
+            logger.info(f"Replaying {len(self.pending)} journaled readings not yet in the database")
+
+    def _open_segment(self) -> None:
+        """Start a new segment; replayed segments are never appended to, their tail may be torn"""
+        if self.journal:
+            self.journal.close()
+            self.segments.append((self.journal_path, self.journal_last_seq))
+        self.journal_path = self.path / f"journal-{self.next_seq:012d}.jsonl"
+        self.journal = open(self.journal_path, "ab")
+        self.journal_bytes = 0
+        self.journal_last_seq = self.next_seq - 1
+
+    def submit(self, results: Sequence[Tuple[Dict[str, Any], Dict[str, Any], Optional[Dict[str, Any]]]]) -> None:
+        """Journal fetched (city_info, current_weather, air_data) payloads for the writer"""
+        if not results:
+            return
+        self.start()  # collectors run from scripts too, without the API's lifespan
+
+        collected_at = int(time.time())
+        with self.condition:
+            # Bounded: hold the fetcher back while the writer is too far behind
+            while len(self.pending) >= self.max_records and self.running:
+                self.condition.wait()
+
+            started_at = time.perf_counter()
+            records = []
+            for city_info, current_weather, air_data in results:
+                records.append({
+                    "seq": self.next_seq,
+                    "collected_at": collected_at,
+                    "city": city_info,
+                    "weather": current_weather,
+                    "air": air_data,
+                })
+                self.next_seq += 1
+            data = b"".join(orjson.dumps(record) + b"\n" for record in records)
+            self.journal.write(data)
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            journal_append_latency.observe(time.perf_counter() - started_at)
+
+            self.journal_bytes += len(data)
+            self.journal_last_seq = records[-1]["seq"]
+            if self.journal_bytes >= self.segment_bytes:
+                self._open_segment()
+            self.pending.extend(records)
+            self.condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted record is in the database; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while self.pending and self.running and self.writer_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining)
+            return not self.pending
+
+    def _writer_loop(self) -> None:
+        try:
+            self._drain()
+        except Exception:
+            logger.exception("Ingest writer thread failed; readings stay in the journal until it restarts")
+            with self.condition:
+                self.condition.notify_all()
+
+    def _drain(self) -> None:
+        """Write pending batches until the queue is stopped and empty"""
+        while True:
+            with self.condition:
+                while not self.pending and self.running:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                batch = list(islice(self.pending, self.batch_size))
+
+            if not self._persist(batch):
+                # Stopped while the database kept failing, or the checkpoint could not be written:
+                # the journal still has the batch and start() replays it
+                return
+
+            with self.condition:
+                for _ in batch:
+                    self.pending.popleft()
+                self.persisted_seq = batch[-1]["seq"]
+                for segment, segment_last in [item for item in self.segments if item[1] <= self.persisted_seq]:
+                    segment.unlink(missing_ok=True)
+                    self.segments.remove((segment, segment_last))
+                self.condition.notify_all()
+
+    def _persist(self, batch: List[Dict[str, Any]]) -> bool:
+        """
+        Write one batch, retrying database errors until it lands or the queue stops
+
+        Readings that cannot be turned into rows or written for any other
+        reason are dropped, and only the checkpoint moves past them.
+        """
+        payloads = [(record["city"], record["weather"], record["air"], record["collected_at"]) for record in batch]
+        prepared = None
+        dropped = False
+        delay = RETRY_DELAY_INITIAL
+        while True:
+            try:
+                if prepared is None:
+                    try:
+                        # Prepared once it succeeds: alert evaluation is stateful and must not run again
+                        prepared = self.prepare(payloads)
+                    except sqlite3.Error:
+                        raise  # city lookups hit a busy database; nothing was evaluated yet
+                    except Exception as e:
+                        logger.error(f"Skipping {len(batch)} journaled readings that could not be prepared: {e}")
+                        records_dropped.inc(amount=len(batch))
+                        prepared = self.prepare([])
+                        dropped = True
+                self.write(prepared, batch[-1]["seq"])
+                if not dropped:
+                    records_written.inc(amount=len(batch))
+                return True
+            except sqlite3.Error as e:
+                write_retries.inc()
+                if not self.running:
+                    logger.error(f"Giving up writing {len(batch)} journaled readings on shutdown: {e}")
+                    return False
+                logger.error(f"Error writing {len(batch)} journaled readings, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, RETRY_DELAY_MAX)
+            except Exception as e:
+                if dropped:
+                    # Not even the checkpoint could be written: keep the batch journaled for the next start
+                    logger.error(f"Error advancing the ingest checkpoint past {len(batch)} dropped readings: {e}")
+                    return False
+                # Retrying cannot fix a bad batch: drop it and only move the checkpoint past it
+                logger.error(f"Dropping {len(batch)} journaled readings that could not be written: {e}")
+                records_dropped.inc(amount=len(batch))
+                prepared = self.prepare([])
+                dropped = True
+
+    def writer_alive(self) -> bool:
+        """Whether the writer thread is running (False before start())"""
+        return self.thread is not None and self.thread.is_alive()
+
+    def depth(self) -> int:
+        """Readings journaled but not yet written; logs when nothing is left to write them"""
+        if self.running and not self.writer_alive():
+            logger.error(f"Ingest writer thread is not running with {len(self.pending)} readings waiting")
+        return len(self.pending)
@@ -0,0 +1,105 @@
+"""
+Weather and air pollution readings of several cities in one column-oriented response.
+
+Each weather reading is joined in SQL with the air pollution reading of the
+same city and timestamp through the (city_id, measurement_timestamp) indexes.
+Rows come back grouped by city and transposed into one array per field, so
+every field name and city is sent once rather than once per row, and no
+response model is built per row.
+"""
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.database.cities import city_filter_sql
+from app.database.database import get_db, timed_query
+from app.database.timestamps import to_epoch
+
+# Selectable fields and the columns they are read from
+MEASUREMENT_FIELDS = {
+    "temperature": "w.temperature",
+    "feels_like": "w.feels_like",
+    "humidity": "w.humidity",
+    "pressure": "w.pressure",
+    "wind_speed": "w.wind_speed",
+    "clouds_all": "w.clouds_all",
+    "weather_description": "wc.weather_description",
+    "aqi": "a.aqi",
+    "co": "a.co",
+    "no2": "a.no2",
+    "o3": "a.o3",
+    "so2": "a.so2",
+    "pm2_5": "a.pm2_5",
+    "pm10": "a.pm10",
+}
+
+# Window returned when no start date is given
+DEFAULT_WINDOW = timedelta(hours=24)
+
+def city_rows(cursor, cities: Optional[Sequence[str]], country: Optional[str]) -> Dict[int, tuple]:
+    """city_id -> (name, country) of the requested cities"""
+    params: List[Any] = []
+    cursor.execute(city_filter_sql(cities, country, params, "city_id, name, country"), params)
+    return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+def measurements_sql(fields: Sequence[str], city_count: int) -> str:
+    """Joined readings of the given cities in [start, end], ordered by city and time"""
+    joins = ""
+    if "weather_description" in fields:
+        joins += " LEFT JOIN weather_conditions wc ON w.weather_condition_id = wc.weather_condition_id"
+    if any(MEASUREMENT_FIELDS[field].startswith("a.") for field in fields):
+        # One indexed lookup per weather row; the newest air row wins if a timestamp was stored twice
+        joins += """
+            LEFT JOIN air_pollution_measurements a ON a.air_pollution_id = (
+                SELECT air_pollution_id FROM air_pollution_measurements
+                WHERE city_id = w.city_id AND measurement_timestamp = w.measurement_timestamp
+                ORDER BY air_pollution_id DESC
+                LIMIT 1
+            )
+        """
+    return f"""
+        SELECT w.city_id, w.measurement_timestamp, {", ".join(MEASUREMENT_FIELDS[field] for field in fields)}
+        FROM weather_measurements w
+        {joins}
+        WHERE w.city_id IN ({", ".join("?" * city_count)})
+            AND w.measurement_timestamp >= ? AND w.measurement_timestamp <= ?
+        ORDER BY w.city_id, w.measurement_timestamp
+        LIMIT ?
+    """
+
+def get_measurements(
+    fields: Sequence[str],
+    cities: Optional[Sequence[str]] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    limit: int = 10000
+) -> Dict[str, Any]:
+    """Readings per city as arrays per field; `truncated` is set when `limit` rows were exceeded"""
+    end = end_date or datetime.now()
+    start = start_date or end - DEFAULT_WINDOW
+    result: Dict[str, Any] = {"fields": list(fields), "truncated": False, "cities": []}
+
+    with get_db() as conn, timed_query("measurements_columnar"):
+        cursor = conn.cursor()
+        names = city_rows(cursor, cities, country)
+        if not names:
+            return result
+        cursor.execute(measurements_sql(fields, len(names)), [*names, to_epoch(start), to_epoch(end), limit + 1])
+        rows = cursor.fetchall()
+
+    if len(rows) > limit:
+        result["truncated"] = True
+        rows = rows[:limit]
+
+    for city_id, city_group in groupby(rows, key=itemgetter(0)):
+        columns = list(zip(*city_group))
+        name, city_country = names[city_id]
+        result["cities"].append({
+            "city": name,
+            "country": city_country,
+            "timestamp": list(columns[1]),
+            "columns": {field: list(values) for field, values in zip(fields, columns[2:])},
+        })
+    return result
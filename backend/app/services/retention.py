@@ -0,0 +1,178 @@
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import response_cache
+from app.core.config import (
+    ARCHIVE_ENABLED,
+    RAW_RETENTION_DAYS,
+    HOURLY_RETENTION_DAYS,
+    RETENTION_BATCH_SIZE,
+    VACUUM_PAGES_PER_STEP
+)
+from app.core.metrics import Counter
+from app.database.database import get_write_db
+from app.database.rollups import ROLLUP_TIERS, RollupSpec
+from app.database.timestamps import to_epoch, to_local
+
+logger = logging.getLogger(__name__)
+
+rows_deleted = Counter(
+    "retention_rows_deleted_total",
+    "Rows removed from a table by the retention job",
+    ["table"]
+)
+
+def raw_cutoff(now: Optional[datetime] = None) -> Optional[int]:
+    """Oldest measurement timestamp (epoch) kept in the raw tables, or None to keep everything"""
+    if RAW_RETENTION_DAYS <= 0:
+        return None
+    return to_epoch((now or datetime.now()) - timedelta(days=RAW_RETENTION_DAYS))
+
+def hourly_cutoff(now: Optional[datetime] = None) -> Optional[str]:
+    """Oldest day kept in the hourly rollups, or None to keep everything"""
+    if HOURLY_RETENTION_DAYS <= 0:
+        return None
+    # Hourly buckets back the raw-less range, so they never expire before raw rows do
+    days = max(HOURLY_RETENTION_DAYS, RAW_RETENTION_DAYS)
+    return to_local((now or datetime.now()) - timedelta(days=days)).strftime("%Y-%m-%dT00:00:00")
+
+def raw_covers(start_date: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    """Whether the raw tables still hold every measurement from start_date on"""
+    cutoff = raw_cutoff(now)
+    return cutoff is None or (start_date is not None and to_epoch(start_date) >= cutoff)
+
+def delete_expired_rows(
+    table: str,
+    cutoff: int,
+    batch_size: int = RETENTION_BATCH_SIZE,
+    max_rowid: Optional[int] = None
+) -> int:
+    """
+    Delete raw rows measured before the cutoff, one bounded batch per transaction
+
+    The rows are already folded into the hourly rollups at ingest. Releasing
+    the writer between batches lets collection sweeps interleave. With
+    `max_rowid`, rows inserted after it (not archived yet) are kept.
+    """
+    condition = "measurement_timestamp < ?"
+    params: List[Any] = [cutoff]
+    if max_rowid is not None:
+        condition += " AND rowid <= ?"
+        params.append(max_rowid)
+    deleted = 0
+    while True:
+        with get_write_db() as conn:
+            try:
+                cursor = conn.execute(
+                    f"""
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {condition} LIMIT ?
+                    )
+                    """,
+                    (*params, batch_size)
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        deleted += cursor.rowcount
+        rows_deleted.inc(table, amount=cursor.rowcount)
+        if cursor.rowcount < batch_size:
+            return deleted
+
+def compact_rollups(hourly: RollupSpec, daily: RollupSpec, cutoff: str) -> int:
+    """Fold hourly buckets older than the cutoff into daily buckets, one day per transaction"""
+    compacted = 0
+    while True:
+        with get_write_db() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(
+                    f"SELECT MIN({hourly.bucket_column}) FROM {hourly.rollup_table} WHERE {hourly.bucket_column} < ?",
+                    (cutoff,)
+                )
+                oldest = cursor.fetchone()[0]
+                if oldest is None:
+                    return compacted
+
+                day_start = datetime.fromisoformat(oldest[:10])
+                window = (day_start.isoformat(), (day_start + timedelta(days=1)).isoformat())
+                cursor.execute(hourly.compact_sql(daily), window)
+                cursor.execute(
+                    f"DELETE FROM {hourly.rollup_table} WHERE {hourly.bucket_column} >= ? AND {hourly.bucket_column} < ?",
+                    window
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        compacted += cursor.rowcount
+        rows_deleted.inc(hourly.rollup_table, amount=cursor.rowcount)
+
+def incremental_vacuum(pages_per_step: int = VACUUM_PAGES_PER_STEP) -> int:
+    """Return free pages to the filesystem in small steps; needs auto_vacuum = INCREMENTAL"""
+    released = 0
+    while True:
+        with get_write_db() as conn:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                logger.warning("auto_vacuum is not INCREMENTAL, run init_db to convert the database")
+                return released
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages == 0:
+                return released
+            step = min(free_pages, pages_per_step)
+            # sqlite3 steps the pragma only once per execute, which releases a single page
+            conn.execute("BEGIN")
+            try:
+                for _ in range(step):
+                    conn.execute("PRAGMA incremental_vacuum(1)")
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        released += step
+
+def run_retention(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Apply the retention policy to every tier and reclaim the freed space"""
+    summary: Dict[str, Any] = {"raw_rows_deleted": {}, "hourly_buckets_compacted": {}}
+
+    cutoff = raw_cutoff(now)
+    if cutoff:
+        table_cutoffs = {hourly.source_table: (cutoff, None) for hourly, _ in ROLLUP_TIERS}
+        if ARCHIVE_ENABLED:
+            # Imported here so the API runs without pyarrow when archiving is off
+            from app.services.archive import ARCHIVE_DATASETS, archived_until, export_archive, exported_through
+
+            # Closed months reach the archive before their raw rows are deleted, and
+            # nothing newer than the archive is deleted, neither by time nor rows
+            # inserted since the export; a failed export aborts the run
+            summary["months_archived"] = {}
+            for dataset, (table, _) in ARCHIVE_DATASETS.items():
+                summary["months_archived"][dataset] = len(export_archive(dataset, now))
+                boundary = archived_until(dataset)
+                table_cutoffs[table] = (min(cutoff, to_epoch(boundary)), exported_through(dataset)) if boundary else (None, None)
+
+        for table, (table_cutoff, max_rowid) in table_cutoffs.items():
+            if table_cutoff:
+                summary["raw_rows_deleted"][table] = delete_expired_rows(table, table_cutoff, max_rowid=max_rowid)
+
+    cutoff = hourly_cutoff(now)
+    if cutoff:
+        for hourly, daily in ROLLUP_TIERS:
+            summary["hourly_buckets_compacted"][hourly.rollup_table] = compact_rollups(hourly, daily, cutoff)
+
+    summary["pages_released"] = incremental_vacuum()
+
+    # Responses built over the removed rows are stale
+    response_cache.invalidate()
+    logger.info(f"Retention run finished: {summary}")
+    return summary
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+    run_retention()
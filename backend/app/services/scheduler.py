@@ -0,0 +1,199 @@
+"""
+Per-city collection schedule.
+
+Rather than collecting every city at once and idling for the rest of the
+interval, each city gets its own due time. Cities start evenly spaced across
+their interval (COLLECTION_INTERVAL, or the city's `collection_interval`),
+highest priority first. Each collection advances the city's anchor by whole
+intervals and adds a random offset of up to COLLECTION_JITTER of the spacing
+between cities, so requests and writes arrive as a steady trickle and the
+offsets never accumulate into drift. Cities due within COLLECTION_BATCH_WINDOW
+of each other are collected together and share one transaction.
+
+A sliding one-minute budget (OPENWEATHER_CALLS_PER_MINUTE) holds cities back
+instead of running into OpenWeather's per-minute limit. When it cannot cover
+everything that is due, higher priority cities go first.
+
+Methods take the current time, so a schedule can be replayed on a simulated
+clock (see benchmarks/bench_scheduler.py). The schedule is not thread-safe;
+CollectorService guards it with a lock.
+"""
+import heapq
+import random
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple
+
+# OpenWeather calls per collected city: current weather and air pollution
+CALLS_PER_CITY = 2
+
+class ScheduledCity:
+    """A city and its place in the schedule"""
+
+    def __init__(self, city: Dict[str, Any], anchor: float):
+        self.city = city
+        self.anchor = anchor  # un-jittered due time
+        self.due = anchor
+
+class CollectionSchedule:
+    """Due times of the tracked cities, earliest first"""
+
+    def __init__(
+        self,
+        interval: float,
+        jitter: float = 0.25,
+        batch_window: float = 5,
+        calls_per_minute: int = 0,
+        rng: Optional[random.Random] = None
+    ):
+        if 0 < calls_per_minute < CALLS_PER_CITY:
+            # A city could never be collected within the budget
+            raise ValueError(f"OPENWEATHER_CALLS_PER_MINUTE must be 0 (no budget) or at least {CALLS_PER_CITY}")
+        self.interval = interval
+        self.jitter = jitter
+        self.batch_window = batch_window
+        self.calls_per_minute = calls_per_minute
+        self.rng = rng or random.Random()
+        self.entries: Dict[int, ScheduledCity] = {}
+        self.heap: List[Tuple[float, int, int]] = []  # (due, -priority, city_id)
+        self.in_flight: Set[int] = set()  # taken and not yet completed or retried
+        self.calls: Deque[float] = deque()  # times of the calls in the last minute
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def city_interval(self, city: Dict[str, Any]) -> float:
+        return city.get("collection_interval") or self.interval
+
+    def _place(self, entry: ScheduledCity, anchor: float, now: float) -> None:
+        """Set a city's anchor and jittered due time (never in the past)"""
+        spacing = self.city_interval(entry.city) / max(len(self.entries), 1)
+        entry.anchor = anchor
+        entry.due = max(anchor + self.rng.uniform(-self.jitter, self.jitter) * spacing, now)
+
+    def _rebuild(self) -> None:
+        self.heap = [
+            (entry.due, -(entry.city.get("priority") or 0), city_id)
+            for city_id, entry in self.entries.items() if city_id not in self.in_flight
+        ]
+        heapq.heapify(self.heap)
+
+    def _rescale(self, entry: ScheduledCity, old_interval: float, now: float) -> None:
+        """Keep a city's progress through its interval when the interval changes"""
+        remaining = min(max(entry.anchor - now, 0), old_interval)
+        self._place(entry, now + remaining * self.city_interval(entry.city) / old_interval, now)
+
+    def sync(self, cities: Sequence[Dict[str, Any]], now: float) -> None:
+        """
+        Track exactly `cities`
+
+        On the first sync cities are spread across their interval. Cities
+        added later are due at once, cities no longer listed are dropped and
+        changed intervals take effect immediately.
+        """
+        first = not self.entries
+        current = {city["city_id"]: city for city in cities}
+        for city_id in [city_id for city_id in self.entries if city_id not in current]:
+            del self.entries[city_id]
+
+        for city_id, entry in self.entries.items():
+            old_interval = self.city_interval(entry.city)
+            entry.city = current[city_id]
+            if self.city_interval(entry.city) != old_interval:
+                self._rescale(entry, old_interval, now)
+
+        added = sorted(
+            (city for city_id, city in current.items() if city_id not in self.entries),
+            key=lambda city: (-(city.get("priority") or 0), city["city_id"])
+        )
+        for city in added:
+            self.entries[city["city_id"]] = ScheduledCity(city, now)
+        for index, city in enumerate(added):
+            offset = index / len(added) * self.city_interval(city) if first else 0
+            self._place(self.entries[city["city_id"]], now + offset, now)
+        self._rebuild()
+
+    def set_interval(self, interval: float, now: float) -> None:
+        """Change the default interval, rescaling the pending wait of cities without an override"""
+        old_interval = self.interval
+        self.interval = interval
+        for entry in self.entries.values():
+            if not entry.city.get("collection_interval"):
+                self._rescale(entry, old_interval, now)
+        self._rebuild()
+
+    def _calls_available(self, now: float) -> Optional[int]:
+        """Calls left in the sliding minute (None without a budget)"""
+        if self.calls_per_minute <= 0:
+            return None
+        while self.calls and self.calls[0] <= now - 60:
+            self.calls.popleft()
+        return max(self.calls_per_minute - len(self.calls), 0)
+
+    def wait_time(self, now: float) -> Optional[float]:
+        """Seconds until the next batch can start (None when nothing is scheduled)"""
+        if not self.heap:
+            return None
+        wait = self.heap[0][0] - now
+        available = self._calls_available(now)
+        if available is not None and available < CALLS_PER_CITY:
+            # Until enough of the oldest calls leave the window
+            needed = min(CALLS_PER_CITY - available, len(self.calls))
+            wait = max(wait, self.calls[needed - 1] + 60 - now)
+        return max(wait, 0.0)
+
+    def take_due(self, now: float) -> Tuple[List[Dict[str, Any]], float]:
+        """
+        Remove and return the cities due by now + batch_window that the budget allows
+
+        Also returns how late the earliest of them is. The cities are back in
+        the schedule once passed to complete() or retry().
+        """
+        due = []
+        while self.heap and self.heap[0][0] <= now + self.batch_window:
+            due.append(heapq.heappop(self.heap))
+        if not due:
+            return [], 0.0
+
+        available = self._calls_available(now)
+        if available is not None and len(due) * CALLS_PER_CITY > available:
+            due.sort(key=lambda item: (item[1], item[0]))
+            for item in due[available // CALLS_PER_CITY:]:
+                heapq.heappush(self.heap, item)
+            due = due[:available // CALLS_PER_CITY]
+            if not due:
+                return [], 0.0
+
+        if available is not None:
+            self.calls.extend([now] * (len(due) * CALLS_PER_CITY))
+        self.in_flight.update(item[2] for item in due)
+        return [self.entries[item[2]].city for item in due], max(now - min(item[0] for item in due), 0.0)
+
+    def _push(self, entry: ScheduledCity) -> None:
+        heapq.heappush(self.heap, (entry.due, -(entry.city.get("priority") or 0), entry.city["city_id"]))
+
+    def complete(self, cities: Sequence[Dict[str, Any]], now: float) -> None:
+        """Schedule the next run of collected cities one interval after their anchor"""
+        for city in cities:
+            self.in_flight.discard(city["city_id"])
+            entry = self.entries.get(city["city_id"])
+            if entry is None:
+                continue  # removed while it was being collected
+            interval = self.city_interval(entry.city)
+            anchor = entry.anchor + interval
+            if anchor <= now:
+                # Skip the runs missed while behind instead of bursting to catch up
+                anchor += (now - anchor) // interval * interval + interval
+            self._place(entry, anchor, now)
+            self._push(entry)
+
+    def retry(self, cities: Sequence[Dict[str, Any]], now: float, delay: float) -> None:
+        """Put cities of a failed batch back, due again after `delay`"""
+        for city in cities:
+            self.in_flight.discard(city["city_id"])
+            entry = self.entries.get(city["city_id"])
+            if entry is not None:
+                entry.due = now + delay
+                self._push(entry)
+
+    def next_due(self) -> Optional[float]:
+        return self.heap[0][0] if self.heap else None
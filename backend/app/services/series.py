@@ -0,0 +1,194 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.database.cities import city_filter_sql
+from app.database.database import get_db, timed_query
+from app.database.timestamps import local_epoch_sql, to_epoch, to_local
+from app.database.rollups import RollupSpec, WEATHER_ROLLUP, WEATHER_DAILY_ROLLUP, AIR_POLLUTION_ROLLUP, AIR_POLLUTION_DAILY_ROLLUP
+from app.services.retention import raw_covers
+
+# Supported bucket sizes in seconds
+BUCKETS = {
+    "5m": 5 * 60,
+    "1h": 60 * 60,
+    "1d": 24 * 60 * 60,
+}
+
+# Numeric columns that can be downsampled, per dataset
+SERIES_DATASETS = {
+    "weather": ("weather_measurements", [
+        "temperature", "feels_like", "temp_min", "temp_max", "pressure", "humidity",
+        "sea_level", "ground_level", "visibility", "wind_speed", "wind_degree", "wind_gust",
+        "clouds_all", "rain_1h", "rain_3h", "snow_1h", "snow_3h",
+    ]),
+    "air-pollution": ("air_pollution_measurements", [
+        "aqi", "co", "no", "no2", "o3", "so2", "pm2_5", "pm10", "nh3",
+    ]),
+}
+
+# Window returned when no start date is given, so a chart never pulls all retained history
+DEFAULT_WINDOW = timedelta(days=30)
+
+# (hourly, daily) rollups serving ranges older than raw retention, per dataset
+SERIES_ROLLUPS = {
+    "weather": (WEATHER_ROLLUP, WEATHER_DAILY_ROLLUP),
+    "air-pollution": (AIR_POLLUTION_ROLLUP, AIR_POLLUTION_DAILY_ROLLUP),
+}
+
+def city_condition_sql(city: Optional[str], country: Optional[str], params: list) -> str:
+    """Condition restricting city_id to the matching cities"""
+    if not (city or country):
+        return ""
+    return f" AND city_id IN ({city_filter_sql(city, country, params)})"
+
+def raw_bucket_sql(
+    table: str,
+    column: str,
+    bucket_seconds: int,
+    city: Optional[str],
+    country: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    params: list
+) -> str:
+    """Per-measurement rows of one column, tagged with their bucket"""
+    # Buckets follow local wall-clock time, like the timestamps the API returns
+    bucket_expr = f"{local_epoch_sql('measurement_timestamp')} / {bucket_seconds} * {bucket_seconds}"
+    query = f"""
+        SELECT
+            city_id,
+            {bucket_expr} AS bucket,
+            {column} AS min_value,
+            {column} AS max_value,
+            {column} AS sum_value,
+            {column} IS NOT NULL AS value_count,
+            FIRST_VALUE({column}) OVER (
+                PARTITION BY city_id, {bucket_expr}
+                ORDER BY measurement_timestamp DESC
+            ) AS last_value
+        FROM {table}
+        WHERE 1=1
+    """
+    query += city_condition_sql(city, country, params)
+    if start_date:
+        query += " AND measurement_timestamp >= ?"
+        params.append(to_epoch(start_date))
+    if end_date:
+        query += " AND measurement_timestamp <= ?"
+        params.append(to_epoch(end_date))
+    return query
+
+def rollup_bucket_sql(
+    tiers: List[RollupSpec],
+    column: str,
+    bucket_seconds: int,
+    city: Optional[str],
+    country: Optional[str],
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    params: list
+) -> str:
+    """Pre-aggregated rollup rows of one column, tagged with their bucket"""
+    tier_queries = []
+    for spec in tiers:
+        tier_query = f"""
+            SELECT
+                city_id,
+                {spec.bucket_column} AS bucket_start,
+                {column}_min AS min_value,
+                {column}_max AS max_value,
+                {column}_sum AS sum_value,
+                {column}_count AS value_count,
+                {column}_last AS last_value,
+                last_measurement_timestamp
+            FROM {spec.rollup_table}
+            WHERE 1=1
+        """
+        tier_query += city_condition_sql(city, country, params)
+        if start_date:
+            # Rollup rows are whole local-time buckets, so include the one containing start_date
+            tier_query += f" AND {spec.bucket_column} >= ?"
+            params.append(to_local(start_date).strftime(spec.bucket_format))
+        if end_date:
+            tier_query += f" AND {spec.bucket_column} <= ?"
+            params.append(to_local(end_date).isoformat())
+        tier_queries.append(tier_query)
+
+    bucket_expr = f"CAST(strftime('%s', bucket_start) AS INTEGER) / {bucket_seconds} * {bucket_seconds}"
+    return f"""
+        SELECT
+            city_id,
+            {bucket_expr} AS bucket,
+            min_value, max_value, sum_value, value_count,
+            FIRST_VALUE(last_value) OVER (
+                PARTITION BY city_id, {bucket_expr}
+                ORDER BY last_measurement_timestamp DESC
+            ) AS last_value
+        FROM ({" UNION ALL ".join(tier_queries)})
+    """
+
+def get_series(
+    dataset: str,
+    column: str,
+    bucket: str,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Downsample a numeric column into per-city time buckets (min/max/avg/last) in SQL
+
+    Ranges the raw tables still cover are bucketed from raw rows. Older ranges
+    are served from the hourly and daily rollups where the bucket allows it.
+    Without start_date the series covers the DEFAULT_WINDOW before end_date (or now).
+    """
+    table, columns = SERIES_DATASETS[dataset]
+    if column not in columns:
+        raise ValueError(f"Unknown column '{column}'. Available: {', '.join(columns)}")
+    bucket_seconds = BUCKETS[bucket]
+    hourly, daily = SERIES_ROLLUPS[dataset]
+    start_date = start_date or (end_date or datetime.now()) - DEFAULT_WINDOW
+
+    params = []
+    if bucket != "5m" and column in hourly.columns and not raw_covers(start_date):
+        # Daily buckets cannot be split, so they only serve daily series
+        tiers = [hourly, daily] if bucket == "1d" else [hourly]
+        source = rollup_bucket_sql(tiers, column, bucket_seconds, city, country, start_date, end_date, params)
+        source_name = f"series_{hourly.rollup_table}"
+    else:
+        source = raw_bucket_sql(table, column, bucket_seconds, city, country, start_date, end_date, params)
+        source_name = f"series_{table}"
+
+    query = f"""
+        SELECT
+            c.name, c.country,
+            strftime('%Y-%m-%dT%H:%M:%S', b.bucket, 'unixepoch') AS bucket_start,
+            MIN(b.min_value), MAX(b.max_value), TOTAL(b.sum_value) / SUM(b.value_count),
+            MAX(b.last_value), SUM(b.value_count)
+        FROM ({source}) b
+        JOIN cities c ON b.city_id = c.city_id
+        GROUP BY b.city_id, b.bucket
+        ORDER BY b.city_id, b.bucket
+    """
+
+    with get_db() as conn, timed_query(source_name):
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        results = cursor.fetchall()
+
+    series = []
+    current = None
+    for row in results:
+        if current is None or current["city"] != row[0] or current["country"] != row[1]:
+            current = {"city": row[0], "country": row[1], "points": []}
+            series.append(current)
+        current["points"].append({
+            "bucket_start": row[2],
+            "min": row[3],
+            "max": row[4],
+            "avg": row[5],
+            "last": row[6],
+            "count": row[7],
+        })
+    return series
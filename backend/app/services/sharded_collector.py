@@ -0,0 +1,144 @@
+"""
+Collection sweeps sharded across worker processes.
+
+The active cities are split into COLLECTOR_WORKERS shards that are pinned in
+the cities table (see app.database.cities.assign_shards). Each worker
+process fetches its shard with the asyncio engine, using its own
+COLLECTION_CONCURRENCY and an equal share of COLLECTION_RATE_LIMIT, and
+returns the raw responses. This process stays the only writer. It saves
+each shard in one transaction as soon as the shard returns, so alert rules
+and the latest, rollup and forecast state still see every reading. Workers
+also return the fetch metrics they recorded, which are merged into this
+process's /metrics.
+"""
+import asyncio
+import time
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import (
+    COLLECTOR_WORKERS,
+    COLLECTION_CONCURRENCY,
+    COLLECTION_RATE_LIMIT,
+    COLLECTION_RATE_BURST
+)
+from app.core.metrics import Metric
+from app.database.cities import assign_shards
+from app.services.async_collector import fetch_all_cities
+from app.services.collector import save_batch
+from app.services.http_client import fetch_latency, city_fetch_latency, city_fetch_errors
+
+logger = logging.getLogger(__name__)
+
+# Metrics recorded while fetching, shipped back from the workers
+FETCH_METRICS: Dict[str, Metric] = {
+    metric.name: metric for metric in (fetch_latency, city_fetch_latency, city_fetch_errors)
+}
+
+def fetch_shard(
+    cities: List[Dict[str, Any]],
+    concurrency: int,
+    rate_limit: float,
+    rate_burst: int
+) -> Tuple[List[tuple], Dict[str, Any]]:
+    """Fetch one shard in a worker process; returns its results and the metrics recorded"""
+    results = asyncio.run(fetch_all_cities(cities, concurrency, rate_limit, rate_burst))
+    return results, {name: metric.drain() for name, metric in FETCH_METRICS.items()}
+
+class ShardedCollector:
+    """Process pool kept across sweeps, one worker per shard"""
+
+    def __init__(self, workers: int = COLLECTOR_WORKERS):
+        self.workers = max(workers, 1)
+        self.executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self.executor is None:
+            # Spawned rather than forked: the parent runs the API's threads and database pools
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self.executor
+
+    def shutdown(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def _group(self, cities: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split given cities by their stored shard, pinning the ones without a valid shard first"""
+        shards: List[List[Dict[str, Any]]] = [[] for _ in range(self.workers)]
+        unpinned = []
+        for city in cities:
+            shard = city.get("shard")
+            if shard is not None and 0 <= shard < self.workers:
+                shards[shard].append(city)
+            else:
+                unpinned.append(city)
+        if unpinned:
+            pinned = {
+                city["city_id"]: index
+                for index, shard in enumerate(assign_shards(self.workers)) for city in shard
+            }
+            for city in unpinned:
+                # Cities that are not active in the database go to the smallest shard
+                shard = pinned.get(city.get("city_id"))
+                if shard is None:
+                    shard = min(range(self.workers), key=lambda index: len(shards[index]))
+                shards[shard].append(city)
+        return shards
+
+    def collect(self, cities: Optional[List[Dict[str, Any]]] = None) -> int:
+        """Run one sweep; returns the number of cities fetched successfully"""
+        shards = assign_shards(self.workers) if cities is None else self._group(cities)
+
+        pool = self._pool()
+        futures: Dict[Future, int] = {
+            pool.submit(
+                fetch_shard, shard, COLLECTION_CONCURRENCY,
+                COLLECTION_RATE_LIMIT / self.workers, max(COLLECTION_RATE_BURST // self.workers, 1)
+            ): index
+            for index, shard in enumerate(shards) if shard
+        }
+
+        fetched_total = 0
+        for future in as_completed(futures):
+            shard = futures[future]
+            try:
+                results, metrics = future.result()
+            except BrokenProcessPool as e:
+                logger.error(f"Collector worker pool broke while fetching shard {shard}: {e}")
+                self.shutdown()
+                continue
+            except Exception as e:
+                logger.error(f"Error fetching shard {shard}: {e}")
+                continue
+
+            for name, drained in metrics.items():
+                FETCH_METRICS[name].merge(drained)
+
+            fetched = []
+            for city_info, current_weather, air_data in results:
+                if current_weather:
+                    fetched.append((city_info, current_weather, air_data))
+                else:
+                    logger.error(f"Failed to collect weather data for {city_info['name']}")
+            save_batch(fetched)
+            fetched_total += len(fetched)
+        return fetched_total
+
+sharded_collector = ShardedCollector()
+
+def collect_data_for_all_cities_sharded(cities: Optional[List[Dict[str, Any]]] = None) -> None:
+    """Collect data for all cities (defaults to the active cities in the database) across worker processes"""
+    started_at = time.monotonic()
+    logger.info(f"Starting sharded data collection at {datetime.now().isoformat()} ({sharded_collector.workers} workers)")
+
+    fetched = sharded_collector.collect(cities)
+
+    logger.info(
+        f"Sharded data collection completed at {datetime.now().isoformat()} "
+        f"({fetched} cities in {time.monotonic() - started_at:.2f}s)"
+    )
@@ -0,0 +1,87 @@
+"""
+Per-reading cost of the ingest alert rules.
+
+Feeds random-walk readings for `--cities` cities through the rule engine one
+sweep at a time, with the default rules repeated `--rule-copies` times, and
+reports the evaluation time per reading and per rule:
+
+    python -m benchmarks.bench_alerts --cities 200 --sweeps 500 --rule-copies 1 4 16
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+# Field, start, step and lower bound of each random walk
+WALKS = [
+    ("temp", 15.0, 0.8, -30.0),
+    ("humidity", 70.0, 4.0, 5.0),
+    ("wind_speed", 3.0, 0.6, 0.0),
+    ("pm2_5", 12.0, 2.5, 0.5),
+    ("no2", 30.0, 6.0, 0.5),
+    ("o3", 60.0, 8.0, 0.5),
+]
+
+def readings(cities: int, sweeps: int, seed: int) -> List[List[Dict[str, Any]]]:
+    """Sweeps of one extracted record per city"""
+    rng = random.Random(seed)
+    state = [{field: start for field, start, _, _ in WALKS} for _ in range(cities)]
+    result = []
+    for sweep in range(sweeps):
+        records = []
+        for values in state:
+            for field, _, step, floor in WALKS:
+                values[field] = max(floor, values[field] + rng.gauss(0, step))
+            aqi = min(5, 1 + int(values["pm2_5"] // 12))
+            records.append({**values, "aqi": aqi, "measurement_timestamp": 1_700_000_000 + sweep * 3600})
+        result.append(records)
+    return result
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    configure_environment()
+
+    from app.core.alert_rules import DEFAULT_ALERT_RULES
+    from app.services.alerts import AlertEngine
+
+    sweeps = readings(args.cities, args.sweeps, args.seed)
+    results: Dict[str, Any] = {"cities": args.cities, "sweeps": args.sweeps, "rule_sets": {}}
+    for copies in args.rule_copies:
+        rules = [
+            {**rule, "name": f"{rule['name']}_{copy}"}
+            for copy in range(copies) for rule in DEFAULT_ALERT_RULES
+        ]
+        engine = AlertEngine(rules)
+        latencies = []
+        fired = 0
+        for records in sweeps:
+            for city_id, record in enumerate(records):
+                started_at = time.perf_counter()
+                fired += len(engine.evaluate(city_id, record, 0))
+                latencies.append(time.perf_counter() - started_at)
+
+        stats = summarize(latencies)
+        stats["rules"] = len(rules)
+        stats["us_per_rule"] = round(stats["mean_ms"] * 1000 / len(rules), 3)
+        stats["alerts_fired"] = fired
+        results["rule_sets"][len(rules)] = stats
+        print(
+            f"{len(rules)} rules: {stats['mean_ms'] * 1000:.1f} us per reading "
+            f"({stats['us_per_rule']} us per rule), {fired} alerts"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the ingest alert rules")
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--sweeps", type=int, default=500)
+    parser.add_argument("--rule-copies", type=int, nargs="+", default=[1, 4, 16], help="times the default rules are repeated")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_alerts", results, args.label, args.output)
@@ -0,0 +1,75 @@
+"""
+Latency of the weather-pollution analytics over a synthetic history.
+
+Times the one-off load of the aligned history, the incremental refresh that
+follows a sweep, and each analysis on the loaded frame:
+
+    python -m benchmarks.bench_analytics --cities 20 --years 1
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+def time_call(run: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    latencies = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started_at)
+    return summarize(latencies)
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp())
+    db_path = workdir / "analytics.db"
+    configure_environment(db_path)
+
+    from benchmarks.synthetic_data import generate_dataset
+    from app.services.analytics import aligned_history, correlation_matrix, conditional_statistics
+
+    summary = generate_dataset(db_path, args.cities, args.years, args.interval)
+
+    started_at = time.perf_counter()
+    frame = aligned_history.refresh()
+    load_seconds = round(time.perf_counter() - started_at, 3)
+
+    scenarios = {
+        "refresh_without_new_rows": aligned_history.refresh,
+        "correlations_pearson": lambda: correlation_matrix("pearson"),
+        "correlations_spearman": lambda: correlation_matrix("spearman"),
+        "conditional_humidity_pm2_5": lambda: conditional_statistics("humidity", "pm2_5"),
+        "conditional_wind_speed_no2_one_city": lambda: conditional_statistics("wind_speed", "no2", city_ids=[1]),
+    }
+    results: Dict[str, Any] = {
+        "cities": args.cities,
+        "years": args.years,
+        "rows_per_table": summary["rows_per_table"],
+        "aligned_rows": len(frame),
+        "iterations": args.iterations,
+        "load_seconds": load_seconds,
+        "scenarios": {},
+    }
+    print(f"Loaded {len(frame)} aligned rows in {load_seconds}s")
+    for name, scenario in scenarios.items():
+        results["scenarios"][name] = time_call(scenario, args.iterations)
+        print(f"{name}: p50 {results['scenarios'][name]['p50_ms']} ms")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the weather-pollution analytics")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=60, help="minutes between measurements")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_analytics", results, args.label, args.output)
@@ -0,0 +1,98 @@
+"""
+Latency and throughput of every read endpoint against a benchmark database.
+
+Runs the FastAPI app in-process (TestClient) so only the app itself is
+measured. Each endpoint is timed with the response cache bypassed (database
+path) and warm (cache path):
+
+    python -m benchmarks.synthetic_data --db data/benchmark.db --cities 20 --years 1
+    python -m benchmarks.bench_api --db data/benchmark.db --iterations 50
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+ENDPOINTS = [
+    "/health",
+    "/api/v1/weather?limit=1000",
+    "/api/v1/weather?city=Paris&limit=1000",
+    "/api/v1/weather?city=Paris&fields=temperature,humidity&limit=1000",
+    "/api/v1/air-pollution?limit=1000",
+    "/api/v1/air-pollution?city=Paris&limit=1000",
+    "/api/v1/weather/series?column=temperature&bucket=1d",
+    "/api/v1/weather/series?column=temperature&bucket=1h&city=Paris",
+    "/api/v1/air-pollution/series?column=pm2_5&bucket=1d",
+    "/api/v1/statistics?days=7",
+    "/api/v1/statistics?days=30",
+    "/api/v1/export/weather?city=Paris&format=ndjson",
+    "/api/v1/export/air-pollution?city=Paris&format=csv",
+    "/api/v1/collector/status",
+    "/api/v1/database/pool",
+    "/",
+]
+
+def bench_endpoint(client, endpoint: str, iterations: int, bust_cache: bool) -> Dict[str, Any]:
+    """Time `iterations` sequential GETs of one endpoint"""
+    latencies: List[float] = []
+    errors = 0
+    response_bytes = 0
+    for iteration in range(iterations):
+        url = endpoint
+        if bust_cache:
+            url += ("&" if "?" in url else "?") + f"_={iteration}-{time.perf_counter_ns()}"
+        started_at = time.perf_counter()
+        response = client.get(url)
+        body = response.content
+        elapsed = time.perf_counter() - started_at
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        latencies.append(elapsed)
+        response_bytes = len(body)
+
+    summary = summarize(latencies, errors)
+    summary["response_bytes"] = response_bytes
+    return summary
+
+def run(db_path: Path, iterations: int, endpoints: List[str]) -> Dict[str, Any]:
+    """Benchmark each endpoint uncached and cached"""
+    configure_environment(db_path)
+    from fastapi.testclient import TestClient
+    from app.api.app import app
+
+    results: Dict[str, Any] = {
+        "db_path": str(db_path),
+        "db_size_bytes": db_path.stat().st_size,
+        "iterations": iterations,
+        "endpoints": {},
+    }
+    with TestClient(app) as client:
+        for endpoint in endpoints:
+            results["endpoints"][endpoint] = {
+                "uncached": bench_endpoint(client, endpoint, iterations, bust_cache=True),
+                "cached": bench_endpoint(client, endpoint, iterations, bust_cache=False),
+            }
+            uncached = results["endpoints"][endpoint]["uncached"]
+            cached = results["endpoints"][endpoint]["cached"]
+            print(
+                f"{endpoint}: uncached p50 {uncached['p50_ms']} ms / p99 {uncached['p99_ms']} ms, "
+                f"cached p50 {cached['p50_ms']} ms, {uncached['response_bytes']} bytes"
+            )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API endpoints in-process")
+    parser.add_argument("--db", type=Path, default=Path("data/benchmark.db"))
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    parser.add_argument("endpoints", nargs="*", default=ENDPOINTS)
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        parser.error(f"{args.db} does not exist, generate it with benchmarks.synthetic_data first")
+    results = run(args.db, args.iterations, args.endpoints)
+    save_results("bench_api", results, args.label, args.output)
@@ -0,0 +1,121 @@
+"""
+Full-history reads from the Parquet archive against pandas reads from SQLite.
+
+Generates a synthetic history, archives all of it, then times the same
+projections both ways:
+
+    python -m benchmarks.bench_archive --cities 20 --years 1
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+# (dataset, table, projected columns) read by every scenario
+PROJECTION = ("air-pollution", "air_pollution_measurements", ["pm2_5", "no2"])
+
+STREAM_BATCH_SIZE = 65536
+
+def measure(run: Callable[[], Any], iterations: int) -> Tuple[Dict[str, Any], Any]:
+    """Latency summary of a scenario, plus the result of its last run"""
+    latencies = []
+    result = None
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        result = run()
+        latencies.append(time.perf_counter() - started_at)
+    return summarize(latencies), result
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp())
+    db_path = workdir / "archive.db"
+    configure_environment(db_path)
+    os.environ["ARCHIVE_PATH"] = str(workdir / "archive")
+
+    import pandas as pd
+    from benchmarks.synthetic_data import generate_dataset
+    from app.services.archive import ARCHIVE_DATASETS, export_archive, iter_history_batches, read_history
+
+    summary = generate_dataset(db_path, args.cities, args.years, args.interval)
+
+    # Treat the whole history as closed months, so every read is served by the archive
+    started_at = time.perf_counter()
+    for dataset in ARCHIVE_DATASETS:
+        export_archive(dataset, now=datetime.now() + timedelta(days=31))
+    export_seconds = round(time.perf_counter() - started_at, 3)
+    archive_bytes = sum(path.stat().st_size for path in (workdir / "archive").rglob("*.parquet"))
+
+    dataset, table, columns = PROJECTION
+    conn = sqlite3.connect(str(db_path))
+    city_id, city_name = conn.execute("SELECT city_id, name FROM cities ORDER BY city_id LIMIT 1").fetchone()
+    month_start = datetime.now() - timedelta(days=60)
+    month_end = month_start + timedelta(days=30)
+
+    def streamed_sum():
+        # Per-city running sums over batches; memory is bounded by one batch
+        totals: Dict[int, float] = {}
+        for batch in iter_history_batches(dataset, columns[:1], batch_size=STREAM_BATCH_SIZE):
+            frame = batch.to_pandas()
+            for key, value in frame.groupby("city_id")[columns[0]].sum().items():
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    scenarios = {
+        "full_table_pandas_sqlite": lambda: pd.read_sql(f"SELECT * FROM {table}", conn),
+        "projection_pandas_sqlite": lambda: pd.read_sql(
+            f"SELECT city_id, measurement_timestamp, {', '.join(columns)} FROM {table}", conn
+        ),
+        "projection_archive": lambda: read_history(dataset, columns).to_pandas(),
+        "one_city_month_pandas_sqlite": lambda: pd.read_sql(
+            f"SELECT city_id, measurement_timestamp, {', '.join(columns)} FROM {table} "
+            "WHERE city_id = ? AND measurement_timestamp >= ? AND measurement_timestamp < ?",
+            conn, params=(city_id, int(month_start.timestamp()), int(month_end.timestamp()))
+        ),
+        "one_city_month_archive": lambda: read_history(
+            dataset, columns, city=city_name, start_date=month_start, end_date=month_end
+        ).to_pandas(),
+        "streamed_per_city_sum_archive": streamed_sum,
+    }
+
+    results: Dict[str, Any] = {
+        "cities": args.cities,
+        "years": args.years,
+        "rows_per_table": summary["rows_per_table"],
+        "iterations": args.iterations,
+        "export_seconds": export_seconds,
+        "archive_bytes": archive_bytes,
+        "sqlite_bytes": db_path.stat().st_size,
+        "scenarios": {},
+    }
+    for name, scenario in scenarios.items():
+        timing, result = measure(scenario, args.iterations)
+        if isinstance(result, pd.DataFrame):
+            timing["rows"] = len(result)
+            timing["result_bytes"] = int(result.memory_usage(deep=True).sum())
+        results["scenarios"][name] = timing
+        print(f"{name}: p50 {timing['p50_ms']} ms" + (f", result {timing['result_bytes']} bytes" if "result_bytes" in timing else ""))
+    print(f"Archive {archive_bytes} bytes (SQLite file {results['sqlite_bytes']} bytes), exported in {export_seconds}s")
+
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare Parquet archive reads with pandas reads from SQLite")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=60, help="minutes between measurements")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_archive", results, args.label, args.output)
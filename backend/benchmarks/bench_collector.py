@@ -0,0 +1,126 @@
+"""
+Sweep time of the collector against a local fake OpenWeather server.
+
+Starts benchmarks.fake_openweather with injected latency, points the app at it
+and a scratch database, and times full collection sweeps per engine:
+
+    python -m benchmarks.bench_collector --cities 200 --latency 0.2 --concurrency 20
+
+The sharded engine walks the cities stored in the database, once per
+`--workers` count:
+
+    python -m benchmarks.bench_collector --cities 2000 --engines sharded --workers 1 2 4 8
+"""
+import argparse
+import math
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_environment, save_results
+from benchmarks.fake_openweather import base_url, start_server
+from benchmarks.synthetic_data import ensure_cities
+
+def load_cities(db_path: Path, count: int) -> List[Dict[str, Any]]:
+    """Create `count` cities in the benchmark database and return them in collector format"""
+    conn = sqlite3.connect(str(db_path))
+    try:
+        ensure_cities(conn, count)
+        rows = conn.execute(
+            "SELECT name, country, latitude, longitude FROM cities ORDER BY city_id LIMIT ?", (count,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [{"name": row[0], "country": row[1], "lat": float(row[2]), "lon": float(row[3])} for row in rows]
+
+def count_rows(db_path: Path) -> int:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM weather_measurements").fetchone()[0]
+    finally:
+        conn.close()
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Time collection sweeps for each requested engine"""
+    server = start_server(latency=args.latency, error_rate=args.error_rate)
+    db_path = Path(tempfile.mkdtemp()) / "bench_collector.db"
+    configure_environment(db_path, base_url(server))
+    os.environ["COLLECTION_CONCURRENCY"] = str(args.concurrency)
+    os.environ["COLLECTION_RATE_LIMIT"] = str(args.rate_limit)
+
+    from app.database.init_db import init_database
+    from app.services.collector import collect_data_for_all_cities, ingest_queue
+    from app.services.async_collector import collect_data_for_all_cities_async
+    from app.services.sharded_collector import ShardedCollector
+
+    init_database()
+    cities = load_cities(db_path, args.cities)
+    engines = {}
+    for engine in args.engines:
+        if engine == "sharded":
+            # Shards come from the cities table, as in production
+            for workers in args.workers:
+                engines[f"sharded_{workers}"] = (ShardedCollector(workers), workers)
+        else:
+            engines[engine] = ({"sync": collect_data_for_all_cities, "async": collect_data_for_all_cities_async}[engine], 1)
+
+    results: Dict[str, Any] = {
+        "cities": len(cities),
+        "latency_seconds": args.latency,
+        "error_rate": args.error_rate,
+        "concurrency": args.concurrency,
+        "rate_limit": args.rate_limit,
+        # One round trip per wave of `concurrency` cities
+        "ideal_sweep_seconds": round(args.latency * math.ceil(len(cities) / args.concurrency), 3),
+        "engines": {},
+    }
+    for engine, (collect, workers) in engines.items():
+        sweeps = []
+        for _ in range(args.sweeps):
+            rows_before = count_rows(db_path)
+            requests_before = server.request_count
+            started_at = time.perf_counter()
+            if isinstance(collect, ShardedCollector):
+                collect.collect()
+            else:
+                collect(cities)
+            # A sweep counts once its rows are in the database, not just in the ingest journal
+            ingest_queue.flush()
+            sweeps.append({
+                "seconds": round(time.perf_counter() - started_at, 3),
+                "rows_inserted": count_rows(db_path) - rows_before,
+                "upstream_requests": server.request_count - requests_before,
+            })
+        if isinstance(collect, ShardedCollector):
+            collect.shutdown()
+        results["engines"][engine] = {
+            "workers": workers,
+            "sweeps": sweeps,
+            "best_seconds": min(sweep["seconds"] for sweep in sweeps),
+            "ideal_seconds": round(args.latency * math.ceil(len(cities) / (args.concurrency * workers)), 3),
+        }
+        print(f"{engine}: best sweep {results['engines'][engine]['best_seconds']}s for {len(cities)} cities")
+
+    server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark collection sweeps against a fake OpenWeather server")
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.1, help="mean upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream 429/503 responses")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rate-limit", type=float, default=0, help="requests per second, 0 disables")
+    parser.add_argument("--sweeps", type=int, default=3)
+    parser.add_argument("--engines", nargs="+", choices=["sync", "async", "sharded"], default=["async"],
+                        help="the sync engine sleeps 1s per city, so it is slow by design")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker processes of the sharded engine")
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_collector", results, args.label, args.output)
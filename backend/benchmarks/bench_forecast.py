@@ -0,0 +1,109 @@
+"""
+Update cost, prediction latency and accuracy of the per-city AQI forecasts.
+
+Fits every city on its history except the last `--holdout-days`, then replays
+the held-out hours one sweep at a time. It records the incremental update
+cost and compares each forecast with the AQI observed later, next to a
+persistence forecast (AQI stays where it is):
+
+    python -m benchmarks.bench_forecast --cities 20 --years 1
+"""
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp())
+    db_path = workdir / "forecast.db"
+    configure_environment(db_path)
+
+    import numpy as np
+    from benchmarks.synthetic_data import generate_dataset
+    from app.services.analytics import aligned_history
+    from app.services.forecast import AQI, HORIZONS, SERIES_COLUMNS, AqiForecaster, CityModel
+
+    summary = generate_dataset(db_path, args.cities, args.years, args.interval)
+    forecaster = AqiForecaster()
+
+    started_at = time.perf_counter()
+    forecaster.update()
+    initial_seconds = round(time.perf_counter() - started_at, 3)
+
+    lookups = []
+    for _ in range(args.lookups):
+        started_at = time.perf_counter()
+        forecaster.forecasts(city=next(iter(forecaster.cities.values()))[0])
+        lookups.append(time.perf_counter() - started_at)
+
+    # Replay the held-out hours of each city through a fresh model
+    frame = aligned_history.refresh()
+    holdout_hours = args.holdout_days * 24
+    updates = []
+    errors = {int(h): [] for h in HORIZONS}
+    persistence = {int(h): [] for h in HORIZONS}
+    for _, rows in frame.groupby("city_id"):
+        hours = rows["measurement_timestamp"].to_numpy() // 3600
+        values = rows[SERIES_COLUMNS].to_numpy(dtype=np.float64)
+        split = hours.max() - holdout_hours
+        model = CityModel()
+        model.update(hours[hours <= split], values[hours <= split], forecaster.decay, forecaster.alpha, forecaster.min_rows)
+
+        actual = dict(zip(hours.tolist(), values[:, AQI].tolist()))
+        for hour in np.unique(hours[hours > split]):
+            sweep = hours == hour
+            started_at = time.perf_counter()
+            model.update(hours[sweep], values[sweep], forecaster.decay, forecaster.alpha, forecaster.min_rows)
+            updates.append(time.perf_counter() - started_at)
+            if model.forecast is None:
+                continue
+            for hours_ahead, predicted in zip(HORIZONS, model.forecast):
+                observed = actual.get(int(hour + hours_ahead))
+                if observed is not None and not np.isnan(observed):
+                    errors[int(hours_ahead)].append(abs(predicted - observed))
+                    persistence[int(hours_ahead)].append(abs(actual[int(hour)] - observed))
+
+    accuracy = {
+        hours_ahead: {
+            "mae": round(float(np.mean(errors[hours_ahead])), 4),
+            "persistence_mae": round(float(np.mean(persistence[hours_ahead])), 4),
+            "samples": len(errors[hours_ahead]),
+        }
+        for hours_ahead in (1, 6, 12, 24)
+        if errors[hours_ahead]
+    }
+    results = {
+        "cities": args.cities,
+        "years": args.years,
+        "rows_per_table": summary["rows_per_table"],
+        "initial_update_seconds": initial_seconds,
+        "incremental_update": summarize(updates),
+        "forecast_lookup": summarize(lookups),
+        "accuracy": accuracy,
+    }
+    print(f"Initial fit of {len(forecaster.models)} cities: {initial_seconds}s")
+    print(f"Incremental update per city and sweep: p50 {results['incremental_update']['p50_ms']} ms")
+    print(f"Forecast lookup: p50 {results['forecast_lookup']['p50_ms']} ms")
+    for hours_ahead, scores in accuracy.items():
+        print(f"{hours_ahead}h ahead: MAE {scores['mae']} (persistence {scores['persistence_mae']})")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and score the AQI forecasts")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=60, help="minutes between measurements")
+    parser.add_argument("--holdout-days", type=int, default=30, help="hours replayed one sweep at a time")
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_forecast", results, args.label, args.output)
@@ -0,0 +1,141 @@
+"""
+Fetch throughput and lost readings with direct writes vs the ingest journal.
+
+Fetches batches of cities from a local fake OpenWeather server while another
+connection periodically holds the database write lock for longer than
+DB_BUSY_TIMEOUT. With direct writes, each batch waits for its transaction
+before the next fetch, and a batch that hits the lock is lost. Through the
+ingest queue, batches are journaled and the writer retries until the lock is
+released:
+
+    python -m benchmarks.bench_ingest --cities 200 --batch 10 --lock-seconds 2 --lock-every 5
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import configure_environment, save_results, summarize
+from benchmarks.fake_openweather import base_url, start_server
+
+def hold_write_lock(db_path: Path, seconds: float, every: float, stop: threading.Event) -> None:
+    """Take the write lock for `seconds` out of every `every` seconds, like a long retention or VACUUM step"""
+    conn = sqlite3.connect(str(db_path), isolation_level=None)
+    while not stop.wait(every - seconds):
+        conn.execute("BEGIN IMMEDIATE")
+        stop.wait(seconds)
+        conn.execute("COMMIT")
+    conn.close()
+
+def count_rows(db_path: Path) -> int:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM weather_measurements").fetchone()[0]
+    finally:
+        conn.close()
+
+def run_mode(
+    persist: Callable[[List[tuple]], None],
+    batches: List[List[Dict[str, Any]]],
+    db_path: Path,
+    args: argparse.Namespace
+) -> Dict[str, Any]:
+    from app.services.async_collector import fetch_all_cities
+    from app.services.collector import ingest_queue
+
+    rows_before = count_rows(db_path)
+    stop = threading.Event()
+    locker = threading.Thread(target=hold_write_lock, args=(db_path, args.lock_seconds, args.lock_every, stop))
+    locker.start()
+
+    persist_latencies = []
+    started_at = time.perf_counter()
+    for batch in batches:
+        results = asyncio.run(fetch_all_cities(batch, args.concurrency, 0, 1))
+        persist_started_at = time.perf_counter()
+        persist([result for result in results if result[1]])
+        persist_latencies.append(time.perf_counter() - persist_started_at)
+    fetch_seconds = time.perf_counter() - started_at
+
+    stop.set()
+    locker.join()
+    ingest_queue.flush()
+    readings = sum(len(batch) for batch in batches)
+    persisted = count_rows(db_path) - rows_before
+    return {
+        "fetch_seconds": round(fetch_seconds, 3),
+        "cities_per_second": round(readings / fetch_seconds, 1),
+        "persisted": persisted,
+        "lost": readings - persisted,
+        "persist_call": summarize(persist_latencies),
+        "drain_seconds": round(time.perf_counter() - started_at - fetch_seconds, 3),
+    }
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = start_server(latency=args.latency)
+    db_path = Path(tempfile.mkdtemp()) / "bench_ingest.db"
+    configure_environment(db_path, base_url(server))
+    os.environ["DB_BUSY_TIMEOUT"] = str(args.busy_timeout)
+
+    from app.database.init_db import init_database
+    from app.database.cities import load_cities
+    from app.services.collector import build_batch, ingest_queue, write_batch
+    from benchmarks.synthetic_data import ensure_cities
+
+    init_database()
+    conn = sqlite3.connect(str(db_path))
+    ensure_cities(conn, args.cities)
+    conn.close()
+    cities = load_cities()[:args.cities]
+    batches = [cities[index:index + args.batch] for index in range(0, len(cities), args.batch)] * args.rounds
+
+    def direct(results: List[tuple]) -> None:
+        """The synchronous path: one transaction per batch, dropped on error"""
+        collection_timestamp = int(time.time())
+        try:
+            write_batch(build_batch([(*result, collection_timestamp) for result in results]))
+        except sqlite3.Error:
+            pass
+
+    results: Dict[str, Any] = {
+        "cities": len(cities),
+        "batch": args.batch,
+        "rounds": args.rounds,
+        "latency_seconds": args.latency,
+        "busy_timeout_ms": args.busy_timeout,
+        "lock_seconds": args.lock_seconds,
+        "lock_every": args.lock_every,
+        "modes": {},
+    }
+    for name, persist in (("direct", direct), ("journal", ingest_queue.submit)):
+        results["modes"][name] = run_mode(persist, batches, db_path, args)
+        mode = results["modes"][name]
+        print(
+            f"{name}: {mode['cities_per_second']} cities/s fetched, persist call p95 {mode['persist_call']['p95_ms']} ms, "
+            f"{mode['persisted']} persisted, {mode['lost']} lost, drained {mode['drain_seconds']}s after the last fetch"
+        )
+    ingest_queue.stop()
+    server.shutdown()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare direct writes with the durable ingest queue under write-lock stalls")
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=10, help="cities fetched and saved together")
+    parser.add_argument("--rounds", type=int, default=1, help="passes over all cities")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake OpenWeather response time (seconds)")
+    parser.add_argument("--busy-timeout", type=int, default=1000, help="DB_BUSY_TIMEOUT (milliseconds)")
+    parser.add_argument("--lock-seconds", type=float, default=2)
+    parser.add_argument("--lock-every", type=float, default=5)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_ingest", results, args.label, args.output)
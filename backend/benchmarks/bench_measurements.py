@@ -0,0 +1,96 @@
+"""
+One dashboard load: /weather + /air-pollution joined by the client vs /measurements.
+
+For each window, times fetching every city's weather and air pollution rows
+through the two row-oriented endpoints (following X-Next-Cursor pages) and
+joining them on (city, timestamp) in the client, against a single call to
+the column-oriented endpoint. The response cache is bypassed:
+
+    python -m benchmarks.synthetic_data --db data/benchmark.db --cities 20 --years 1
+    python -m benchmarks.bench_measurements --db data/benchmark.db --days 1 7 30
+"""
+import argparse
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+def fetch_pages(client, path: str, params: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """All rows of a paginated endpoint and the bytes transferred"""
+    rows, transferred = [], 0
+    params = dict(params)
+    while True:
+        response = client.get(path, params=params)
+        response.raise_for_status()
+        transferred += len(response.content)
+        rows.extend(response.json())
+        next_cursor = response.headers.get("X-Next-Cursor")
+        if not next_cursor:
+            return rows, transferred
+        params["cursor"] = next_cursor
+
+def separate_load(client, params: Dict[str, Any]) -> Tuple[int, int]:
+    """Row endpoints plus a client-side join; returns (joined rows, bytes)"""
+    weather, weather_bytes = fetch_pages(client, "/api/v1/weather", {**params, "limit": 10000})
+    air, air_bytes = fetch_pages(client, "/api/v1/air-pollution", {**params, "limit": 10000})
+    air_by_key = {(row["city"], row["measurement_timestamp"]): row for row in air}
+    joined = [{**row, **air_by_key.get((row["city"], row["measurement_timestamp"]), {})} for row in weather]
+    return len(joined), weather_bytes + air_bytes
+
+def combined_load(client, params: Dict[str, Any]) -> Tuple[int, int]:
+    """One column-oriented call; returns (rows, bytes)"""
+    response = client.get("/api/v1/measurements", params=params)
+    response.raise_for_status()
+    body = response.json()
+    return sum(len(city["timestamp"]) for city in body["cities"]), len(response.content)
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    configure_environment(args.db)
+    from fastapi.testclient import TestClient
+    from app.api.app import app
+
+    conn = sqlite3.connect(str(args.db))
+    newest = conn.execute("SELECT MAX(measurement_timestamp) FROM weather_measurements").fetchone()[0]
+    conn.close()
+    end = datetime.fromtimestamp(newest)
+
+    loads = {"separate": separate_load, "combined": combined_load}
+    results: Dict[str, Any] = {"db_path": str(args.db), "iterations": args.iterations, "windows": {}}
+    with TestClient(app) as client:
+        for days in args.days:
+            window = {"start_date": (end - timedelta(days=days)).isoformat(), "end_date": end.isoformat()}
+            results["windows"][days] = {}
+            for name, load in loads.items():
+                latencies = []
+                for iteration in range(args.iterations):
+                    # A fresh query string per call keeps the response cache out of the measurement
+                    params = {**window, "_": f"{iteration}-{time.perf_counter_ns()}"}
+                    started_at = time.perf_counter()
+                    rows, transferred = load(client, params)
+                    latencies.append(time.perf_counter() - started_at)
+                results["windows"][days][name] = {**summarize(latencies), "rows": rows, "response_bytes": transferred}
+
+            separate = results["windows"][days]["separate"]
+            combined = results["windows"][days]["combined"]
+            print(
+                f"{days}d ({combined['rows']} rows): separate p50 {separate['p50_ms']} ms / {separate['response_bytes']} bytes, "
+                f"combined p50 {combined['p50_ms']} ms / {combined['response_bytes']} bytes"
+            )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare row endpoints with the column-oriented measurements endpoint")
+    parser.add_argument("--db", type=Path, default=Path("data/benchmark.db"))
+    parser.add_argument("--days", type=int, nargs="+", default=[1, 7, 30], help="window sizes ending at the newest reading")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    if not args.db.exists():
+        parser.error(f"{args.db} does not exist, generate it with benchmarks.synthetic_data first")
+    results = run(args)
+    save_results("bench_measurements", results, args.label, args.output)
@@ -0,0 +1,140 @@
+"""
+Load shape of the sweep loop vs the per-city schedule, on a simulated clock.
+
+The sweep loop issues every city's requests at once (paced only by
+COLLECTION_RATE_LIMIT) and writes them in one transaction per interval.
+The per-city schedule (app.services.scheduler.CollectionSchedule, replayed
+here with a virtual clock) spreads cities across the interval. For both,
+reports peak OpenWeather calls per second and per minute, minutes over the
+per-minute budget, cities per write transaction and the gap between two
+collections of a city. Also measures the schedule's own cost per city:
+
+    python -m benchmarks.bench_scheduler --cities 1000 --interval 3600 --hours 6
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import save_results
+
+def describe(call_times: List[float], commits: List[int], collected: Dict[int, List[float]], budget: int) -> Dict[str, Any]:
+    per_second = Counter(int(moment) for moment in call_times)
+    per_minute = Counter(int(moment // 60) for moment in call_times)
+    gaps = [later - earlier for times in collected.values() for earlier, later in zip(times, times[1:])]
+    return {
+        "calls": len(call_times),
+        "peak_calls_per_second": max(per_second.values()),
+        "peak_calls_per_minute": max(per_minute.values()),
+        "minutes_over_budget": sum(1 for count in per_minute.values() if budget and count > budget),
+        "commits": len(commits),
+        "max_cities_per_commit": max(commits),
+        "mean_cities_per_commit": round(statistics.mean(commits), 2),
+        "mean_gap_s": round(statistics.mean(gaps), 1) if gaps else None,
+        "gap_stdev_s": round(statistics.pstdev(gaps), 1) if gaps else None,
+    }
+
+def simulate_sweep(args: argparse.Namespace) -> Dict[str, Any]:
+    """Every city at each interval, requests paced by the rate limit"""
+    call_times, commits, collected = [], [], defaultdict(list)
+    for start in range(0, int(args.hours * 3600), args.interval):
+        for index in range(args.cities * 2):
+            call_times.append(start + index / args.rate_limit)
+        done = call_times[-1] + args.batch_seconds
+        for city_id in range(args.cities):
+            collected[city_id].append(done)
+        commits.append(args.cities)
+    return describe(call_times, commits, collected, args.calls_per_minute)
+
+def simulate_spread(args: argparse.Namespace) -> Dict[str, Any]:
+    """The per-city schedule driven by a virtual clock"""
+    from app.services.scheduler import CALLS_PER_CITY, CollectionSchedule
+
+    schedule = CollectionSchedule(
+        args.interval, args.jitter, args.batch_window, args.calls_per_minute, rng=random.Random(1)
+    )
+    cities = [{"city_id": city_id, "priority": 0, "collection_interval": None} for city_id in range(args.cities)]
+    schedule.sync(cities, 0.0)
+
+    call_times, commits, collected, lags = [], [], defaultdict(list), []
+    now, end = 0.0, args.hours * 3600
+    while now < end:
+        wait = schedule.wait_time(now)
+        if wait:
+            now += wait
+            continue
+        batch, lag = schedule.take_due(now)
+        lags.append(lag)
+        # Requests of a batch are paced by the same rate limit as a sweep
+        call_times.extend(now + index / args.rate_limit for index in range(len(batch) * CALLS_PER_CITY))
+        now += len(batch) * CALLS_PER_CITY / args.rate_limit + args.batch_seconds
+        schedule.complete(batch, now)
+        commits.append(len(batch))
+        for city in batch:
+            collected[city["city_id"]].append(now)
+    return {**describe(call_times, commits, collected, args.calls_per_minute), "max_lag_s": round(max(lags), 1)}
+
+def schedule_overhead(args: argparse.Namespace) -> Dict[str, Any]:
+    """Wall-clock cost of sync, take_due and complete per city"""
+    from app.services.scheduler import CollectionSchedule
+
+    schedule = CollectionSchedule(args.interval, args.jitter, 0, 0, rng=random.Random(1))
+    cities = [{"city_id": city_id, "priority": 0, "collection_interval": None} for city_id in range(args.cities)]
+
+    started_at = time.perf_counter()
+    schedule.sync(cities, 0.0)
+    sync_seconds = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    now = 0.0
+    for _ in range(args.cities):
+        now = schedule.next_due()
+        batch, _ = schedule.take_due(now)
+        schedule.complete(batch, now)
+    cycle_seconds = time.perf_counter() - started_at
+    return {
+        "sync_us_per_city": round(sync_seconds / args.cities * 1e6, 2),
+        "take_and_complete_us_per_city": round(cycle_seconds / args.cities * 1e6, 2),
+    }
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results = {
+        "cities": args.cities,
+        "interval": args.interval,
+        "hours": args.hours,
+        "rate_limit": args.rate_limit,
+        "calls_per_minute_budget": args.calls_per_minute,
+        "sweep": simulate_sweep(args),
+        "spread": simulate_spread(args),
+        "overhead": schedule_overhead(args),
+    }
+    for mode in ("sweep", "spread"):
+        summary = results[mode]
+        print(
+            f"{mode}: peak {summary['peak_calls_per_second']} calls/s, {summary['peak_calls_per_minute']} calls/min "
+            f"({summary['minutes_over_budget']} minutes over budget), "
+            f"up to {summary['max_cities_per_commit']} cities per commit, "
+            f"gap {summary['mean_gap_s']}s +- {summary['gap_stdev_s']}s"
+        )
+    print(f"schedule overhead: {results['overhead']}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the load shape of sweeps and the per-city schedule")
+    parser.add_argument("--cities", type=int, default=1000)
+    parser.add_argument("--interval", type=int, default=3600, help="seconds between collections of a city")
+    parser.add_argument("--hours", type=float, default=6, help="simulated time")
+    parser.add_argument("--rate-limit", type=float, default=10, help="requests per second (COLLECTION_RATE_LIMIT)")
+    parser.add_argument("--calls-per-minute", type=int, default=60, help="OpenWeather budget (OPENWEATHER_CALLS_PER_MINUTE)")
+    parser.add_argument("--jitter", type=float, default=0.25)
+    parser.add_argument("--batch-window", type=float, default=5)
+    parser.add_argument("--batch-seconds", type=float, default=0.05, help="simulated write time per batch")
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_scheduler", results, args.label, args.output)
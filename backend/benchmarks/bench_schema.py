@@ -0,0 +1,218 @@
+"""
+Size and scan speed of the epoch/lookup schema against the ISO text layout it replaced.
+
+Generates a synthetic history, writes a copy of the measurement tables in the
+previous text layout, and times the same reads on both. The text copy is then
+converted with app.database.migrate to time the migration itself:
+
+    python -m benchmarks.bench_schema --cities 20 --years 1
+"""
+import argparse
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+# Measurement tables as they were before timestamps became epoch seconds
+TEXT_LAYOUT_SQL = """
+    CREATE TABLE weather_measurements (
+        weather_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER NOT NULL,
+        measurement_timestamp DATETIME NOT NULL,
+        collection_timestamp DATETIME NOT NULL,
+        temperature DECIMAL(5,2), feels_like DECIMAL(5,2), temp_min DECIMAL(5,2), temp_max DECIMAL(5,2),
+        pressure INTEGER, humidity INTEGER, sea_level INTEGER, ground_level INTEGER, visibility INTEGER,
+        wind_speed DECIMAL(5,2), wind_degree INTEGER, wind_gust DECIMAL(5,2), clouds_all INTEGER,
+        rain_1h DECIMAL(5,2), rain_3h DECIMAL(5,2), snow_1h DECIMAL(5,2), snow_3h DECIMAL(5,2),
+        weather_condition_id INTEGER, weather_main VARCHAR(50), weather_description VARCHAR(100),
+        weather_icon VARCHAR(10), sunrise TIME, sunset TIME
+    );
+    CREATE TABLE air_pollution_measurements (
+        air_pollution_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        city_id INTEGER NOT NULL,
+        measurement_timestamp DATETIME NOT NULL,
+        collection_timestamp DATETIME NOT NULL,
+        aqi INTEGER, co DECIMAL(10,2), no DECIMAL(10,2), no2 DECIMAL(10,2), o3 DECIMAL(10,2),
+        so2 DECIMAL(10,2), pm2_5 DECIMAL(10,2), pm10 DECIMAL(10,2), nh3 DECIMAL(10,2)
+    );
+    CREATE INDEX idx_weather_city_date ON weather_measurements(city_id, measurement_timestamp);
+    CREATE INDEX idx_pollution_city_date ON air_pollution_measurements(city_id, measurement_timestamp);
+    CREATE INDEX idx_weather_date ON weather_measurements(measurement_timestamp);
+    CREATE INDEX idx_pollution_date ON air_pollution_measurements(measurement_timestamp);
+"""
+
+DECODE_ROWS = 50000
+
+# Tables and indexes both layouts share; the epoch database also holds rollups
+MEASUREMENT_OBJECTS = (
+    "weather_measurements", "air_pollution_measurements",
+    "idx_weather_city_date", "idx_pollution_city_date", "idx_weather_date", "idx_pollution_date",
+)
+
+def write_text_layout(source: Path, target: Path) -> None:
+    """Copy the measurement tables of `source` into `target` using the ISO text layout"""
+    from app.database.timestamps import local_sql
+
+    conn = sqlite3.connect(str(target))
+    conn.executescript(TEXT_LAYOUT_SQL)
+    conn.execute("ATTACH DATABASE ? AS source", (str(source),))
+    conn.execute("CREATE TABLE cities AS SELECT * FROM source.cities")
+    conn.execute(f"""
+        INSERT INTO weather_measurements
+        SELECT
+            w.weather_id, w.city_id, {local_sql("w.measurement_timestamp")}, {local_sql("w.collection_timestamp")},
+            w.temperature, w.feels_like, w.temp_min, w.temp_max, w.pressure, w.humidity, w.sea_level,
+            w.ground_level, w.visibility, w.wind_speed, w.wind_degree, w.wind_gust, w.clouds_all,
+            w.rain_1h, w.rain_3h, w.snow_1h, w.snow_3h,
+            w.weather_condition_id, wc.weather_main, wc.weather_description, w.weather_icon,
+            {local_sql("w.sunrise", "%H:%M:%S")}, {local_sql("w.sunset", "%H:%M:%S")}
+        FROM source.weather_measurements w
+        LEFT JOIN source.weather_conditions wc ON w.weather_condition_id = wc.weather_condition_id
+    """)
+    conn.execute(f"""
+        INSERT INTO air_pollution_measurements
+        SELECT
+            air_pollution_id, city_id, {local_sql("measurement_timestamp")}, {local_sql("collection_timestamp")},
+            aqi, co, no, no2, o3, so2, pm2_5, pm10, nh3
+        FROM source.air_pollution_measurements
+    """)
+    conn.commit()
+    conn.execute("DETACH DATABASE source")
+    conn.execute("ANALYZE")
+    conn.execute("VACUUM")
+    conn.close()
+
+def table_bytes(conn: sqlite3.Connection, name: str) -> Any:
+    """Bytes used by a table or index, if SQLite was built with the dbstat table"""
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (name,)).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+def time_query(run: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    latencies = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - started_at)
+    return summarize(latencies)
+
+def bench_reads(conn: sqlite3.Connection, epoch: bool, start: datetime, iterations: int) -> Dict[str, Any]:
+    """Time representative reads against one layout"""
+    boundary = int(start.timestamp()) if epoch else start.isoformat()
+    decode = datetime.fromtimestamp if epoch else datetime.fromisoformat
+    description = (
+        "SELECT wc.weather_description FROM weather_measurements w "
+        "LEFT JOIN weather_conditions wc ON w.weather_condition_id = wc.weather_condition_id "
+        f"ORDER BY w.measurement_timestamp DESC LIMIT {DECODE_ROWS}"
+        if epoch else
+        f"SELECT weather_description FROM weather_measurements ORDER BY measurement_timestamp DESC LIMIT {DECODE_ROWS}"
+    )
+
+    def decode_rows():
+        rows = conn.execute(
+            f"SELECT measurement_timestamp FROM weather_measurements ORDER BY measurement_timestamp DESC LIMIT {DECODE_ROWS}"
+        ).fetchall()
+        return [decode(row[0]) for row in rows]
+
+    return {
+        "full_scan_avg": time_query(
+            lambda: conn.execute("SELECT AVG(temperature) FROM weather_measurements").fetchone(), iterations
+        ),
+        "range_filter_per_city": time_query(
+            lambda: conn.execute(
+                "SELECT city_id, COUNT(*), AVG(temperature) FROM weather_measurements "
+                "WHERE measurement_timestamp >= ? GROUP BY city_id", (boundary,)
+            ).fetchall(), iterations
+        ),
+        "range_filter_unindexed_column": time_query(
+            lambda: conn.execute(
+                "SELECT COUNT(*) FROM weather_measurements WHERE collection_timestamp >= ?", (boundary,)
+            ).fetchone(), iterations
+        ),
+        f"fetch_and_decode_{DECODE_ROWS}_timestamps": time_query(decode_rows, iterations),
+        f"fetch_{DECODE_ROWS}_descriptions": time_query(lambda: conn.execute(description).fetchall(), iterations),
+    }
+
+def describe_layout(conn: sqlite3.Connection, rows: int) -> Dict[str, Any]:
+    sizes = {name: table_bytes(conn, name) for name in MEASUREMENT_OBJECTS}
+    total = sum(sizes.values()) if None not in sizes.values() else None
+    return {
+        "measurement_bytes": total,
+        "bytes_per_row": round(total / (rows * 2), 1) if total and rows else None,
+        "objects": sizes,
+    }
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp())
+    epoch_db = workdir / "epoch.db"
+    text_db = workdir / "text.db"
+    configure_environment(epoch_db)
+
+    from benchmarks.synthetic_data import generate_dataset
+    from app.database.migrate import migrate_schema
+
+    summary = generate_dataset(epoch_db, args.cities, args.years, args.interval)
+    rows = summary["rows_per_table"]
+    conn = sqlite3.connect(str(epoch_db))
+    conn.execute("VACUUM")
+    conn.close()
+    write_text_layout(epoch_db, text_db)
+
+    start = datetime.now() - timedelta(days=args.range_days)
+    results: Dict[str, Any] = {
+        "cities": args.cities,
+        "years": args.years,
+        "rows_per_table": rows,
+        "range_days": args.range_days,
+        "iterations": args.iterations,
+        "layouts": {},
+    }
+    for name, path, epoch in (("text", text_db, False), ("epoch", epoch_db, True)):
+        conn = sqlite3.connect(str(path))
+        results["layouts"][name] = {
+            **describe_layout(conn, rows),
+            "reads": bench_reads(conn, epoch, start, args.iterations),
+        }
+        conn.close()
+
+    # Time the migration on a copy of the text layout
+    migrated_db = workdir / "migrated.db"
+    shutil.copy(text_db, migrated_db)
+    conn = sqlite3.connect(str(migrated_db))
+    started_at = time.perf_counter()
+    migrate_schema(conn)
+    conn.execute("VACUUM")
+    results["migration_seconds"] = round(time.perf_counter() - started_at, 3)
+    conn.close()
+
+    text, epoch = results["layouts"]["text"], results["layouts"]["epoch"]
+    if text["measurement_bytes"] and epoch["measurement_bytes"]:
+        results["size_reduction"] = round(1 - epoch["measurement_bytes"] / text["measurement_bytes"], 3)
+        print(f"Measurement tables and indexes: text {text['measurement_bytes']} bytes, "
+              f"epoch {epoch['measurement_bytes']} bytes ({results['size_reduction']:.0%} smaller)")
+    print(f"Migration and VACUUM: {results['migration_seconds']}s")
+    for read, timing in text["reads"].items():
+        print(f"{read}: text p50 {timing['p50_ms']} ms, epoch p50 {epoch['reads'][read]['p50_ms']} ms")
+
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the epoch schema with the previous ISO text layout")
+    parser.add_argument("--cities", type=int, default=20)
+    parser.add_argument("--years", type=float, default=1.0)
+    parser.add_argument("--interval", type=int, default=60, help="minutes between measurements")
+    parser.add_argument("--range-days", type=int, default=30, help="window of the range filter queries")
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_schema", results, args.label, args.output)
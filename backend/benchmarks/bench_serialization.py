@@ -0,0 +1,104 @@
+"""
+Encoding a weather page: per-row Pydantic models vs the bulk orjson path.
+
+The per-row path is the one the list endpoints used before: epoch rows are
+turned into WeatherData instances, run through jsonable_encoder and dumped
+with json. The bulk path is query_weather_data, which selects model-typed
+columns and encodes the cursor tuples directly. Both read the same rows of a
+synthetic database and must produce the same JSON:
+
+    python -m benchmarks.bench_serialization --rows 10000 100000 1000000
+"""
+import argparse
+import json
+import math
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+HOURS_PER_YEAR = 24 * 365
+
+def per_row_page(limit: int) -> bytes:
+    """Newest `limit` weather rows through WeatherData instances, as the endpoint used to do"""
+    from fastapi.encoders import jsonable_encoder
+    from app.api.app import WEATHER_FIELDS
+    from app.database.database import get_db
+    from app.database.timestamps import from_epoch
+    from app.models.models import WeatherData
+
+    selected = list(WEATHER_FIELDS)
+    query = f"""
+        SELECT c.name, c.country, w.measurement_timestamp, w.weather_id,
+            {", ".join(WEATHER_FIELDS[field] for field in selected)}
+        FROM weather_measurements w
+        JOIN cities c ON w.city_id = c.city_id
+        LEFT JOIN weather_conditions wc ON w.weather_condition_id = wc.weather_condition_id
+        ORDER BY w.measurement_timestamp DESC, w.weather_id DESC LIMIT ?
+    """
+    with get_db() as conn:
+        rows = conn.execute(query, (limit,)).fetchall()
+    content = [
+        WeatherData(
+            city=row[0],
+            country=row[1],
+            measurement_timestamp=from_epoch(row[2]),
+            **{field: row[index] for index, field in enumerate(selected, start=4)}
+        )
+        for row in rows
+    ]
+    return json.dumps(jsonable_encoder(content, exclude_unset=True)).encode()
+
+def bulk_page(limit: int) -> bytes:
+    """Newest `limit` weather rows through the endpoint's bulk encoder"""
+    from app.api.app import WEATHER_FIELDS, query_weather_data
+
+    body, _ = query_weather_data(list(WEATHER_FIELDS), None, None, None, None, None, limit)
+    return body
+
+def time_encoding(encode: Callable[[int], bytes], rows: int, iterations: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        body = encode(rows)
+        latencies.append(time.perf_counter() - started_at)
+    return {**summarize(latencies), "rows_per_second": round(rows / min(latencies)), "response_bytes": len(body)}
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    db_path = args.db or Path(tempfile.mkdtemp()) / "serialization.db"
+    configure_environment(db_path)
+
+    summary: Dict[str, Any] = {"db_path": str(db_path)}
+    if args.db is None:
+        from benchmarks.synthetic_data import generate_dataset
+        summary = generate_dataset(db_path, math.ceil(max(args.rows) / HOURS_PER_YEAR), 1, 60)
+
+    # Same rows, same JSON: compare parsed documents, since spacing differs
+    check_rows = min(args.rows)
+    if json.loads(per_row_page(check_rows)) != json.loads(bulk_page(check_rows)):
+        raise SystemExit(f"Bulk encoding of {check_rows} rows differs from the per-row models")
+
+    results: Dict[str, Any] = {"dataset": summary, "iterations": args.iterations, "rows": {}}
+    for rows in args.rows:
+        per_row = time_encoding(per_row_page, rows, args.iterations)
+        bulk = time_encoding(bulk_page, rows, args.iterations)
+        results["rows"][rows] = {"per_row": per_row, "bulk": bulk, "speedup": round(per_row["p50_ms"] / bulk["p50_ms"], 2)}
+        print(
+            f"{rows} rows: per-row p50 {per_row['p50_ms']} ms ({per_row['response_bytes']} bytes), "
+            f"bulk p50 {bulk['p50_ms']} ms ({bulk['response_bytes']} bytes), {results['rows'][rows]['speedup']}x"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-row Pydantic encoding with the bulk orjson path")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--db", type=Path, help="existing database with at least max(--rows) weather rows")
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_serialization", results, args.label, args.output)
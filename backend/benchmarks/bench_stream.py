@@ -0,0 +1,165 @@
+"""
+Cost of the server-sent events push with many idle dashboard connections.
+
+Starts the API with uvicorn in this process, connects `--clients` SSE
+clients, then measures:
+
+- memory and CPU while the connections sit idle (keepalives only)
+- the time from publishing one sweep's readings until every client has them
+
+Client sockets live in the same process, so the memory figure is an upper
+bound for the server side:
+
+    python -m benchmarks.bench_stream --clients 2000 --events 20
+"""
+import argparse
+import asyncio
+import json
+import resource
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_environment, save_results, summarize
+
+def rss_bytes() -> int:
+    """Resident memory of this process"""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+def raise_file_limit() -> None:
+    """Both ends of every connection use a descriptor"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def latest_rows(cities: int) -> List[Dict[str, Any]]:
+    """Rows shaped like /api/v1/latest"""
+    return [
+        {
+            "city": f"City {index}", "country": "Benchmark",
+            "weather_measurement_timestamp": "2024-01-01T12:00:00", "temperature": 14.2,
+            "feels_like": 13.1, "humidity": 71, "pressure": 1013, "wind_speed": 3.4,
+            "weather_description": "scattered clouds", "weather_icon": "03d",
+            "air_measurement_timestamp": "2024-01-01T12:00:00", "aqi": 2, "co": 230.3,
+            "no2": 18.5, "o3": 61.2, "pm2_5": 8.1, "pm10": 12.4,
+        }
+        for index in range(cities)
+    ]
+
+class Client:
+    """Raw SSE connection counting `measurements` events"""
+
+    def __init__(self):
+        self.received = asyncio.Event()
+        self.events = 0
+
+    async def run(self, port: int, connected: asyncio.Event) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /api/v1/stream HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nAccept: text/event-stream\r\n\r\n".encode())
+        await writer.drain()
+        await reader.readuntil(b"retry:")
+        connected.set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            if line.startswith(b"event: measurements"):
+                self.events += 1
+                self.received.set()
+
+async def run_clients(args: argparse.Namespace, broadcaster, payload: str) -> Dict[str, Any]:
+    clients = [Client() for _ in range(args.clients)]
+    tasks = []
+    rss_before = rss_bytes()
+    started_at = time.perf_counter()
+    # Connect in batches so the listen backlog never overflows
+    for batch in range(0, args.clients, args.connect_batch):
+        connected = [asyncio.Event() for _ in clients[batch:batch + args.connect_batch]]
+        for client, event in zip(clients[batch:batch + args.connect_batch], connected):
+            tasks.append(asyncio.create_task(client.run(args.port, event)))
+        await asyncio.gather(*(event.wait() for event in connected))
+    connect_seconds = round(time.perf_counter() - started_at, 3)
+    await asyncio.sleep(1)
+    rss_connected = rss_bytes()
+
+    cpu_before = time.process_time()
+    await asyncio.sleep(args.idle_seconds)
+    idle_cpu = time.process_time() - cpu_before
+
+    latencies = []
+    for _ in range(args.events):
+        for client in clients:
+            client.received.clear()
+        started_at = time.perf_counter()
+        await asyncio.to_thread(broadcaster.publish, "measurements", payload)
+        await asyncio.gather(*(client.received.wait() for client in clients))
+        latencies.append(time.perf_counter() - started_at)
+        await asyncio.sleep(args.pause)
+
+    for task in tasks:
+        task.cancel()
+    return {
+        "connect_seconds": connect_seconds,
+        "subscribers": len(broadcaster.subscribers),
+        "rss_per_connection_kb": round((rss_connected - rss_before) / args.clients / 1024, 1),
+        "idle_cpu_percent": round(idle_cpu / args.idle_seconds * 100, 2),
+        "events_received": sum(client.events for client in clients),
+        "fan_out": summarize(latencies),
+    }
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    workdir = Path(tempfile.mkdtemp())
+    configure_environment(workdir / "stream.db")
+    raise_file_limit()
+
+    import uvicorn
+    from app.database.init_db import init_database
+    from app.services.broadcast import broadcaster
+    from app.api.app import app
+
+    init_database()
+    broadcaster.heartbeat = args.heartbeat
+    server = uvicorn.Server(uvicorn.Config(app, port=args.port, log_level="warning", backlog=4096))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    payload = json.dumps(latest_rows(args.payload_cities))
+    results: Dict[str, Any] = {
+        "clients": args.clients,
+        "payload_bytes": len(payload),
+        "heartbeat_seconds": args.heartbeat,
+        **asyncio.run(run_clients(args, broadcaster, payload)),
+    }
+    print(f"{args.clients} clients connected in {results['connect_seconds']}s, "
+          f"{results['rss_per_connection_kb']} KB per connection")
+    print(f"Idle CPU: {results['idle_cpu_percent']}%")
+    print(f"Fan-out of a {len(payload)} byte event to all clients: "
+          f"p50 {results['fan_out']['p50_ms']} ms, p95 {results['fan_out']['p95_ms']} ms")
+
+    server.should_exit = True
+    shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the SSE push with many idle clients")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--events", type=int, default=20)
+    parser.add_argument("--payload-cities", type=int, default=20, help="rows in each pushed event")
+    parser.add_argument("--idle-seconds", type=float, default=10)
+    parser.add_argument("--heartbeat", type=float, default=15, help="keepalive interval during the run")
+    parser.add_argument("--pause", type=float, default=0.2, help="seconds between published events")
+    parser.add_argument("--connect-batch", type=int, default=200)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--label", help="name stored with the results")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    args = parser.parse_args()
+
+    results = run(args)
+    save_results("bench_stream", results, args.label, args.output)
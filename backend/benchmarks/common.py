@@ -0,0 +1,72 @@
+import json
+import os
+import statistics
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+def configure_environment(db_path: Optional[Path] = None, openweather_base_url: Optional[str] = None) -> None:
+    """
+    Point the app at a benchmark database / fake OpenWeather server
+
+    Must run before any `app` module is imported, since configuration is read at import time.
+    """
+    if db_path is not None:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(db_path).resolve()}"
+        # The ingest journal belongs to its database; never replay the app's journal into a benchmark one
+        os.environ["INGEST_JOURNAL_PATH"] = str(Path(db_path).resolve().parent / f"{Path(db_path).stem}_ingest_journal")
+    if openweather_base_url is not None:
+        os.environ["OPENWEATHER_BASE_URL"] = openweather_base_url
+    os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize(latencies: List[float], errors: int = 0, elapsed: Optional[float] = None) -> Dict[str, Any]:
+    """Throughput and latency percentiles (milliseconds) for a set of timed operations"""
+    elapsed = sum(latencies) if elapsed is None else elapsed
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else 0.0,
+    }
+
+def git_revision() -> Optional[str]:
+    """Current commit hash, so results can be compared across commits"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).resolve().parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def save_results(name: str, results: Dict[str, Any], label: Optional[str] = None, output: Optional[Path] = None) -> Path:
+    """Write benchmark results as JSON, tagged with the commit and time of the run"""
+    revision = git_revision()
+    results = {
+        "benchmark": name,
+        "label": label,
+        "git_revision": revision,
+        "timestamp": datetime.now().isoformat(),
+        **results,
+    }
+    if output is None:
+        output = RESULTS_DIR / f"{name}_{label or revision or 'run'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    return output
@@ -0,0 +1,140 @@
+"""
+Local stand-in for the two OpenWeather endpoints used by the collector.
+
+Serves /data/2.5/weather and /data/2.5/air_pollution with plausible payloads,
+optional injected latency and an optional share of 429/503 responses carrying
+Retry-After. Point the collector at it with:
+
+    python benchmarks/fake_openweather.py --port 8001 --latency 0.2 --error-rate 0.1
+    OPENWEATHER_BASE_URL=http://localhost:8001/data/2.5 uvicorn app.api.app:app
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+from urllib.parse import parse_qs, urlparse
+
+def weather_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Current weather response shaped like OpenWeather's /weather"""
+    now = int(time.time())
+    temp = round(random.uniform(-5, 30), 2)
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+        "main": {
+            "temp": temp,
+            "feels_like": round(temp - random.uniform(0, 3), 2),
+            "temp_min": round(temp - 1, 2),
+            "temp_max": round(temp + 1, 2),
+            "pressure": random.randint(980, 1040),
+            "humidity": random.randint(20, 100),
+            "sea_level": random.randint(980, 1040),
+            "grnd_level": random.randint(950, 1030),
+        },
+        "visibility": 10000,
+        "wind": {"speed": round(random.uniform(0, 15), 2), "deg": random.randint(0, 359), "gust": round(random.uniform(0, 20), 2)},
+        "clouds": {"all": random.randint(0, 100)},
+        "dt": now,
+        "sys": {"sunrise": now - 6 * 3600, "sunset": now + 6 * 3600},
+    }
+
+def air_pollution_payload(lat: float, lon: float) -> Dict[str, Any]:
+    """Air pollution response shaped like OpenWeather's /air_pollution"""
+    return {
+        "coord": {"lon": lon, "lat": lat},
+        "list": [{
+            "main": {"aqi": random.randint(1, 5)},
+            "components": {
+                "co": round(random.uniform(150, 600), 2),
+                "no": round(random.uniform(0, 20), 2),
+                "no2": round(random.uniform(2, 80), 2),
+                "o3": round(random.uniform(10, 120), 2),
+                "so2": round(random.uniform(0, 20), 2),
+                "pm2_5": round(random.uniform(1, 75), 2),
+                "pm10": round(random.uniform(2, 100), 2),
+                "nh3": round(random.uniform(0, 10), 2),
+            },
+            "dt": int(time.time()),
+        }],
+    }
+
+class FakeOpenWeatherHandler(BaseHTTPRequestHandler):
+    """Request handler; behaviour is configured through attributes on the server"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        self.server.request_count += 1
+
+        latency = self.server.latency
+        if latency:
+            time.sleep(random.uniform(latency * 0.5, latency * 1.5))
+
+        if random.random() < self.server.error_rate:
+            status = random.choice([429, 503])
+            self.send_json(status, {"cod": status, "message": "injected failure"},
+                           {"Retry-After": str(self.server.retry_after)})
+            return
+
+        try:
+            lat, lon = float(query["lat"][0]), float(query["lon"][0])
+        except (KeyError, ValueError):
+            self.send_json(400, {"cod": 400, "message": "wrong latitude or longitude"})
+            return
+
+        if url.path.endswith("/weather"):
+            self.send_json(200, weather_payload(lat, lon))
+        elif url.path.endswith("/air_pollution"):
+            self.send_json(200, air_pollution_payload(lat, lon))
+        else:
+            self.send_json(404, {"cod": 404, "message": "not found"})
+
+    def send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(port: int = 0, latency: float = 0.0, error_rate: float = 0.0, retry_after: int = 1) -> ThreadingHTTPServer:
+    """Start the fake server in a daemon thread; port 0 picks a free port"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeOpenWeatherHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.retry_after = retry_after
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    """OPENWEATHER_BASE_URL value pointing at a running fake server"""
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/data/2.5"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenWeather API server")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="mean response latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 429/503")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with failures")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.error_rate, args.retry_after)
+    print(f"Fake OpenWeather listening on {base_url(server)}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
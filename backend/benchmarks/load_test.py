@@ -0,0 +1,99 @@
+"""
+Concurrent load test for the read endpoints of a running API server.
+
+Starts N parallel clients that hit the given endpoints for a fixed number of
+requests each and reports throughput and latency percentiles. Run it against
+a server before and after a change and compare the saved JSON results:
+
+    python -m benchmarks.load_test --clients 50 --requests 200 --label after
+"""
+import argparse
+import asyncio
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.common import save_results, summarize
+
+DEFAULT_ENDPOINTS = [
+    "/api/v1/weather?limit=500",
+    "/api/v1/air-pollution?limit=500",
+    "/api/v1/statistics?days=7",
+]
+
+async def run_client(
+    client: httpx.AsyncClient,
+    endpoint: str,
+    requests: int,
+    bust_cache: bool,
+    latencies: List[float],
+    counters: Dict[str, int]
+) -> None:
+    """Issue requests sequentially, recording the latency of each"""
+    for request_number in range(requests):
+        url = endpoint
+        if bust_cache:
+            # A unique parameter forces a response cache miss so the database path is measured
+            url += ("&" if "?" in url else "?") + f"_={id(latencies)}-{request_number}-{time.perf_counter_ns()}"
+        started_at = time.perf_counter()
+        try:
+            response = await client.get(url)
+            if response.status_code >= 400:
+                counters["errors"] += 1
+                continue
+        except httpx.HTTPError:
+            counters["errors"] += 1
+            continue
+        latencies.append(time.perf_counter() - started_at)
+
+async def run_endpoint(base_url: str, endpoint: str, clients: int, requests: int, bust_cache: bool) -> Dict[str, Any]:
+    """Load a single endpoint with parallel clients"""
+    latencies: List[float] = []
+    counters = {"errors": 0}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(
+            run_client(client, endpoint, requests, bust_cache, latencies, counters)
+            for _ in range(clients)
+        ))
+        elapsed = time.perf_counter() - started_at
+
+    return summarize(latencies, counters["errors"], elapsed)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load test for every endpoint"""
+    results = {
+        "base_url": args.base_url,
+        "clients": args.clients,
+        "requests_per_client": args.requests,
+        "bust_cache": args.bust_cache,
+        "endpoints": {},
+    }
+    for endpoint in args.endpoints:
+        results["endpoints"][endpoint] = await run_endpoint(
+            args.base_url, endpoint, args.clients, args.requests, args.bust_cache
+        )
+        summary = results["endpoints"][endpoint]
+        print(
+            f"{endpoint}: {summary['throughput_rps']} req/s, "
+            f"p50 {summary['p50_ms']} ms, p99 {summary['p99_ms']} ms, errors {summary['errors']}"
+        )
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the Weather Data API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=50, help="parallel clients per endpoint")
+    parser.add_argument("--requests", type=int, default=100, help="requests per client")
+    parser.add_argument("--bust-cache", action="store_true", help="bypass the response cache")
+    parser.add_argument("--label", help="name stored with the results, e.g. before/after")
+    parser.add_argument("--output", type=Path, help="JSON results file")
+    parser.add_argument("endpoints", nargs="*", default=DEFAULT_ENDPOINTS)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    save_results("load_test", results, args.label, args.output)
@@ -15,6 +15,31 @@ export const weatherApi = {
     return response.json()
   },
 
+  async getLatestMeasurements(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const response = await fetch(`${API_BASE_URL}/latest?${queryString}`)
+    return response.json()
+  },
+
+  async getWeatherSeries(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const response = await fetch(`${API_BASE_URL}/weather/series?${queryString}`)
+    return response.json()
+  },
+
+  async getAirPollutionSeries(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const response = await fetch(`${API_BASE_URL}/air-pollution/series?${queryString}`)
+    return response.json()
+  },
+
+  // Weather and air quality of several cities in one call, as arrays per field
+  async getMeasurements(params = {}) {
+    const queryString = new URLSearchParams(params).toString()
+    const response = await fetch(`${API_BASE_URL}/measurements?${queryString}`)
+    return response.json()
+  },
+
   async getStatistics(params = {}) {
     const queryString = new URLSearchParams(params).toString()
     const response = await fetch(`${API_BASE_URL}/statistics?${queryString}`)
@@ -38,5 +63,23 @@ export const weatherApi = {
   async getCollectorStatus() {
     const response = await fetch(`${API_BASE_URL}/collector/status`)
     return response.json()
+  },
+
+  // Pushes the latest readings of cities updated by each collector sweep;
+  // onResync is called when events were missed. Returns a function that closes the stream.
+  subscribeToMeasurements({ onMeasurements, onResync }) {
+    const source = new EventSource(`${API_BASE_URL}/stream`)
+    source.addEventListener('measurements', event => onMeasurements(JSON.parse(event.data)))
+    source.addEventListener('resync', () => onResync())
+    return () => source.close()
+  }
+}
+
+// Replace the rows of the cities in `updates`, keeping the list ordered by city
+export function mergeLatest(rows, updates) {
+  const byCity = new Map(rows.map(row => [`${row.city}|${row.country}`, row]))
+  for (const row of updates) {
+    byCity.set(`${row.city}|${row.country}`, row)
   }
+  return [...byCity.values()].sort((a, b) => a.city.localeCompare(b.city))
 }
\ No newline at end of file